@@ -1,14 +1,32 @@
 # app/crud.py
 from __future__ import annotations
 
-from datetime import datetime, timezone
+import io
+import os
+import csv
+import logging
+from datetime import datetime, timedelta, timezone
+from psycopg2.extras import execute_values
 from sqlalchemy import text
-from .db import SessionLocal
+from .db import SessionLocal, ODDS_MAX_VALID_HOURS
+
+logger = logging.getLogger("betdesk")
 
 
 # -----------------------
 # Alerts (dashboard)
 # -----------------------
+# {where_clause}: filtros opcionales por deporte/mercado
+LATEST_ALERTS_SQL = """
+    SELECT id, sport, league, event, start_time_utc, market, line, selection,
+           bookmaker, odds, reason, score, created_at_utc, sent_at_utc
+    FROM alerts
+    {where_clause}
+    ORDER BY created_at_utc DESC
+    LIMIT :limit
+"""
+
+
 def get_latest_alerts(limit: int = 200, sport: str = None, market: str = None) -> list[dict]:
     """
     Obtiene alertas recientes con filtros opcionales
@@ -36,14 +54,7 @@ def get_latest_alerts(limit: int = 200, sport: str = None, market: str = None) -
     if conditions:
         where_clause = "WHERE " + " AND ".join(conditions)
     
-    sql = text(f"""
-        SELECT id, sport, league, event, start_time_utc, market, line, selection,
-               bookmaker, odds, reason, score, created_at_utc, sent_at_utc
-        FROM alerts
-        {where_clause}
-        ORDER BY created_at_utc DESC
-        LIMIT :limit
-    """)
+    sql = text(LATEST_ALERTS_SQL.format(where_clause=where_clause))
     
     with SessionLocal() as db:
         rows = db.execute(sql, params).mappings().all()
@@ -53,115 +64,408 @@ def get_latest_alerts(limit: int = 200, sport: str = None, market: str = None) -
 def mark_sent(alert_id: int) -> None:
     if not alert_id:
         return
-    sql = text("UPDATE alerts SET sent_at_utc = now() WHERE id = :id")
+    mark_sent_many([alert_id])
+
+
+def mark_sent_many(alert_ids: list[int]) -> None:
+    """Marca varias alertas como enviadas en un solo UPDATE"""
+    ids = [int(i) for i in alert_ids if i]
+    if not ids:
+        return
+    sql = text("UPDATE alerts SET sent_at_utc = now() WHERE id = ANY(:ids)")
     with SessionLocal() as db:
-        db.execute(sql, {"id": alert_id})
+        db.execute(sql, {"ids": ids})
         db.commit()
 
 
-def create_alert_ev(row: dict, ev: float) -> int:
+ALERT_COLUMNS = (
+    "sport", "league", "event", "start_time_utc", "market", "line", "selection",
+    "bookmaker", "odds", "reason", "score", "created_at_utc",
+)
+
+
+def _alert_key(event, market, line, selection, bookmaker, odds, reason) -> tuple:
+    """Clave de uq_alert_dedupe (sql/dedupe.sql) con números normalizados"""
+    return (
+        event, market, float(line) if line is not None else None,
+        selection, bookmaker, float(odds), reason,
+    )
+
+
+def create_alerts(items: list[tuple[dict, str, float]]) -> list[int]:
     """
-    Crea alerta EV. Devuelve id o 0 si fue dedupeado por ON CONFLICT.
-    Requiere que exista un índice UNIQUE para que ON CONFLICT DO NOTHING sea útil.
+    Crea en un solo INSERT las alertas de una ejecución de job.
+
+    Args:
+        items: [(fila del snapshot, reason "EV"/"ANOMALY", score)]
+
+    Returns:
+        Ids en el mismo orden que items; 0 si la alerta fue dedupeada por
+        ON CONFLICT DO NOTHING (o repetida dentro del mismo lote).
     """
     now = datetime.now(timezone.utc)
-    event_name = f"{row.get('home','')} vs {row.get('away','')}".strip()
+    values, keys, first_index = [], [], {}
+    for i, (row, reason, score) in enumerate(items):
+        event_name = f"{row.get('home','')} vs {row.get('away','')}".strip()
+        key = _alert_key(event_name, row["market"], row["line"], row["selection"],
+                         row["bookmaker"], row["odds"], reason)
+        keys.append(key)
+        if key in first_index:
+            continue
+        first_index[key] = i
+        values.append((
+            row["sport"], row["league"], event_name, row["start_time_utc"], row["market"], row["line"],
+            row["selection"], row["bookmaker"], row["odds"], reason, float(score), now,
+        ))
+    if not values:
+        return []
 
-    sql = text("""
-      INSERT INTO alerts (
-        sport, league, event, start_time_utc, market, line, selection,
-        bookmaker, odds, reason, score, created_at_utc, sent_at_utc
-      )
-      VALUES (
-        :sport, :league, :event, :start_time_utc, :market, :line, :selection,
-        :bookmaker, :odds, 'EV', :score, :created_at_utc, NULL
-      )
+    sql = f"""
+      INSERT INTO alerts ({', '.join(ALERT_COLUMNS)}, sent_at_utc)
+      VALUES %s
       ON CONFLICT DO NOTHING
-      RETURNING id
-    """)
-
+      RETURNING id, event, market, line, selection, bookmaker, odds, reason
+    """
     with SessionLocal() as db:
-        res = db.execute(sql, {
-            "sport": row["sport"],
-            "league": row["league"],
-            "event": event_name,
-            "start_time_utc": row["start_time_utc"],
-            "market": row["market"],
-            "line": row["line"],
-            "selection": row["selection"],
-            "bookmaker": row["bookmaker"],
-            "odds": row["odds"],
-            "score": float(ev),
-            "created_at_utc": now,
-        }).scalar()
+        cur = db.connection().connection.cursor()
+        try:
+            inserted = execute_values(
+                cur, sql, values,
+                template=f"({', '.join(['%s'] * len(ALERT_COLUMNS))}, NULL)",
+                page_size=500, fetch=True,
+            )
+        finally:
+            cur.close()
         db.commit()
-        return int(res) if res is not None else 0
 
+    ids_by_key = {_alert_key(*r[1:]): int(r[0]) for r in inserted}
+    return [
+        ids_by_key.get(key, 0) if first_index[key] == i else 0
+        for i, key in enumerate(keys)
+    ]
 
-def create_alert_from_anomaly(row: dict, score: float) -> int:
-    now = datetime.now(timezone.utc)
-    event_name = f"{row.get('home','')} vs {row.get('away','')}".strip()
 
-    sql = text("""
-      INSERT INTO alerts (
-        sport, league, event, start_time_utc, market, line, selection,
-        bookmaker, odds, reason, score, created_at_utc, sent_at_utc
-      )
-      VALUES (
-        :sport, :league, :event, :start_time_utc, :market, :line, :selection,
-        :bookmaker, :odds, 'ANOMALY', :score, :created_at_utc, NULL
-      )
-      ON CONFLICT DO NOTHING
-      RETURNING id
-    """)
+def create_alerts_ev(items: list[tuple[dict, float]]) -> list[int]:
+    """Lote de alertas EV: [(fila, ev)] -> ids (0 = dedupeada)"""
+    return create_alerts([(row, "EV", ev) for row, ev in items])
 
-    with SessionLocal() as db:
-        res = db.execute(sql, {
-            "sport": row["sport"],
-            "league": row["league"],
-            "event": event_name,
-            "start_time_utc": row["start_time_utc"],
-            "market": row["market"],
-            "line": row["line"],
-            "selection": row["selection"],
-            "bookmaker": row["bookmaker"],
-            "odds": row["odds"],
-            "score": float(score),
-            "created_at_utc": now,
-        }).scalar()
-        db.commit()
-        return int(res) if res is not None else 0
+
+def create_alerts_from_anomaly(items: list[tuple[dict, float]]) -> list[int]:
+    """Lote de alertas de anomalía: [(fila, score)] -> ids (0 = dedupeada)"""
+    return create_alerts([(row, "ANOMALY", score) for row, score in items])
+
+
+def create_alert_ev(row: dict, ev: float) -> int:
+    """
+    Crea alerta EV. Devuelve id o 0 si fue dedupeado por ON CONFLICT.
+    Requiere que exista un índice UNIQUE para que ON CONFLICT DO NOTHING sea útil.
+    """
+    return create_alerts_ev([(row, ev)])[0]
+
+
+def create_alert_from_anomaly(row: dict, score: float) -> int:
+    return create_alerts_from_anomaly([(row, score)])[0]
 
 
 # -----------------------
 # Events / Odds ingestion
 # -----------------------
-def upsert_event(event: dict) -> int:
-    sql = text("""
-      INSERT INTO events (sport, league, start_time_utc, home, away, flashscore_url, status)
-      VALUES (:sport, :league, :start_time_utc, :home, :away, :flashscore_url, 'scheduled')
+EVENT_COLUMNS = ("sport", "league", "start_time_utc", "home", "away", "flashscore_url")
+
+
+def upsert_events(events: list[dict]) -> dict[str, int]:
+    """
+    Upsert de un lote de eventos en un solo INSERT ... ON CONFLICT multi-fila
+
+    Returns:
+        {flashscore_url: event_id}
+    """
+    # Una fila por URL: ON CONFLICT no admite tocar la misma fila dos veces
+    unique = {e["flashscore_url"]: e for e in events}
+    if not unique:
+        return {}
+
+    sql = f"""
+      INSERT INTO events ({', '.join(EVENT_COLUMNS)}, status)
+      VALUES %s
       ON CONFLICT (flashscore_url) DO UPDATE
       SET start_time_utc = EXCLUDED.start_time_utc,
           home = EXCLUDED.home,
           away = EXCLUDED.away,
           league = EXCLUDED.league
-      RETURNING id
-    """)
+      RETURNING flashscore_url, id
+    """
+    tuples = [tuple(e.get(c) for c in EVENT_COLUMNS) for e in unique.values()]
+    with SessionLocal() as db:
+        cur = db.connection().connection.cursor()
+        try:
+            rows = execute_values(cur, sql, tuples, template="(%s, %s, %s, %s, %s, %s, 'scheduled')",
+                                  page_size=500, fetch=True)
+        finally:
+            cur.close()
+        db.commit()
+    return {url: int(event_id) for url, event_id in rows}
+
+
+def upsert_event(event: dict) -> int:
+    return upsert_events([event])[event["flashscore_url"]]
+
+
+# Columnas de odds en el orden de COPY / execute_values
+ODDS_COLUMNS = ("event_id", "market", "line", "bookmaker", "selection", "odds", "captured_at_utc", "valid_until_utc")
+
+# "copy" (COPY FROM STDIN), "values" (execute_values) o "rows" (un INSERT por fila)
+ODDS_BULK_METHOD = os.environ.get("BETDESK_ODDS_BULK", "copy")
+
+
+def _odds_tuples(batches) -> list[tuple]:
+    """[(event_id, filas)] -> tuplas en el orden de ODDS_COLUMNS (valid_until = captura)"""
+    return [
+        (event_id, r["market"], r["line"], r["bookmaker"], r["selection"], r["odds"],
+         r["captured_at_utc"], r["captured_at_utc"])
+        for event_id, rows in batches
+        for r in rows
+    ]
+
+
+def _copy_odds(cur, tuples: list[tuple]) -> None:
+    """COPY odds FROM STDIN en formato CSV (campo vacío sin comillas = NULL)"""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for t in tuples:
+        writer.writerow(["" if v is None else v.isoformat() if isinstance(v, datetime) else v for v in t])
+    buf.seek(0)
+    cur.copy_expert(f"COPY odds ({', '.join(ODDS_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buf)
+
+
+def _values_odds(cur, tuples: list[tuple], returning: str = "") -> list[tuple]:
+    sql = f"INSERT INTO odds ({', '.join(ODDS_COLUMNS)}) VALUES %s {returning}"
+    return execute_values(cur, sql, tuples, page_size=1000, fetch=bool(returning)) or []
+
+
+def insert_odds_bulk(batches: list[tuple[int, list[dict]]], method: str = None) -> int:
+    """
+    Inserta las cuotas de varios eventos en una sola transacción
+
+    Args:
+        batches: [(event_id, filas)]
+        method: "copy" (default), "values" o "rows"; si COPY falla se
+                reintenta con execute_values dentro de la misma transacción
+
+    Returns:
+        Filas insertadas
+    """
+    method = method or ODDS_BULK_METHOD
+    tuples = _odds_tuples(batches)
+    if not tuples:
+        return 0
+
     with SessionLocal() as db:
-        event_id = db.execute(sql, event).scalar_one()
+        cur = db.connection().connection.cursor()
+        try:
+            if method == "rows":
+                placeholders = ", ".join(["%s"] * len(ODDS_COLUMNS))
+                sql = f"INSERT INTO odds ({', '.join(ODDS_COLUMNS)}) VALUES ({placeholders})"
+                for t in tuples:
+                    cur.execute(sql, t)
+            elif method == "copy":
+                cur.execute("SAVEPOINT odds_copy")
+                try:
+                    _copy_odds(cur, tuples)
+                except Exception as e:
+                    cur.execute("ROLLBACK TO SAVEPOINT odds_copy")
+                    logger.warning(f"⚠️ COPY de odds falló ({e}), usando execute_values")
+                    _values_odds(cur, tuples)
+            else:
+                _values_odds(cur, tuples)
+            _upsert_latest_bulk(cur, tuples)
+        finally:
+            cur.close()
         db.commit()
-        return int(event_id)
+    return len(tuples)
+
+
+def _upsert_latest_bulk(cur, tuples: list[tuple]) -> None:
+    """
+    Mantiene odds_latest en el insert completo (sin modo delta). COPY no
+    devuelve ids, así que odds_id queda NULL; una captura más vieja que la
+    guardada (p.ej. un scrape lento) no pisa la más reciente.
+    """
+    latest = {}
+    for t in tuples:
+        event_id, market, line, bookmaker, selection = t[:5]
+        key = (event_id, market, _line_key(line), bookmaker, selection)
+        if key not in latest or t[6] >= latest[key][6]:
+            latest[key] = t
+    sql = """
+      INSERT INTO odds_latest (event_id, market, line, bookmaker, selection, odds, odds_id, captured_at_utc, valid_until_utc)
+      VALUES %s
+      ON CONFLICT (event_id, market, line_key, bookmaker, selection) DO UPDATE
+      SET odds = EXCLUDED.odds,
+          odds_id = NULL,
+          captured_at_utc = CASE WHEN odds_latest.odds = EXCLUDED.odds
+                                 THEN odds_latest.captured_at_utc ELSE EXCLUDED.captured_at_utc END,
+          valid_until_utc = EXCLUDED.valid_until_utc
+      WHERE odds_latest.valid_until_utc <= EXCLUDED.valid_until_utc
+    """
+    execute_values(
+        cur, sql,
+        [(*t[:6], None, t[6], t[7]) for t in latest.values()],
+        page_size=1000,
+    )
 
 
 def insert_odds(event_id: int, rows: list[dict]) -> None:
-    sql = text("""
-      INSERT INTO odds (event_id, market, line, bookmaker, selection, odds, captured_at_utc)
-      VALUES (:event_id, :market, :line, :bookmaker, :selection, :odds, :captured_at_utc)
-    """)
+    insert_odds_bulk([(event_id, rows)])
+
+
+# -----------------------
+# Odds en modo delta
+# -----------------------
+def _line_key(line):
+    return float(line) if line is not None else None
+
+
+# Sentencias de write_odds_deltas (placeholders de psycopg2). Trabajan sobre
+# la tabla temporal odds_incoming con las filas del scrape; check_query_plans.py
+# las explica tal cual
+ODDS_INCOMING_DDL = """
+  CREATE TEMP TABLE odds_incoming (
+    event_id BIGINT, market TEXT, line NUMERIC, bookmaker TEXT, selection TEXT,
+    odds NUMERIC, captured_at_utc TIMESTAMPTZ
+  ) ON COMMIT DROP
+"""
+
+_DELTA_MATCH = """
+  l.event_id = i.event_id AND l.market = i.market AND l.line_key = COALESCE(i.line, 'NaN')
+  AND l.bookmaker = i.bookmaker AND l.selection = i.selection
+"""
+_DELTA_UNCHANGED = (
+    "l.odds_id IS NOT NULL AND l.odds = i.odds"
+    " AND i.captured_at_utc - l.captured_at_utc < %(max_valid)s::interval"
+)
+
+HEARTBEAT_ODDS_SQL = f"""
+  UPDATE odds o
+  SET valid_until_utc = GREATEST(o.valid_until_utc, i.captured_at_utc)
+  FROM odds_incoming i
+  JOIN odds_latest l ON {_DELTA_MATCH}
+  WHERE {_DELTA_UNCHANGED}
+    AND o.id = l.odds_id AND o.captured_at_utc = l.captured_at_utc
+    AND o.captured_at_utc >= %(recent)s
+  RETURNING o.event_id
+"""
+
+HEARTBEAT_LATEST_SQL = f"""
+  UPDATE odds_latest l
+  SET valid_until_utc = GREATEST(l.valid_until_utc, i.captured_at_utc)
+  FROM odds_incoming i
+  WHERE {_DELTA_MATCH} AND {_DELTA_UNCHANGED}
+"""
+
+INSERT_CHANGED_SQL = f"""
+  WITH changed AS (
+    SELECT i.*
+    FROM odds_incoming i
+    LEFT JOIN odds_latest l ON {_DELTA_MATCH}
+    WHERE NOT ({_DELTA_UNCHANGED})
+  ),
+  inserted AS (
+    INSERT INTO odds (event_id, market, line, bookmaker, selection, odds, captured_at_utc, valid_until_utc)
+    SELECT event_id, market, line, bookmaker, selection, odds, captured_at_utc, captured_at_utc
+    FROM changed
+    RETURNING id, event_id, market, line, bookmaker, selection, odds, captured_at_utc, valid_until_utc
+  ),
+  latest AS (
+    INSERT INTO odds_latest (event_id, market, line, bookmaker, selection, odds, odds_id, captured_at_utc, valid_until_utc)
+    SELECT event_id, market, line, bookmaker, selection, odds, id, captured_at_utc, valid_until_utc
+    FROM inserted
+    ON CONFLICT (event_id, market, line_key, bookmaker, selection) DO UPDATE
+    SET odds = EXCLUDED.odds,
+        odds_id = EXCLUDED.odds_id,
+        captured_at_utc = EXCLUDED.captured_at_utc,
+        valid_until_utc = EXCLUDED.valid_until_utc
+    -- Un scrape atrasado queda en el histórico pero no pisa un precio más reciente
+    WHERE odds_latest.valid_until_utc <= EXCLUDED.valid_until_utc
+  )
+  SELECT event_id FROM inserted
+"""
+
+
+def odds_delta_params(oldest_capture: datetime) -> dict:
+    """Parámetros de las sentencias delta para un lote cuya captura más antigua es `oldest_capture`"""
+    return {
+        "max_valid": f"{ODDS_MAX_VALID_HOURS} hours",
+        # Las filas en heartbeat tienen menos de ODDS_MAX_VALID_HOURS: solo particiones recientes
+        "recent": oldest_capture - timedelta(hours=ODDS_MAX_VALID_HOURS + 1),
+    }
+
+
+def write_odds_deltas(batches: list[tuple[int, list[dict]]]) -> dict:
+    """
+    Escribe en una transacción el resultado de varios scrapes en modo delta.
+    La decisión se toma en SQL contra odds_latest, no contra una cache del
+    proceso: varios workers (scrape_queue) pueden escribir el mismo evento.
+
+    - cada evento se serializa con pg_advisory_xact_lock(event_id)
+    - mismo precio que odds_latest y fila de menos de ODDS_MAX_VALID_HOURS
+      -> heartbeat: valid_until_utc de la fila de odds y de odds_latest
+    - precio distinto, clave nueva, fila escrita sin modo delta (odds_id
+      NULL) o fila demasiado vieja -> INSERT en odds y upsert en odds_latest
+
+    Args:
+        batches: [(event_id, filas)] con una fila por clave
+
+    Returns:
+        {event_id: (filas insertadas, filas con heartbeat)}
+    """
+    tuples = [
+        (event_id, r["market"], r["line"], r["bookmaker"], r["selection"], r["odds"], r["captured_at_utc"])
+        for event_id, rows in batches
+        for r in rows
+    ]
+    counts = {event_id: [0, 0] for event_id, _ in batches}
+    if not tuples:
+        return {event_id: (0, 0) for event_id in counts}
+
+    params = odds_delta_params(min(t[6] for t in tuples))
+
     with SessionLocal() as db:
-        for r in rows:
-            db.execute(sql, {"event_id": event_id, **r})
+        cur = db.connection().connection.cursor()
+        try:
+            # Locks en orden de event_id: dos transacciones con eventos en común no se interbloquean
+            cur.execute(
+                "SELECT pg_advisory_xact_lock(event_id) FROM unnest(%s::bigint[]) AS event_id",
+                (sorted(counts),),
+            )
+            cur.execute(ODDS_INCOMING_DDL)
+            execute_values(cur, "INSERT INTO odds_incoming VALUES %s", tuples, page_size=1000)
+
+            # Heartbeat antes del insert: después, las claves recién insertadas también coincidirían
+            cur.execute(HEARTBEAT_ODDS_SQL, params)
+            for (event_id,) in cur.fetchall():
+                counts[event_id][1] += 1
+            cur.execute(HEARTBEAT_LATEST_SQL, params)
+
+            cur.execute(INSERT_CHANGED_SQL, params)
+            for (event_id,) in cur.fetchall():
+                counts[event_id][0] += 1
+        finally:
+            cur.close()
         db.commit()
+    return {event_id: tuple(c) for event_id, c in counts.items()}
+
+
+LATEST_ODDS_SNAPSHOT_SQL = """
+  SELECT e.id as event_id, e.sport, e.league, e.home, e.away, e.start_time_utc,
+         l.market, l.line, l.bookmaker, l.selection, l.odds,
+         l.valid_until_utc AS captured_at_utc
+  FROM odds_latest l
+  JOIN events e ON e.id = l.event_id
+  WHERE l.valid_until_utc >= (now() AT TIME ZONE 'utc') - (:mins || ' minutes')::interval
+    AND e.start_time_utc > now()
+"""
+LATEST_ODDS_SNAPSHOT_BY_SPORT_SQL = LATEST_ODDS_SNAPSHOT_SQL + "    AND e.sport = :sport\n"
 
 
 def fetch_latest_odds_snapshot(minutes: int = 10, sport: str = None) -> list[dict]:
@@ -172,29 +476,181 @@ def fetch_latest_odds_snapshot(minutes: int = 10, sport: str = None) -> list[dic
         minutes: Ventana de tiempo en minutos
         sport: Filtro opcional por deporte ("basketball", "football", "tennis")
     
+    Lee odds_latest (una fila por evento/mercado/línea/bookmaker/selección,
+    mantenida en el ingest): cada precio aparece una sola vez aunque se haya
+    scrapeado muchas veces. Vale mientras su último avistamiento
+    (valid_until_utc, devuelto como captured_at_utc) caiga en la ventana, y
+    los eventos ya empezados quedan fuera.
+    
     Returns:
         Lista de dicts con odds y metadata del evento
     """
     if sport:
-        sql = text("""
-          SELECT e.id as event_id, e.sport, e.league, e.home, e.away, e.start_time_utc,
-                 o.market, o.line, o.bookmaker, o.selection, o.odds, o.captured_at_utc
-          FROM odds o
-          JOIN events e ON e.id = o.event_id
-          WHERE o.captured_at_utc >= (now() AT TIME ZONE 'utc') - (:mins || ' minutes')::interval
-            AND e.sport = :sport
-        """)
+        sql = text(LATEST_ODDS_SNAPSHOT_BY_SPORT_SQL)
         with SessionLocal() as db:
             rows = db.execute(sql, {"mins": minutes, "sport": sport}).mappings().all()
             return [dict(r) for r in rows]
     else:
-        sql = text("""
-          SELECT e.id as event_id, e.sport, e.league, e.home, e.away, e.start_time_utc,
-                 o.market, o.line, o.bookmaker, o.selection, o.odds, o.captured_at_utc
-          FROM odds o
-          JOIN events e ON e.id = o.event_id
-          WHERE o.captured_at_utc >= (now() AT TIME ZONE 'utc') - (:mins || ' minutes')::interval
-        """)
+        sql = text(LATEST_ODDS_SNAPSHOT_SQL)
         with SessionLocal() as db:
             rows = db.execute(sql, {"mins": minutes}).mappings().all()
             return [dict(r) for r in rows]
+
+
+# -----------------------
+# Cola de scraping (scrape_tasks)
+# -----------------------
+def enqueue_scrape_tasks(events: list[dict], markets_by_sport: dict, max_attempts: int) -> int:
+    """
+    Encola una tarea por (evento, mercado). Una tarea ya pendiente o en curso
+    para el mismo par no se duplica.
+
+    Returns:
+        Tareas nuevas
+    """
+    # Un (evento, mercado) por tupla aunque el evento venga repetido
+    tasks = {
+        (e["flashscore_url"], market): (*(e.get(c) for c in EVENT_COLUMNS), market, max_attempts)
+        for e in events
+        for market in markets_by_sport.get(e["sport"], [])
+    }
+    if not tasks:
+        return 0
+
+    sql = """
+      INSERT INTO scrape_tasks (sport, league, start_time_utc, home, away, event_url, market, max_attempts)
+      VALUES %s
+      ON CONFLICT (event_url, market) WHERE status IN ('pending', 'running') DO NOTHING
+      RETURNING id
+    """
+    with SessionLocal() as db:
+        cur = db.connection().connection.cursor()
+        try:
+            rows = execute_values(cur, sql, list(tasks.values()), page_size=500, fetch=True)
+        finally:
+            cur.close()
+        db.commit()
+    return len(rows)
+
+
+def claim_scrape_tasks(worker_id: str, limit: int, lease_seconds: int) -> list[dict]:
+    """
+    Reclama hasta `limit` tareas pendientes (o con el lease vencido) con
+    FOR UPDATE SKIP LOCKED: varios workers pueden reclamar a la vez sin
+    bloquearse ni repetir trabajo. Las tareas de eventos ya empezados no se
+    reclaman (las cuotas pre-partido ya no sirven) y las borra purge_scrape_tasks.
+    """
+    sql = text("""
+      WITH claimable AS (
+        SELECT id FROM scrape_tasks
+        WHERE attempts < max_attempts
+          AND start_time_utc > now()
+          AND ((status = 'pending' AND available_at <= now())
+               OR (status = 'running' AND lease_until < now()))
+        ORDER BY start_time_utc, id
+        LIMIT :limit
+        FOR UPDATE SKIP LOCKED
+      )
+      UPDATE scrape_tasks t
+      SET status = 'running',
+          attempts = t.attempts + 1,
+          worker_id = :worker_id,
+          lease_until = now() + (:lease || ' seconds')::interval,
+          updated_at = now()
+      FROM claimable
+      WHERE t.id = claimable.id
+      RETURNING t.id, t.sport, t.league, t.start_time_utc, t.home, t.away,
+                t.event_url AS flashscore_url, t.market, t.attempts
+    """)
+    # Leases vencidos sin intentos restantes: el worker murió en el último intento
+    expire_sql = text("""
+      UPDATE scrape_tasks
+      SET status = 'failed', last_error = 'lease expired', lease_until = NULL, updated_at = now()
+      WHERE status = 'running' AND lease_until < now() AND attempts >= max_attempts
+    """)
+    with SessionLocal() as db:
+        db.execute(expire_sql)
+        rows = db.execute(sql, {"worker_id": worker_id, "limit": limit, "lease": lease_seconds}).mappings().all()
+        db.commit()
+        return [dict(r) for r in rows]
+
+
+# Solo el worker que tiene la tarea, y mientras su lease siga vigente, puede
+# cerrarla: con el lease vencido otro worker pudo haberla reclamado
+OWNED_TASK_FILTER = """
+        id = ANY(:ids)
+        AND worker_id = :worker_id
+        AND status = 'running'
+        AND lease_until >= now()
+"""
+
+
+def complete_scrape_tasks(worker_id: str, task_ids: list[int]) -> int:
+    """
+    Marca como done las tareas del worker
+
+    Returns:
+        Tareas cerradas (menos que task_ids si se perdió el lease de alguna)
+    """
+    if not task_ids:
+        return 0
+    sql = text(f"""
+      UPDATE scrape_tasks
+      SET status = 'done', lease_until = NULL, last_error = NULL, updated_at = now()
+      WHERE {OWNED_TASK_FILTER}
+    """)
+    with SessionLocal() as db:
+        res = db.execute(sql, {"ids": list(task_ids), "worker_id": worker_id})
+        db.commit()
+        return res.rowcount
+
+
+def fail_scrape_tasks(worker_id: str, task_ids: list[int], error: str, retry_delay: int) -> int:
+    """
+    Devuelve las tareas del worker a la cola con backoff exponencial, o las
+    marca failed si agotaron intentos
+
+    Returns:
+        Tareas actualizadas (menos que task_ids si se perdió el lease de alguna)
+    """
+    if not task_ids:
+        return 0
+    sql = text(f"""
+      UPDATE scrape_tasks
+      SET status = CASE WHEN attempts < max_attempts THEN 'pending' ELSE 'failed' END,
+          available_at = now() + :delay * power(2, attempts - 1) * interval '1 second',
+          lease_until = NULL,
+          last_error = :error,
+          updated_at = now()
+      WHERE {OWNED_TASK_FILTER}
+    """)
+    with SessionLocal() as db:
+        res = db.execute(sql, {"ids": list(task_ids), "worker_id": worker_id,
+                               "error": error[:500], "delay": retry_delay})
+        db.commit()
+        return res.rowcount
+
+
+def purge_scrape_tasks(retention_hours: int) -> int:
+    """
+    Borra tareas terminadas (done/failed) más antiguas que la retención y
+    las que ya no se reclamarán porque su evento empezó (pendientes, o en
+    curso con el lease vencido)
+    """
+    sql = text("""
+      DELETE FROM scrape_tasks
+      WHERE (status IN ('done', 'failed')
+             AND updated_at < now() - (:hours || ' hours')::interval)
+         OR (start_time_utc <= now()
+             AND (status = 'pending' OR (status = 'running' AND lease_until < now())))
+    """)
+    with SessionLocal() as db:
+        res = db.execute(sql, {"hours": retention_hours})
+        db.commit()
+        return res.rowcount
+
+
+def scrape_queue_counts() -> dict:
+    sql = text("SELECT status, COUNT(*) AS n FROM scrape_tasks GROUP BY status")
+    with SessionLocal() as db:
+        return {r["status"]: r["n"] for r in db.execute(sql).mappings().all()}
@@ -0,0 +1,102 @@
+#app/db_async.py
+"""
+Acceso async a Postgres para los endpoints de FastAPI (asyncpg)
+El pool se crea en el startup de la app y las consultas no bloquean el
+event loop, a diferencia de SessionLocal/psycopg2 (scheduler y jobs).
+"""
+import os
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+import asyncpg
+
+from .db import database_url
+
+logger = logging.getLogger("betdesk")
+
+ASYNC_POOL_MIN = int(os.environ.get("BETDESK_ASYNC_POOL_MIN", "2"))
+ASYNC_POOL_MAX = int(os.environ.get("BETDESK_ASYNC_POOL_MAX", "10"))
+ASYNC_COMMAND_TIMEOUT = 15  # segundos por consulta
+
+
+def asyncpg_dsn(url: str) -> str:
+    """asyncpg no entiende el driver de SQLAlchemy: postgresql+psycopg2:// -> postgresql://"""
+    scheme, sep, rest = url.partition("://")
+    return scheme.split("+", 1)[0] + sep + rest
+
+
+class AsyncDatabase:
+    """
+    Pool asyncpg compartido por los endpoints.
+
+    - start()/close(): startup y shutdown de la app
+    - fetch()/fetchrow()/fetchval(): consultas con placeholders $1, $2...;
+      si el pool no se pudo crear en el startup se reintenta aquí
+    - _start_lock: varias peticiones concurrentes sin pool crean uno solo
+    """
+
+    def __init__(self, dsn: str = None, min_size: int = None, max_size: int = None):
+        self.dsn = asyncpg_dsn(dsn or database_url())
+        self.min_size = min_size or ASYNC_POOL_MIN
+        self.max_size = max_size or ASYNC_POOL_MAX
+        self._pool: Optional[asyncpg.Pool] = None
+        self._start_lock = asyncio.Lock()
+
+    async def start(self):
+        if self._pool is not None:
+            return
+        async with self._start_lock:
+            # Otra corrutina pudo crearlo mientras esperábamos el lock
+            if self._pool is not None:
+                return
+            try:
+                self._pool = await asyncpg.create_pool(
+                    self.dsn,
+                    min_size=self.min_size,
+                    max_size=self.max_size,
+                    command_timeout=ASYNC_COMMAND_TIMEOUT,
+                )
+                logger.info(f"✅ Pool async de Postgres listo ({self.min_size}-{self.max_size} conexiones)")
+            except Exception as e:
+                logger.error(f"❌ No se pudo crear el pool async de Postgres: {e}")
+
+    async def close(self):
+        async with self._start_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            await pool.close()
+
+    async def pool(self) -> asyncpg.Pool:
+        if self._pool is None:
+            await self.start()
+        if self._pool is None:
+            raise RuntimeError("Pool async de Postgres no disponible")
+        return self._pool
+
+    async def fetch(self, query: str, *args) -> List[asyncpg.Record]:
+        return await (await self.pool()).fetch(query, *args)
+
+    async def fetchrow(self, query: str, *args) -> Optional[asyncpg.Record]:
+        return await (await self.pool()).fetchrow(query, *args)
+
+    async def fetchval(self, query: str, *args) -> Any:
+        return await (await self.pool()).fetchval(query, *args)
+
+    def stats(self) -> Dict[str, Any]:
+        if self._pool is None:
+            return {"ready": False, "min_size": self.min_size, "max_size": self.max_size}
+        return {
+            "ready": True,
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+            "size": self._pool.get_size(),
+            "idle": self._pool.get_idle_size(),
+        }
+
+
+# ============================================================================
+# INSTANCIA GLOBAL
+# ============================================================================
+
+async_db = AsyncDatabase()
@@ -12,6 +12,40 @@ from sqlalchemy import text
 
 logger = logging.getLogger(__name__)
 
+# Últimos partidos de un equipo (get_team_stats)
+TEAM_GAMES_SQL = """
+    SELECT 
+        home_team, away_team, home_score, away_score,
+        (home_team = :team) as is_home,
+        game_date
+    FROM game_results
+    WHERE (home_team = :team OR away_team = :team)
+      AND league = :league
+      AND game_date >= NOW() - INTERVAL '60 days'
+      AND home_score IS NOT NULL
+      AND away_score IS NOT NULL
+    ORDER BY game_date DESC
+    LIMIT :limit
+"""
+
+# Forma reciente con victoria/derrota por partido (get_recent_form)
+RECENT_FORM_SQL = """
+    SELECT 
+        home_team, away_team, home_score, away_score,
+        (home_team = :team) as is_home,
+        CASE 
+            WHEN home_team = :team AND home_score > away_score THEN 1
+            WHEN away_team = :team AND away_score > home_score THEN 1
+            ELSE 0
+        END as won
+    FROM game_results
+    WHERE (home_team = :team OR away_team = :team)
+      AND league = :league
+      AND game_date >= NOW() - INTERVAL '30 days'
+    ORDER BY game_date DESC
+    LIMIT :limit
+"""
+
 
 class BasketballStatsEngine:
     """
@@ -92,20 +126,7 @@ class BasketballStatsEngine:
         
         try:
             # Consultar últimos N partidos del equipo
-            sql = text("""
-                SELECT 
-                    home_team, away_team, home_score, away_score,
-                    (home_team = :team) as is_home,
-                    game_date
-                FROM game_results
-                WHERE (home_team = :team OR away_team = :team)
-                  AND league = :league
-                  AND game_date >= NOW() - INTERVAL '60 days'
-                  AND home_score IS NOT NULL
-                  AND away_score IS NOT NULL
-                ORDER BY game_date DESC
-                LIMIT :limit
-            """)
+            sql = text(TEAM_GAMES_SQL)
             
             results = self.db.execute(sql, {
                 "team": team,
@@ -295,22 +316,7 @@ class BasketballStatsEngine:
             return {"trend": "UNKNOWN"}
         
         try:
-            sql = text("""
-                SELECT 
-                    home_team, away_team, home_score, away_score,
-                    (home_team = :team) as is_home,
-                    CASE 
-                        WHEN home_team = :team AND home_score > away_score THEN 1
-                        WHEN away_team = :team AND away_score > home_score THEN 1
-                        ELSE 0
-                    END as won
-                FROM game_results
-                WHERE (home_team = :team OR away_team = :team)
-                  AND league = :league
-                  AND game_date >= NOW() - INTERVAL '30 days'
-                ORDER BY game_date DESC
-                LIMIT :limit
-            """)
+            sql = text(RECENT_FORM_SQL)
             
             results = self.db.execute(sql, {
                 "team": team,
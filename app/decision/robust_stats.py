@@ -11,6 +11,57 @@ from sqlalchemy import text
 
 logger = logging.getLogger(__name__)
 
+# Enfrentamientos directos (get_h2h_stats)
+H2H_SQL = """
+    SELECT 
+        home_team, away_team, home_score, away_score, game_date
+    FROM game_results
+    WHERE sport = :sport
+      AND league = :league
+      AND (
+          (home_team = :home AND away_team = :away) OR
+          (home_team = :away AND away_team = :home)
+      )
+      AND game_date >= NOW() - INTERVAL '2 years'
+      AND home_score IS NOT NULL
+      AND away_score IS NOT NULL
+    ORDER BY game_date DESC
+    LIMIT :limit
+"""
+
+# Forma reciente de un equipo (get_form_stats)
+FORM_SQL = """
+    SELECT 
+        home_team, away_team, home_score, away_score,
+        (home_team = :team) as is_home,
+        game_date
+    FROM game_results
+    WHERE sport = :sport
+      AND league = :league
+      AND (home_team = :team OR away_team = :team)
+      AND game_date >= NOW() - INTERVAL '30 days'
+      AND home_score IS NOT NULL
+      AND away_score IS NOT NULL
+    ORDER BY game_date DESC
+    LIMIT :limit
+"""
+
+# Totales recientes de un equipo (get_trends, mercado TOTAL)
+TOTALS_TREND_SQL = """
+    SELECT 
+        home_score, away_score,
+        (home_score + away_score) as total
+    FROM game_results
+    WHERE sport = :sport
+      AND league = :league
+      AND (home_team = :team OR away_team = :team)
+      AND game_date >= NOW() - INTERVAL '30 days'
+      AND home_score IS NOT NULL
+      AND away_score IS NOT NULL
+    ORDER BY game_date DESC
+    LIMIT :limit
+"""
+
 
 class RobustStatsEngine:
     """
@@ -63,22 +114,7 @@ class RobustStatsEngine:
             return self._get_default_h2h()
         
         try:
-            sql = text("""
-                SELECT 
-                    home_team, away_team, home_score, away_score, game_date
-                FROM game_results
-                WHERE sport = :sport
-                  AND league = :league
-                  AND (
-                      (home_team = :home AND away_team = :away) OR
-                      (home_team = :away AND away_team = :home)
-                  )
-                  AND game_date >= NOW() - INTERVAL '2 years'
-                  AND home_score IS NOT NULL
-                  AND away_score IS NOT NULL
-                ORDER BY game_date DESC
-                LIMIT :limit
-            """)
+            sql = text(H2H_SQL)
             
             results = self.db.execute(sql, {
                 "sport": sport,
@@ -191,21 +227,7 @@ class RobustStatsEngine:
             return {"trend": "NEUTRAL"}
         
         try:
-            sql = text("""
-                SELECT 
-                    home_team, away_team, home_score, away_score,
-                    (home_team = :team) as is_home,
-                    game_date
-                FROM game_results
-                WHERE sport = :sport
-                  AND league = :league
-                  AND (home_team = :team OR away_team = :team)
-                  AND game_date >= NOW() - INTERVAL '30 days'
-                  AND home_score IS NOT NULL
-                  AND away_score IS NOT NULL
-                ORDER BY game_date DESC
-                LIMIT :limit
-            """)
+            sql = text(FORM_SQL)
             
             results = self.db.execute(sql, {
                 "sport": sport,
@@ -309,20 +331,7 @@ class RobustStatsEngine:
             return {"trend": "NEUTRAL"}
         
         try:
-            sql = text("""
-                SELECT 
-                    home_score, away_score,
-                    (home_score + away_score) as total
-                FROM game_results
-                WHERE sport = :sport
-                  AND league = :league
-                  AND (home_team = :team OR away_team = :team)
-                  AND game_date >= NOW() - INTERVAL '30 days'
-                  AND home_score IS NOT NULL
-                  AND away_score IS NOT NULL
-                ORDER BY game_date DESC
-                LIMIT :limit
-            """)
+            sql = text(TOTALS_TREND_SQL)
             
             results = self.db.execute(sql, {
                 "sport": sport,
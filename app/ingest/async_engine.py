@@ -0,0 +1,314 @@
+# app/ingest/async_engine.py
+"""
+Motor de ingesta asíncrono para los jobs job_ingest_*
+Scrapea N eventos a la vez con playwright.async_api y escribe los
+resultados en la base de datos en lotes a medida que terminan
+"""
+
+import time
+import asyncio
+import logging
+import concurrent.futures
+import threading
+from typing import Dict, List, Optional, Any
+from urllib.parse import urlparse
+
+from .scraper_config import SCRAPER_CONFIG
+from .browser_pool import AsyncBrowserPool
+from .odds_digest import odds_digest_cache
+from .odds_delta import odds_delta_writer
+from .fixture_cache import fixture_cache
+from .provider_feed import flashscore_feed_client
+from .provider_flashscore import (
+    SPORT_MARKETS,
+    allowed_markets,
+    release_probes,
+    scrape_markets_steps,
+    run_steps_async,
+    _detect_sport_from_url,
+)
+
+logger = logging.getLogger("betdesk.scraper")
+
+
+# ============================================================================
+# SCRAPING ASYNC DE MERCADOS
+# ============================================================================
+
+async def scrape_markets_async(
+    page, event_url: str, markets: List[str], sport: str, market_errors: Dict[str, str] = None
+) -> List[Dict]:
+    """
+    Versión async de provider_flashscore.scrape_flashscore_markets: mismo
+    flujo (scrape_markets_steps) ejecutado con playwright.async_api.
+    `markets` ya viene filtrado por allowed_markets; `market_errors` recibe
+    {mercado: error} de los que fallaron.
+    """
+    return await run_steps_async(scrape_markets_steps(page, event_url, markets, sport, market_errors))
+
+
+# ============================================================================
+# MOTOR DE INGESTA
+# ============================================================================
+
+class AsyncIngestEngine:
+    """
+    Motor de ingesta concurrente.
+
+    Corre un event loop propio en un hilo dedicado para que el navegador
+    async y los límites de concurrencia se compartan entre todos los jobs
+    del scheduler (que corren en hilos distintos).
+
+    Límites:
+    - concurrency_per_sport: eventos simultáneos por deporte
+    - concurrency_per_host: páginas simultáneas contra un mismo host
+    """
+
+    def __init__(
+        self,
+        concurrency_per_sport: Dict[str, int] = None,
+        concurrency_per_host: int = None,
+        event_timeout: float = None,
+    ):
+        self.concurrency_per_sport = concurrency_per_sport or SCRAPER_CONFIG["concurrency_per_sport"]
+        self.concurrency_per_host = concurrency_per_host or SCRAPER_CONFIG["concurrency_per_host"]
+        self.event_timeout = event_timeout or SCRAPER_CONFIG["event_timeout"]
+        self.write_batch_rows = SCRAPER_CONFIG["odds_write_batch_rows"]
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+        self.pool: Optional[AsyncBrowserPool] = None
+        self._sport_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    # ------------------------------------------------------------------
+    # API sync (para los jobs del scheduler)
+    # ------------------------------------------------------------------
+
+    def ingest_events(self, sport: str, events: List[Dict]) -> Dict[str, Any]:
+        """
+        Upsert + scraping de todos los eventos de forma concurrente; las
+        cuotas se insertan en lotes de varios eventos (odds_write_batch_rows).
+        Bloquea hasta que terminan todos y devuelve un resumen
+        (summary["errors"]: {flashscore_url: error} de los que fallaron;
+        summary["market_errors"]: {flashscore_url: {mercado: error}} de los
+        mercados que fallaron en eventos escritos).
+        """
+        return self.submit(self._ingest(sport, events)).result()
+
+    def submit(self, coro) -> "concurrent.futures.Future":
+        """
+        Programa una corrutina en el loop del motor (comparte navegador y
+        límites con la ingesta) sin esperar a que termine
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "browser_pool": self.pool.stats() if self.pool else None,
+            "concurrency_per_sport": self.concurrency_per_sport,
+            "concurrency_per_host": self.concurrency_per_host,
+        }
+
+    # ------------------------------------------------------------------
+    # Event loop dedicado
+    # ------------------------------------------------------------------
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._start_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever,
+                    name="betdesk-ingest-loop",
+                    daemon=True,
+                )
+                self._thread.start()
+            return self._loop
+
+    def _sport_semaphore(self, sport: str) -> asyncio.Semaphore:
+        if sport not in self._sport_semaphores:
+            limit = self.concurrency_per_sport.get(sport, 2)
+            self._sport_semaphores[sport] = asyncio.Semaphore(limit)
+        return self._sport_semaphores[sport]
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).netloc or "unknown"
+        if host not in self._host_semaphores:
+            self._host_semaphores[host] = asyncio.Semaphore(self.concurrency_per_host)
+        return self._host_semaphores[host]
+
+    # ------------------------------------------------------------------
+    # Ingesta
+    # ------------------------------------------------------------------
+
+    def browser_pool(self) -> AsyncBrowserPool:
+        """Pool async del motor (crearlo solo desde su event loop)"""
+        if self.pool is None:
+            self.pool = AsyncBrowserPool()
+        return self.pool
+
+    async def _ingest(self, sport: str, events: List[Dict]) -> Dict[str, Any]:
+        self.browser_pool()
+
+        started = time.perf_counter()
+        # errors: eventos que fallaron enteros; market_errors: {url: {mercado: error}}
+        # de eventos escritos en los que algún mercado no se pudo scrapear
+        summary = {"sport": sport, "events": len(events), "ok": 0, "failed": 0, "odds": 0,
+                   "errors": {}, "market_errors": {}}
+
+        await self._upsert_new_events(events)
+
+        async def run_one(event):
+            try:
+                return event["flashscore_url"], await self._ingest_one(sport, event), None
+            except Exception as e:
+                return event["flashscore_url"], None, e
+
+        def record_failure(url, error):
+            summary["failed"] += 1
+            summary["errors"][url] = str(error) or type(error).__name__
+            logger.error(f"❌ Ingest de evento falló: {error}")
+
+        # Escrituras pendientes de varios eventos: una transacción por lote
+        pending: List[Dict] = []
+
+        async def flush():
+            batch = pending[:]
+            pending.clear()
+            if not batch:
+                return
+            try:
+                inserted = await asyncio.to_thread(
+                    odds_delta_writer.persist_many, [(w["event_id"], w["changed"]) for w in batch]
+                )
+            except Exception as e:
+                for w in batch:
+                    # Puede que el evento ya no exista en BD: upsert en el próximo ciclo
+                    fixture_cache.forget(w["url"])
+                    record_failure(w["url"], e)
+                return
+
+            for w in batch:
+                odds_digest_cache.store(w["digests"])
+                n_odds = inserted.get(w["event_id"], 0)
+                summary["ok"] += 1
+                if w["market_errors"]:
+                    summary["market_errors"][w["url"]] = w["market_errors"]
+                summary["odds"] += n_odds
+                logger.info(
+                    f"📊 {n_odds} odds de {w['event'].get('home')} vs {w['event'].get('away')}"
+                    f" ({w['scraped'] - n_odds} sin cambios)"
+                )
+
+        tasks = [asyncio.ensure_future(run_one(e)) for e in events]
+
+        # Resultados a medida que terminan; se escriben al juntar write_batch_rows filas
+        for task in asyncio.as_completed(tasks):
+            url, write, error = await task
+            if error is not None:
+                record_failure(url, error)
+                continue
+            pending.append(write)
+            if sum(len(w["changed"]) for w in pending) >= self.write_batch_rows:
+                await flush()
+        await flush()
+
+        summary["seconds"] = round(time.perf_counter() - started, 1)
+        return summary
+
+    async def _upsert_new_events(self, events: List[Dict]):
+        """
+        Upsert en un solo statement de los fixtures nuevos o cambiados.
+        Si falla, cada evento lo reintenta por separado en _ingest_one.
+        """
+        from ..crud import upsert_events
+
+        new_events = [e for e in events if fixture_cache.persisted_id(e) is None]
+        if not new_events:
+            return
+        try:
+            ids = await asyncio.to_thread(upsert_events, new_events)
+        except Exception as e:
+            logger.warning(f"⚠️ Upsert por lote de {len(new_events)} eventos falló: {e}")
+            return
+        for event in new_events:
+            event_id = ids.get(event["flashscore_url"])
+            if event_id is not None:
+                fixture_cache.mark_persisted(event, event_id)
+        logger.debug(f"🗂️ {len(ids)} eventos upsertados en un lote")
+
+    async def _ingest_one(self, sport: str, event: Dict) -> Dict[str, Any]:
+        """Upsert + scraping de un evento; devuelve la escritura pendiente para flush()"""
+        from ..crud import upsert_event
+
+        url = event["flashscore_url"]
+        # "markets" opcional: los workers de la cola solo scrapean los mercados reclamados
+        markets = event.get("markets") or SPORT_MARKETS.get(_detect_sport_from_url(url) or sport, [])
+
+        # Normalmente ya upsertado por _upsert_new_events
+        event_id = fixture_cache.persisted_id(event)
+        if event_id is None:
+            event_id = await asyncio.to_thread(upsert_event, event)
+            fixture_cache.mark_persisted(event, event_id)
+
+        if not markets:
+            return {"url": url, "event": event, "event_id": event_id, "scraped": 0, "changed": [],
+                    "digests": {}, "market_errors": {}}
+
+        rows = []
+        market_errors: Dict[str, str] = {}
+        if SCRAPER_CONFIG["odds_provider"] == "http":
+            async with self._host_semaphore(flashscore_feed_client.base_url):
+                rows = await asyncio.to_thread(
+                    flashscore_feed_client.odds_for_event, url, sport, markets
+                )
+
+        # Playwright solo para los mercados que el feed no trajo
+        from_feed = {row["market"] for row in rows}
+        missing = [m for m in markets if m not in from_feed]
+        if missing and from_feed:
+            logger.debug(f"↩️ Feed sin {', '.join(missing)} para {url}, usando Playwright")
+
+        pending = allowed_markets(url, missing) if missing else []
+        for market in missing:
+            if market not in pending:
+                market_errors[market] = "circuit breaker abierto"
+        if missing and not pending:
+            logger.info(f"⛔ Circuit breaker abierto, se omite {url}")
+
+        if pending:
+            try:
+                async with self._sport_semaphore(sport), self._host_semaphore(url):
+                    async with self.pool.page() as page:
+                        rows = rows + await asyncio.wait_for(
+                            scrape_markets_async(page, url, pending, sport, market_errors),
+                            timeout=self.event_timeout,
+                        )
+            finally:
+                release_probes(url, pending)
+
+            scraped = {row["market"] for row in rows}
+            for market in pending:
+                if market not in scraped:
+                    market_errors.setdefault(market, "sin cuotas en el feed ni en la página")
+
+        changed, digests = odds_digest_cache.changed(url, rows, sport)
+        return {
+            "url": url,
+            "event": event,
+            "event_id": event_id,
+            "scraped": len(rows),
+            "changed": changed,
+            "digests": digests,
+            "market_errors": market_errors,
+        }
+
+
+# ============================================================================
+# INSTANCIA GLOBAL
+# ============================================================================
+
+ingest_engine = AsyncIngestEngine()
@@ -0,0 +1,575 @@
+# app/ingest/browser_pool.py
+"""
+Pool persistente de navegadores Playwright para el scraping de Flashscore
+Mantiene un navegador vivo por hilo y presta páginas a todos los scrapers,
+reciclándolo tras N páginas o cuando supera el límite de memoria.
+Cada página prestada lleva instalado el bloqueo de recursos pesados.
+Incluye una variante async (un navegador compartido por el event loop)
+"""
+
+import time
+import asyncio
+import logging
+import threading
+from contextlib import contextmanager, asynccontextmanager
+from typing import Dict, Iterator, Optional, Any
+
+from .scraper_config import SCRAPER_CONFIG
+from .route_blocking import flashscore_resource_blocker
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+logger = logging.getLogger("betdesk.scraper")
+
+# Serializa los arranques de ambos pools (sync y async): un driver lanzado
+# por el pool async durante el arranque de un slot sync se le atribuiría
+_launch_lock = threading.Lock()
+
+
+@asynccontextmanager
+async def _async_launch_lock():
+    """_launch_lock desde el event loop sin bloquearlo"""
+    acquire = asyncio.ensure_future(asyncio.to_thread(_launch_lock.acquire))
+    try:
+        await asyncio.shield(acquire)
+    except asyncio.CancelledError:
+        # El hilo acabará cogiendo el lock: soltarlo en cuanto lo tenga
+        acquire.add_done_callback(lambda _: _launch_lock.release())
+        raise
+    try:
+        yield
+    finally:
+        _launch_lock.release()
+
+# ============================================================================
+# CONFIGURACIÓN DEL NAVEGADOR
+# ============================================================================
+
+LAUNCH_ARGS = [
+    "--disable-blink-features=AutomationControlled",
+    "--disable-dev-shm-usage",
+    "--no-sandbox",
+]
+
+# Oculta navigator.webdriver en todas las páginas del contexto
+STEALTH_SCRIPT = "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
+
+
+def _context_options() -> Dict[str, Any]:
+    return {
+        "viewport": {"width": 1920, "height": 1080},
+        "user_agent": SCRAPER_CONFIG["user_agent"],
+    }
+
+
+def _process_memory_mb(pids) -> Optional[float]:
+    """Suma el RSS (MB) de los procesos dados. None si psutil no está disponible"""
+    if psutil is None:
+        return None
+
+    total = 0
+    for pid in pids:
+        try:
+            total += psutil.Process(pid).memory_info().rss
+        except psutil.Error:
+            continue
+    return total / (1024 * 1024)
+
+
+def _child_pids() -> set:
+    """PIDs de los procesos hijos directos de este proceso (vacío sin psutil)"""
+    if psutil is None:
+        return set()
+    try:
+        return {p.pid for p in psutil.Process().children()}
+    except psutil.Error:
+        return set()
+
+
+def _new_counters() -> Dict[str, Any]:
+    return {
+        "launches": 0,
+        "launch_seconds_total": 0.0,
+        "pages_served": 0,
+        "recycled_max_pages": 0,
+        "recycled_memory": 0,
+        "recycled_idle": 0,
+        "recycled_crash": 0,
+        "reaped_dead_thread": 0,
+    }
+
+
+def _build_stats(counters: Dict[str, Any], slots, max_pages: int, max_memory_mb: float) -> Dict[str, Any]:
+    stats = dict(counters)
+    launches = stats["launches"]
+    stats["avg_launch_ms"] = (
+        round(stats["launch_seconds_total"] / launches * 1000, 1) if launches else 0.0
+    )
+    stats["launches_avoided"] = max(0, stats["pages_served"] - launches)
+    stats["active_browsers"] = len(slots)
+    stats["browsers"] = [
+        {
+            "thread": s.thread_name,
+            "pages_served": s.pages_served,
+            "age_seconds": round(time.time() - s.launched_at, 1),
+            "memory_mb": round(s.memory_mb, 1) if s.memory_mb is not None else None,
+        }
+        for s in slots
+    ]
+    stats["max_pages"] = max_pages
+    stats["max_memory_mb"] = max_memory_mb
+    return stats
+
+
+# ============================================================================
+# NAVEGADOR POR HILO
+# ============================================================================
+
+class _BrowserSlot:
+    """
+    Navegador + contexto vivos asociados a un hilo.
+    La API sync de Playwright no puede usarse desde otro hilo distinto al
+    que la inició, por eso cada hilo del scheduler tiene su propio slot.
+    """
+
+    def __init__(self, headless: bool):
+        from playwright.sync_api import sync_playwright
+
+        started = time.perf_counter()
+        with _launch_lock:
+            before = _child_pids()
+            self.playwright = sync_playwright().start()
+            # Driver de Playwright (Chromium cuelga de él): para matarlo si el hilo muere
+            self.driver_pids = _child_pids() - before
+        try:
+            self.browser = self.playwright.chromium.launch(headless=headless, args=LAUNCH_ARGS)
+            self.context = self.browser.new_context(**_context_options())
+            self.context.add_init_script(STEALTH_SCRIPT)
+        except Exception:
+            self.playwright.stop()
+            raise
+
+        self.launch_seconds = time.perf_counter() - started
+        self.launched_at = time.time()
+        self.last_used_at = self.launched_at
+        self.pages_served = 0
+        self.memory_mb: Optional[float] = None
+        self.thread = threading.current_thread()
+        self.thread_name = self.thread.name
+
+    def is_alive(self) -> bool:
+        try:
+            return self.browser.is_connected()
+        except Exception:
+            return False
+
+    def measure_memory(self) -> Optional[float]:
+        """Mide la memoria de todos los procesos del navegador vía CDP + psutil"""
+        if psutil is None:
+            return None
+
+        try:
+            cdp = self.browser.new_browser_cdp_session()
+            info = cdp.send("SystemInfo.getProcessInfo")
+            cdp.detach()
+        except Exception as e:
+            logger.debug(f"No se pudo medir memoria del navegador: {e}")
+            return None
+
+        pids = [p["id"] for p in info.get("processInfo", []) if p.get("id")]
+        self.memory_mb = _process_memory_mb(pids)
+        return self.memory_mb
+
+    def close(self):
+        for closer in (self.context.close, self.browser.close, self.playwright.stop):
+            try:
+                closer()
+            except Exception:
+                pass
+
+    def kill(self):
+        """
+        Mata el driver y Chromium sin pasar por Playwright: la API sync no
+        se puede usar desde otro hilo, y el hilo dueño ya terminó
+        """
+        if psutil is None:
+            return
+
+        for pid in self.driver_pids:
+            try:
+                driver = psutil.Process(pid)
+                procs = driver.children(recursive=True) + [driver]
+            except psutil.Error:
+                continue
+            for proc in procs:
+                try:
+                    proc.kill()
+                except psutil.Error:
+                    pass
+
+
+# ============================================================================
+# POOL
+# ============================================================================
+
+class BrowserPool:
+    """
+    Pool de navegadores de larga vida para Playwright (API sync)
+
+    Uso:
+        with flashscore_browser_pool.page() as page:
+            page.goto(url)
+            html = page.content()
+
+    Cada hilo reutiliza su navegador entre llamadas. El navegador se
+    recicla cuando sirve `max_pages` páginas, cuando supera `max_memory_mb`
+    o cuando lleva más de `idle_timeout` segundos sin usarse. Los navegadores
+    de hilos que ya terminaron (el pool de hilos de APScheduler los recicla)
+    se matan en el siguiente préstamo de cualquier hilo.
+    """
+
+    def __init__(
+        self,
+        max_pages: int = None,
+        max_memory_mb: float = None,
+        memory_check_every: int = None,
+        idle_timeout: float = None,
+        headless: bool = True,
+    ):
+        self.max_pages = max_pages or SCRAPER_CONFIG["browser_max_pages"]
+        self.max_memory_mb = max_memory_mb or SCRAPER_CONFIG["browser_max_memory_mb"]
+        self.memory_check_every = memory_check_every or SCRAPER_CONFIG["browser_memory_check_every"]
+        self.idle_timeout = idle_timeout or SCRAPER_CONFIG["browser_idle_timeout"]
+        self.headless = headless
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._slots: Dict[int, _BrowserSlot] = {}
+        self._counters = _new_counters()
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def page(self) -> Iterator[Any]:
+        """Presta una página nueva del navegador del hilo actual"""
+        slot = self._acquire_slot()
+        page = slot.context.new_page()
+        traffic = flashscore_resource_blocker.install(page)
+
+        try:
+            yield page
+        finally:
+            try:
+                flashscore_resource_blocker.finish(page, traffic)
+            except Exception:
+                pass
+            finally:
+                try:
+                    page.close()
+                except Exception:
+                    pass
+
+            slot.pages_served += 1
+            slot.last_used_at = time.time()
+            with self._lock:
+                self._counters["pages_served"] += 1
+
+            self._maybe_recycle(slot)
+
+    def stats(self) -> Dict[str, Any]:
+        """Estadísticas del pool (seguras de leer desde cualquier hilo)"""
+        with self._lock:
+            counters = dict(self._counters)
+            slots = list(self._slots.values())
+
+        return _build_stats(counters, slots, self.max_pages, self.max_memory_mb)
+
+    def close(self):
+        """Cierra el navegador del hilo actual"""
+        slot = getattr(self._local, "slot", None)
+        if slot is not None:
+            self._discard(slot)
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+
+    def _acquire_slot(self) -> _BrowserSlot:
+        self._reap_dead_threads()
+        slot = getattr(self._local, "slot", None)
+
+        if slot is not None:
+            if not slot.is_alive():
+                logger.warning("💥 Navegador desconectado, relanzando")
+                self._discard(slot, reason="recycled_crash")
+                slot = None
+            elif time.time() - slot.last_used_at > self.idle_timeout:
+                logger.info("♻️  Navegador inactivo demasiado tiempo, relanzando")
+                self._discard(slot, reason="recycled_idle")
+                slot = None
+
+        if slot is None:
+            slot = _BrowserSlot(self.headless)
+            self._local.slot = slot
+            with self._lock:
+                self._slots[threading.get_ident()] = slot
+                self._counters["launches"] += 1
+                self._counters["launch_seconds_total"] += slot.launch_seconds
+            logger.info(
+                f"🚀 Navegador lanzado en {slot.launch_seconds * 1000:.0f}ms "
+                f"(hilo {slot.thread_name})"
+            )
+
+        return slot
+
+    def _reap_dead_threads(self):
+        with self._lock:
+            dead = [(ident, s) for ident, s in self._slots.items() if not s.thread.is_alive()]
+            for ident, _ in dead:
+                del self._slots[ident]
+            self._counters["reaped_dead_thread"] += len(dead)
+
+        for _, slot in dead:
+            logger.info(f"🧹 Cerrando navegador del hilo terminado {slot.thread_name}")
+            slot.kill()
+
+    def _maybe_recycle(self, slot: _BrowserSlot):
+        if slot.pages_served >= self.max_pages:
+            logger.info(f"♻️  Reciclando navegador tras {slot.pages_served} páginas")
+            self._discard(slot, reason="recycled_max_pages")
+            return
+
+        if slot.pages_served % self.memory_check_every == 0:
+            memory = slot.measure_memory()
+            if memory is not None and memory > self.max_memory_mb:
+                logger.info(
+                    f"♻️  Reciclando navegador por memoria "
+                    f"({memory:.0f}MB > {self.max_memory_mb:.0f}MB)"
+                )
+                self._discard(slot, reason="recycled_memory")
+
+    def _discard(self, slot: _BrowserSlot, reason: str = None):
+        slot.close()
+        if getattr(self._local, "slot", None) is slot:
+            self._local.slot = None
+
+        with self._lock:
+            for ident, s in list(self._slots.items()):
+                if s is slot:
+                    del self._slots[ident]
+            if reason:
+                self._counters[reason] += 1
+
+
+# ============================================================================
+# POOL ASYNC
+# ============================================================================
+
+class _AsyncBrowserSlot:
+    """Navegador + contexto vivos para playwright.async_api"""
+
+    @classmethod
+    async def launch(cls, headless: bool) -> "_AsyncBrowserSlot":
+        from playwright.async_api import async_playwright
+
+        slot = cls()
+        started = time.perf_counter()
+        async with _async_launch_lock():
+            slot.playwright = await async_playwright().start()
+        try:
+            slot.browser = await slot.playwright.chromium.launch(headless=headless, args=LAUNCH_ARGS)
+            slot.context = await slot.browser.new_context(**_context_options())
+            await slot.context.add_init_script(STEALTH_SCRIPT)
+        except Exception:
+            await slot.playwright.stop()
+            raise
+
+        slot.launch_seconds = time.perf_counter() - started
+        slot.launched_at = time.time()
+        slot.last_used_at = slot.launched_at
+        slot.pages_served = 0
+        slot.in_use = 0
+        slot.retiring = False
+        slot.memory_mb = None
+        slot.thread_name = threading.current_thread().name
+        return slot
+
+    def is_alive(self) -> bool:
+        try:
+            return self.browser.is_connected()
+        except Exception:
+            return False
+
+    async def measure_memory(self) -> Optional[float]:
+        if psutil is None:
+            return None
+
+        try:
+            cdp = await self.browser.new_browser_cdp_session()
+            info = await cdp.send("SystemInfo.getProcessInfo")
+            await cdp.detach()
+        except Exception as e:
+            logger.debug(f"No se pudo medir memoria del navegador: {e}")
+            return None
+
+        pids = [p["id"] for p in info.get("processInfo", []) if p.get("id")]
+        self.memory_mb = _process_memory_mb(pids)
+        return self.memory_mb
+
+    async def close(self):
+        for closer in (self.context.close, self.browser.close, self.playwright.stop):
+            try:
+                await closer()
+            except Exception:
+                pass
+
+
+class AsyncBrowserPool:
+    """
+    Pool de navegador de larga vida para playwright.async_api
+
+    Uso (siempre desde el mismo event loop):
+        async with pool.page() as page:
+            await page.goto(url)
+
+    Todas las corrutinas comparten un navegador y pueden tener varias
+    páginas abiertas a la vez. Al reciclar, el navegador viejo se retira y
+    se cierra cuando se devuelve su última página prestada.
+    """
+
+    def __init__(
+        self,
+        max_pages: int = None,
+        max_memory_mb: float = None,
+        memory_check_every: int = None,
+        idle_timeout: float = None,
+        headless: bool = True,
+    ):
+        self.max_pages = max_pages or SCRAPER_CONFIG["browser_max_pages"]
+        self.max_memory_mb = max_memory_mb or SCRAPER_CONFIG["browser_max_memory_mb"]
+        self.memory_check_every = memory_check_every or SCRAPER_CONFIG["browser_memory_check_every"]
+        self.idle_timeout = idle_timeout or SCRAPER_CONFIG["browser_idle_timeout"]
+        self.headless = headless
+
+        self._slot: Optional[_AsyncBrowserSlot] = None
+        self._retiring = []
+        self._launch_lock = asyncio.Lock()
+        self._counters = _new_counters()
+
+    @asynccontextmanager
+    async def page(self):
+        """Presta una página nueva del navegador compartido"""
+        slot = await self._acquire_slot()
+        slot.in_use += 1
+
+        try:
+            page = await slot.context.new_page()
+            traffic = await flashscore_resource_blocker.install_async(page)
+            try:
+                yield page
+            finally:
+                try:
+                    await flashscore_resource_blocker.finish_async(page, traffic)
+                except Exception:
+                    pass
+                finally:
+                    try:
+                        await page.close()
+                    except Exception:
+                        pass
+        finally:
+            slot.in_use -= 1
+            slot.pages_served += 1
+            slot.last_used_at = time.time()
+            self._counters["pages_served"] += 1
+
+            await self._maybe_recycle(slot)
+            if slot.retiring and slot.in_use == 0:
+                await self._close_retired(slot)
+
+    def is_retiring(self, page) -> bool:
+        """
+        True si la página pertenece a un navegador retirado: quien la
+        retiene mucho tiempo (live_watcher) debe devolverla para que se cierre
+        """
+        return any(slot.context is page.context for slot in self._retiring)
+
+    def stats(self) -> Dict[str, Any]:
+        slots = ([self._slot] if self._slot else []) + list(self._retiring)
+        stats = _build_stats(self._counters, slots, self.max_pages, self.max_memory_mb)
+        stats["retiring_browsers"] = len(self._retiring)
+        return stats
+
+    async def close(self):
+        slots = ([self._slot] if self._slot else []) + list(self._retiring)
+        self._slot = None
+        self._retiring = []
+        for slot in slots:
+            await slot.close()
+
+    async def _acquire_slot(self) -> _AsyncBrowserSlot:
+        async with self._launch_lock:
+            slot = self._slot
+
+            if slot is not None:
+                if not slot.is_alive():
+                    logger.warning("💥 Navegador async desconectado, relanzando")
+                    self._retire(slot, reason="recycled_crash")
+                elif slot.in_use == 0 and time.time() - slot.last_used_at > self.idle_timeout:
+                    logger.info("♻️  Navegador async inactivo demasiado tiempo, relanzando")
+                    self._retire(slot, reason="recycled_idle")
+
+            if self._slot is None:
+                slot = await _AsyncBrowserSlot.launch(self.headless)
+                self._slot = slot
+                self._counters["launches"] += 1
+                self._counters["launch_seconds_total"] += slot.launch_seconds
+                logger.info(f"🚀 Navegador async lanzado en {slot.launch_seconds * 1000:.0f}ms")
+
+            for old in [s for s in self._retiring if s.in_use == 0]:
+                await self._close_retired(old)
+
+            return self._slot
+
+    async def _maybe_recycle(self, slot: _AsyncBrowserSlot):
+        if slot.retiring:
+            return
+
+        if slot.pages_served >= self.max_pages:
+            logger.info(f"♻️  Reciclando navegador async tras {slot.pages_served} páginas")
+            self._retire(slot, reason="recycled_max_pages")
+            return
+
+        if slot.pages_served % self.memory_check_every == 0:
+            memory = await slot.measure_memory()
+            if memory is not None and memory > self.max_memory_mb:
+                logger.info(
+                    f"♻️  Reciclando navegador async por memoria "
+                    f"({memory:.0f}MB > {self.max_memory_mb:.0f}MB)"
+                )
+                self._retire(slot, reason="recycled_memory")
+
+    def _retire(self, slot: _AsyncBrowserSlot, reason: str):
+        slot.retiring = True
+        if self._slot is slot:
+            self._slot = None
+        self._retiring.append(slot)
+        self._counters[reason] += 1
+
+    async def _close_retired(self, slot: _AsyncBrowserSlot):
+        if slot in self._retiring:
+            self._retiring.remove(slot)
+            await slot.close()
+
+
+# ============================================================================
+# INSTANCIA GLOBAL
+# ============================================================================
+
+# Pool compartido por provider_flashscore y event_discovery
+flashscore_browser_pool = BrowserPool()
@@ -9,45 +9,46 @@ import logging
 from datetime import datetime, timezone, timedelta
 from typing import List, Dict, Optional
 from bs4 import BeautifulSoup
+from lxml import etree, html as lxml_html
 
-from .scraper_config import apply_rate_limit, SCRAPER_CONFIG
+from .scraper_config import SCRAPER_CONFIG, flashscore_breakers
+from .scraper_errors import NetworkError
+from .rate_limiter import flashscore_rate_limiter
+from .browser_pool import flashscore_browser_pool
+from .fixture_cache import fixture_cache
+from .replay_corpus import record_page, KIND_FIXTURES
 
 logger = logging.getLogger("betdesk.scraper")
 
+
+# Filas de partidos (token "event__match" en class), XPath precompilado
+MATCH_XPATH = etree.XPath("//div[contains(concat(' ', normalize-space(@class), ' '), ' event__match ')]")
+
+# Regex compiladas una vez (se usan en cada fila de partido)
+STAGE_RE = re.compile(r"event__stage")
+SCORE_RE = re.compile(r"event__score")
+SCORE_TEXT_RE = re.compile(r"\d+\s*[:\-]\s*\d+")
+HOME_RE = re.compile(r"participant.*home")
+AWAY_RE = re.compile(r"participant.*away")
+PARTICIPANT_RE = re.compile(r"participant")
+TIME_RE = re.compile(r"event__time")
+CLOCK_RE = re.compile(r"\d{1,2}:\d{2}")
+DATE_CLOCK_RE = re.compile(r"(\d{1,2})\.(\d{1,2}).*?(\d{1,2}):(\d{2})")
+
 # =============================================================================
 # PLAYWRIGHT HELPER
 # =============================================================================
 
 def _fetch_with_playwright(url: str) -> str:
     """
-    Obtiene HTML usando Playwright con configuración anti-detección
+    Obtiene HTML usando el pool de Playwright (configuración anti-detección
+    incluida en el contexto del pool). Una respuesta HTTP >= 400 (bloqueo)
+    se lanza como NetworkError
     """
-    from playwright.sync_api import sync_playwright
-
-    with sync_playwright() as p:
-        browser = p.chromium.launch(
-            headless=True,
-            args=[
-                "--disable-blink-features=AutomationControlled",
-                "--disable-dev-shm-usage",
-                "--no-sandbox",
-            ],
-        )
-
-        context = browser.new_context(
-            viewport={"width": 1920, "height": 1080},
-            user_agent=SCRAPER_CONFIG.get(
-                "user_agent",
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64)",
-            ),
-        )
-
-        page = context.new_page()
-        page.add_init_script(
-            "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
-        )
-
-        page.goto(url, wait_until="networkidle", timeout=30000)
+    with flashscore_browser_pool.page() as page:
+        response = page.goto(url, wait_until="networkidle", timeout=30000)
+        if response is not None and response.status >= 400:
+            raise NetworkError(f"HTTP {response.status} en {url}", {"url": url, "status": response.status})
 
         try:
             page.wait_for_selector(".event__match", timeout=8000)
@@ -57,9 +58,7 @@ def _fetch_with_playwright(url: str) -> str:
         page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
         page.wait_for_timeout(1500)
 
-        html = page.content()
-        browser.close()
-        return html
+        return page.content()
 
 
 # =============================================================================
@@ -72,29 +71,29 @@ def _is_event_started(match_div) -> bool:
     if any(k in class_str for k in ["live", "inprogress", "started"]):
         return True
 
-    stage = match_div.find("div", class_=re.compile(r"event__stage"))
+    stage = match_div.find("div", class_=STAGE_RE)
     if stage:
         txt = stage.get_text(strip=True).lower()
         if any(k in txt for k in ["live", "half", "ended"]):
             return True
 
-    score = match_div.find("div", class_=re.compile(r"event__score"))
+    score = match_div.find("div", class_=SCORE_RE)
     if score:
         txt = score.get_text(strip=True)
-        if re.match(r"\d+\s*[:\-]\s*\d+", txt):
+        if SCORE_TEXT_RE.match(txt):
             return True
 
     return False
 
 
 def _extract_participants(match_div):
-    home = match_div.find("div", class_=re.compile(r"participant.*home"))
-    away = match_div.find("div", class_=re.compile(r"participant.*away"))
+    home = match_div.find("div", class_=HOME_RE)
+    away = match_div.find("div", class_=AWAY_RE)
 
     if home and away:
         return home.get_text(strip=True), away.get_text(strip=True)
 
-    parts = match_div.find_all("div", class_=re.compile(r"participant"))
+    parts = match_div.find_all("div", class_=PARTICIPANT_RE)
     if len(parts) >= 2:
         return parts[0].get_text(strip=True), parts[1].get_text(strip=True)
 
@@ -120,11 +119,11 @@ def _parse_event_time(time_str: str) -> datetime:
 
     time_str = time_str.strip().lower()
 
-    if re.fullmatch(r"\d{1,2}:\d{2}", time_str):
+    if CLOCK_RE.fullmatch(time_str):
         h, m = map(int, time_str.split(":"))
         return now.replace(hour=h, minute=m, second=0, microsecond=0)
 
-    m = re.search(r"(\d{1,2})\.(\d{1,2}).*?(\d{1,2}):(\d{2})", time_str)
+    m = DATE_CLOCK_RE.search(time_str)
     if m:
         d, mo, h, mi = map(int, m.groups())
         return datetime(now.year, mo, d, h, mi, tzinfo=timezone.utc)
@@ -132,6 +131,139 @@ def _parse_event_time(time_str: str) -> datetime:
     return now + timedelta(hours=1)
 
 
+# =============================================================================
+# LIGAS
+# =============================================================================
+
+BASKETBALL_LEAGUES = [
+    {"name": "NBA", "url": "https://www.flashscore.com/basketball/usa/nba/fixtures/"},
+    {"name": "CBA", "url": "https://www.flashscore.com/basketball/china/cba/fixtures/"},
+]
+
+FOOTBALL_LEAGUES = [
+    {
+        "name": "Premier League",
+        "url": "https://www.flashscore.co/futbol/inglaterra/premier-league/partidos/",
+    },
+    {
+        "name": "La Liga",
+        "url": "https://www.flashscore.co/futbol/espana/laliga-ea-sports/partidos/",
+    },
+    {
+        "name": "Champions League",
+        "url": "https://www.flashscore.co/futbol/europa/champions-league/partidos/",
+    },
+]
+
+TENNIS_LEAGUES = [
+    {"name": "ATP", "url": "https://www.flashscore.com/tennis/"},
+]
+
+
+def _discover_league(sport: str, league: Dict, limit: int) -> List[Dict]:
+    """Descarga y parsea la página de fixtures de una liga"""
+    flashscore_rate_limiter.acquire(league["url"])
+    html = _fetch_with_playwright(league["url"])
+    record_page(html, league["url"], sport, KIND_FIXTURES)
+    return _events_from_html(html, sport, league["name"], limit)
+
+
+def _match_divs(html: str, partial: bool = None) -> list:
+    """
+    Filas div.event__match de una página de fixtures.
+
+    Con partial (default: SCRAPER_CONFIG["discovery_partial_parse"]) lxml
+    localiza las filas de partidos y solo esos fragmentos se construyen en
+    BeautifulSoup (los helpers de abajo siguen trabajando sobre bs4).
+    Sin partial se parsea la página completa con BeautifulSoup.
+    """
+    if partial is None:
+        partial = SCRAPER_CONFIG["discovery_partial_parse"]
+
+    if not partial:
+        soup = BeautifulSoup(html, "lxml")
+        return soup.find_all("div", class_="event__match")
+
+    try:
+        doc = lxml_html.document_fromstring(html)
+    except ValueError:
+        # str con declaración de encoding: lxml la exige en bytes
+        doc = lxml_html.document_fromstring(html.encode("utf-8"))
+    except etree.ParserError:
+        return []  # documento vacío
+
+    fragment = "".join(
+        etree.tostring(div, encoding="unicode", method="html", with_tail=False)
+        for div in MATCH_XPATH(doc)
+    )
+    return BeautifulSoup(fragment, "lxml").find_all("div", class_="event__match")
+
+
+def _events_from_html(html: str, sport: str, league_name: str, limit: int, partial: bool = None) -> List[Dict]:
+    """Fixtures no iniciados de una página de partidos (máximo `limit` filas)"""
+    events = []
+    for match_div in _match_divs(html, partial)[:limit]:
+        if _is_event_started(match_div):
+            continue
+
+        home, away = _extract_participants(match_div)
+        if not home or not away:
+            continue
+
+        time_div = match_div.find("div", class_=TIME_RE)
+        start_time = _parse_event_time(
+            time_div.get_text(strip=True) if time_div else None
+        )
+
+        events.append(
+            {
+                "sport": sport,
+                "league": league_name,
+                "home": home,
+                "away": away,
+                "start_time_utc": start_time,
+                "flashscore_url": _extract_event_url(match_div, sport),
+            }
+        )
+    return events
+
+
+def _cached_league_events(sport: str, league: Dict, limit: int) -> List[Dict]:
+    """
+    Fixtures de una liga desde fixture_cache; solo descarga la página
+    cuando la liga superó su TTL. Si la descarga falla o viene vacía se
+    sirven los fixtures cacheados y se reintenta en el siguiente ciclo;
+    con el circuit breaker del host abierto ni siquiera se intenta. Solo
+    los errores de descarga o de parseo cuentan como fallo del breaker.
+    """
+    name = league["name"]
+    if fixture_cache.is_fresh(sport, name):
+        logger.debug(f"📅 {sport}/{name}: fixtures en cache")
+        return fixture_cache.fixtures(sport, name)
+
+    breaker = flashscore_breakers.for_host(league["url"])
+    if not breaker.allow():
+        logger.warning(f"⛔ {sport}/{name}: circuit breaker abierto, fixtures en cache")
+        return fixture_cache.fixtures(sport, name)
+
+    try:
+        events = _discover_league(sport, league, limit)
+    except Exception as e:
+        breaker.record_failure()
+        logger.error(f"{sport.capitalize()} discovery failed ({name}): {e}")
+        return fixture_cache.fixtures(sport, name)
+
+    # La página cargó y se parseó: el host responde aunque no haya partidos
+    breaker.record_success()
+
+    if not events:
+        # Liga sin jornada o cambio de markup: no vaciar la cache por ello
+        logger.warning(f"⚠️ {sport}/{name}: página sin fixtures, se mantiene la cache")
+        return fixture_cache.fixtures(sport, name)
+
+    return fixture_cache.merge(sport, name, events)
+
+
 # =============================================================================
 # BASKETBALL
 # =============================================================================
@@ -140,43 +272,8 @@ def discover_basketball_events(max_events: int = 20) -> List[Dict]:
     logger.info("🏀 Discovering basketball events...")
     all_events = []
 
-    leagues = [
-        {"name": "NBA", "url": "https://www.flashscore.com/basketball/usa/nba/fixtures/"},
-        {"name": "CBA", "url": "https://www.flashscore.com/basketball/china/cba/fixtures/"},
-    ]
-
-    for league in leagues:
-        try:
-            apply_rate_limit()
-            html = _fetch_with_playwright(league["url"])
-            soup = BeautifulSoup(html, "lxml")
-            match_divs = soup.find_all("div", class_="event__match")
-
-            for match_div in match_divs[: max_events // 2]:
-                if _is_event_started(match_div):
-                    continue
-
-                home, away = _extract_participants(match_div)
-                if not home or not away:
-                    continue
-
-                time_div = match_div.find("div", class_=re.compile(r"event__time"))
-                start_time = _parse_event_time(
-                    time_div.get_text(strip=True) if time_div else None
-                )
-
-                all_events.append(
-                    {
-                        "sport": "basketball",
-                        "league": league["name"],
-                        "home": home,
-                        "away": away,
-                        "start_time_utc": start_time,
-                        "flashscore_url": _extract_event_url(match_div, "basketball"),
-                    }
-                )
-        except Exception as e:
-            logger.error(f"Basketball discovery failed: {e}")
+    for league in BASKETBALL_LEAGUES:
+        all_events.extend(_cached_league_events("basketball", league, max_events // 2))
 
     return all_events
 
@@ -189,53 +286,8 @@ def discover_football_events(max_events: int = 30) -> List[Dict]:
     logger.info("⚽ Discovering football events...")
     all_events = []
 
-    leagues = [
-        {
-            "name": "Premier League",
-            "url": "https://www.flashscore.co/futbol/inglaterra/premier-league/partidos/",
-        },
-        {
-            "name": "La Liga",
-            "url": "https://www.flashscore.co/futbol/espana/laliga-ea-sports/partidos/",
-        },
-        {
-            "name": "Champions League",
-            "url": "https://www.flashscore.co/futbol/europa/champions-league/partidos/",
-        },
-    ]
-
-    for league in leagues:
-        try:
-            apply_rate_limit()
-            html = _fetch_with_playwright(league["url"])
-            soup = BeautifulSoup(html, "lxml")
-            match_divs = soup.find_all("div", class_="event__match")
-
-            for match_div in match_divs[: max_events // 3]:
-                if _is_event_started(match_div):
-                    continue
-
-                home, away = _extract_participants(match_div)
-                if not home or not away:
-                    continue
-
-                time_div = match_div.find("div", class_=re.compile(r"event__time"))
-                start_time = _parse_event_time(
-                    time_div.get_text(strip=True) if time_div else None
-                )
-
-                all_events.append(
-                    {
-                        "sport": "football",
-                        "league": league["name"],
-                        "home": home,
-                        "away": away,
-                        "start_time_utc": start_time,
-                        "flashscore_url": _extract_event_url(match_div, "football"),
-                    }
-                )
-        except Exception as e:
-            logger.error(f"Football discovery failed: {e}")
+    for league in FOOTBALL_LEAGUES:
+        all_events.extend(_cached_league_events("football", league, max_events // 3))
 
     return all_events
 
@@ -248,38 +300,8 @@ def discover_tennis_events(max_events: int = 25) -> List[Dict]:
     logger.info("🎾 Discovering tennis events...")
     events = []
 
-    try:
-        apply_rate_limit()
-        html = _fetch_with_playwright("https://www.flashscore.com/tennis/")
-        soup = BeautifulSoup(html, "lxml")
-        match_divs = soup.find_all("div", class_="event__match")
-
-        for match_div in match_divs[:max_events]:
-            if _is_event_started(match_div):
-                continue
-
-            home, away = _extract_participants(match_div)
-            if not home or not away:
-                continue
-
-            time_div = match_div.find("div", class_=re.compile(r"event__time"))
-            start_time = _parse_event_time(
-                time_div.get_text(strip=True) if time_div else None
-            )
-
-            events.append(
-                {
-                    "sport": "tennis",
-                    "league": "ATP",
-                    "home": home,
-                    "away": away,
-                    "start_time_utc": start_time,
-                    "flashscore_url": _extract_event_url(match_div, "tennis"),
-                }
-            )
-
-    except Exception as e:
-        logger.error(f"Tennis discovery failed: {e}")
+    for league in TENNIS_LEAGUES:
+        events.extend(_cached_league_events("tennis", league, max_events))
 
     return events
 
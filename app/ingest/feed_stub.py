@@ -0,0 +1,86 @@
+# app/ingest/feed_stub.py
+"""
+Servidor local que reproduce payloads grabados de los feeds de Flashscore
+
+Grabar payloads reales:
+    FLASHSCORE_FEED_RECORD_DIR=debug/feeds BETDESK_ODDS_PROVIDER=http python -m uvicorn app.main:app
+
+Reproducirlos sin red:
+    python -m app.ingest.feed_stub debug/feeds --port 8765
+    FLASHSCORE_FEED_URL=http://127.0.0.1:8765 BETDESK_ODDS_PROVIDER=http ...
+
+GET /odds/pq_graphql?eventId=XXX devuelve <dir>/odds_XXX.json (404 si no existe)
+"""
+
+import os
+import sys
+import logging
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+logger = logging.getLogger("betdesk.scraper")
+
+
+def make_handler(payload_dir: str):
+    class FeedStubHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            parsed = urlparse(self.path)
+            params = parse_qs(parsed.query)
+
+            if parsed.path != "/odds/pq_graphql" or "eventId" not in params:
+                self._send(404, b'{"error": "unknown feed"}')
+                return
+
+            event_id = os.path.basename(params["eventId"][0])
+            path = os.path.join(payload_dir, f"odds_{event_id}.json")
+            if not os.path.exists(path):
+                self._send(404, b'{"error": "no recording"}')
+                return
+
+            with open(path, "rb") as f:
+                self._send(200, f.read())
+
+        def _send(self, status: int, body: bytes):
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.debug("feed_stub: " + format % args)
+
+    return FeedStubHandler
+
+
+def start_stub_server(payload_dir: str, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """
+    Arranca el stub en un hilo de fondo y lo devuelve.
+    Con port=0 se elige un puerto libre: server.server_address[1]
+    """
+    server = ThreadingHTTPServer((host, port), make_handler(payload_dir))
+    thread = threading.Thread(target=server.serve_forever, name="feed-stub", daemon=True)
+    thread.start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub de feeds de Flashscore")
+    parser.add_argument("payload_dir", help="directorio con payloads grabados")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(args.payload_dir))
+    print(f"📡 Feed stub sirviendo {args.payload_dir} en http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
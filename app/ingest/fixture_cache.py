@@ -0,0 +1,162 @@
+# app/ingest/fixture_cache.py
+"""
+Cache de fixtures por liga para event_discovery
+Las páginas de fixtures cambian poco: mientras la liga esté fresca (TTL)
+no se vuelve a cargar, y al refrescar solo se fusionan altas, cambios y bajas
+"""
+
+import time
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple, Any
+
+from .scraper_config import SCRAPER_CONFIG
+
+logger = logging.getLogger("betdesk.scraper")
+
+# Campos que escribe upsert_event
+FIXTURE_FIELDS = ("sport", "league", "start_time_utc", "home", "away")
+
+# Máximo de eventos recordados como ya persistidos
+MAX_PERSISTED = 5000
+
+
+def fixture_fingerprint(event: Dict) -> Tuple:
+    return tuple(event.get(field) for field in FIXTURE_FIELDS)
+
+
+def _has_started(event: Dict, now: datetime) -> bool:
+    start = event.get("start_time_utc")
+    return isinstance(start, datetime) and start <= now
+
+
+class FixtureCache:
+    """
+    Fixtures por (deporte, liga) con TTL por liga.
+
+    - is_fresh(): la liga se descargó hace menos de su TTL
+    - merge(): fusiona una descarga nueva (altas, cambios de hora/equipos,
+      bajas de partidos que ya no aparecen porque empezaron o se movieron)
+    - fixtures(): fixtures cacheados que aún no han empezado
+
+    Además recuerda el id de BD de cada fixture ya persistido con su
+    fingerprint, para que la ingesta solo llame a upsert_event cuando
+    el fixture cambió.
+    """
+
+    def __init__(self, ttl_per_league: Dict[str, int] = None, default_ttl: int = None):
+        self.ttl_per_league = ttl_per_league or SCRAPER_CONFIG["fixture_ttl"]
+        self.default_ttl = default_ttl or SCRAPER_CONFIG["fixture_ttl_default"]
+
+        self._lock = threading.Lock()
+        self._leagues: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._persisted: "OrderedDict[str, Tuple[Tuple, int]]" = OrderedDict()
+        self._counters = {
+            "fresh_hits": 0,
+            "refreshes": 0,
+            "added": 0,
+            "changed": 0,
+            "removed": 0,
+            "upserts": 0,
+            "upserts_skipped": 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Fixtures por liga
+    # ------------------------------------------------------------------
+
+    def ttl(self, league: str) -> int:
+        return self.ttl_per_league.get(league, self.default_ttl)
+
+    def is_fresh(self, sport: str, league: str) -> bool:
+        with self._lock:
+            entry = self._leagues.get((sport, league))
+            fresh = entry is not None and time.monotonic() - entry["fetched_at"] < self.ttl(league)
+            if fresh:
+                self._counters["fresh_hits"] += 1
+            return fresh
+
+    def fixtures(self, sport: str, league: str) -> List[Dict]:
+        """Fixtures cacheados de la liga que aún no han empezado"""
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            entry = self._leagues.get((sport, league))
+            if not entry:
+                return []
+            return [dict(e) for e in entry["fixtures"].values() if not _has_started(e, now)]
+
+    def merge(self, sport: str, league: str, fresh: List[Dict]) -> List[Dict]:
+        """Fusiona la descarga de una liga y devuelve sus fixtures vigentes"""
+        incoming = OrderedDict((e["flashscore_url"], e) for e in fresh)
+
+        with self._lock:
+            entry = self._leagues.get((sport, league))
+            previous = entry["fixtures"] if entry else {}
+
+            added = [url for url in incoming if url not in previous]
+            changed = [
+                url for url, e in incoming.items()
+                if url in previous and fixture_fingerprint(previous[url]) != fixture_fingerprint(e)
+            ]
+            removed = [url for url in previous if url not in incoming]
+
+            self._leagues[(sport, league)] = {"fetched_at": time.monotonic(), "fixtures": incoming}
+            self._counters["refreshes"] += 1
+            self._counters["added"] += len(added)
+            self._counters["changed"] += len(changed)
+            self._counters["removed"] += len(removed)
+
+        logger.info(
+            f"📅 Fixtures {sport}/{league}: +{len(added)} nuevos, "
+            f"{len(changed)} cambiados, -{len(removed)} retirados"
+        )
+        return self.fixtures(sport, league)
+
+    # ------------------------------------------------------------------
+    # Fixtures ya persistidos
+    # ------------------------------------------------------------------
+
+    def persisted_id(self, event: Dict) -> Optional[int]:
+        """Id de BD si el fixture ya se guardó tal cual; None si hay que hacer upsert"""
+        with self._lock:
+            known = self._persisted.get(event["flashscore_url"])
+            if known and known[0] == fixture_fingerprint(event):
+                self._counters["upserts_skipped"] += 1
+                return known[1]
+            return None
+
+    def mark_persisted(self, event: Dict, event_id: int):
+        with self._lock:
+            url = event["flashscore_url"]
+            self._persisted[url] = (fixture_fingerprint(event), event_id)
+            self._persisted.move_to_end(url)
+            self._counters["upserts"] += 1
+            while len(self._persisted) > MAX_PERSISTED:
+                self._persisted.popitem(last=False)
+
+    def forget(self, url: str):
+        """Olvida un fixture persistido (ej. el insert de sus cuotas falló)"""
+        with self._lock:
+            self._persisted.pop(url, None)
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            leagues = {
+                f"{sport}/{league}": {
+                    "fixtures": len(entry["fixtures"]),
+                    "age_s": round(now - entry["fetched_at"]),
+                    "ttl_s": self.ttl(league),
+                }
+                for (sport, league), entry in self._leagues.items()
+            }
+            return {"leagues": leagues, "persisted": len(self._persisted), **self._counters}
+
+
+# ============================================================================
+# INSTANCIA GLOBAL
+# ============================================================================
+
+fixture_cache = FixtureCache()
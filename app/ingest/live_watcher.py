@@ -0,0 +1,331 @@
+# app/ingest/live_watcher.py
+"""
+Vigilancia en vivo de cuotas para eventos próximos a empezar
+Mantiene abiertas las pestañas de cuotas, instala un MutationObserver en la
+tabla y recibe en Python solo las filas que cambian (expose_binding)
+"""
+
+import asyncio
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set, Tuple, Any
+
+from .scraper_config import SCRAPER_CONFIG, flashscore_breakers
+from .async_engine import ingest_engine
+from .fixture_cache import fixture_cache
+from .odds_delta import odds_delta_writer
+from .rate_limiter import flashscore_rate_limiter
+from .provider_flashscore import (
+    ROW_SELECTOR,
+    EXTRACT_ROWS_JS,
+    build_market_url,
+    rows_from_extracted,
+    allowed_markets,
+    release_probes,
+    record_scrape_outcome,
+)
+
+logger = logging.getLogger("betdesk.scraper")
+
+WatchKey = Tuple[str, str]  # (flashscore_url, market)
+
+BINDING_NAME = "betdeskOddsChanged"
+
+# Cada cuántos segundos una página vigilada mira si su navegador se retira
+RECYCLE_CHECK_SECONDS = 5
+
+# Observa la tabla de cuotas y envía a Python las filas cuyo precio cambió
+# (la primera llamada manda la tabla completa como estado inicial). Si la SPA
+# reemplaza la tabla, el chequeo periódico vuelve a engancharse al nodo nuevo.
+OBSERVER_JS = f"""
+([rowSelector, bindingName, debounceMs]) => {{
+    const extract = {EXTRACT_ROWS_JS};
+    const last = new Map();
+    let timer = null;
+    let root = null;
+
+    const flush = () => {{
+        timer = null;
+        const changed = [];
+        for (const row of extract(rowSelector)) {{
+            const key = row.bookmaker + "|" + row.line;
+            const sig = row.odds.join("|");
+            if (last.get(key) !== sig) {{
+                last.set(key, sig);
+                changed.push(row);
+            }}
+        }}
+        if (changed.length) window[bindingName](changed);
+    }};
+    const schedule = () => {{ if (!timer) timer = setTimeout(flush, debounceMs); }};
+    const observer = new MutationObserver(schedule);
+
+    const attach = () => {{
+        const first = document.querySelector(rowSelector);
+        root = first ? (first.closest(".ui-table") || first.parentElement) : document.body;
+        observer.disconnect();
+        observer.observe(root, {{subtree: true, childList: true, characterData: true}});
+    }};
+
+    if (window.__betdeskWatch) window.__betdeskWatch.stop();
+    const check = setInterval(() => {{
+        if (!root || !root.isConnected || root === document.body) {{ attach(); schedule(); }}
+    }}, 5000);
+    window.__betdeskWatch = {{stop: () => {{ observer.disconnect(); clearInterval(check); }}}};
+
+    attach();
+    flush();
+}}
+"""
+
+
+def _start_time(event: Dict) -> Optional[datetime]:
+    start = event.get("start_time_utc")
+    if not isinstance(start, datetime):
+        return None
+    return start if start.tzinfo else start.replace(tzinfo=timezone.utc)
+
+
+class LiveOddsWatcher:
+    """
+    Pestañas de cuotas abiertas de forma permanente para los eventos que
+    empiezan antes.
+
+    - update(events): los jobs entregan los fixtures descubiertos; se
+      vigilan los (evento, mercado) más cercanos al inicio dentro de
+      live_watch_window_minutes, hasta live_watch_max_pages páginas
+    - cada rotación cierra las páginas de eventos ya empezados o
+      desplazados por otros más próximos y abre las nuevas
+    - los cambios se escriben con odds_delta_writer (modo delta)
+    - una página se cierra y se reabre en el navegador nuevo cuando el
+      pool retira el suyo, y como mucho tras live_watch_max_page_age,
+      para no impedir el reciclado por páginas o memoria
+
+    Corre en el event loop y el navegador async del motor de ingesta, sin
+    ocupar sus semáforos.
+    """
+
+    def __init__(self, engine=None, max_pages: int = None, window_minutes: int = None):
+        cfg = SCRAPER_CONFIG
+        self.engine = engine or ingest_engine
+        self.enabled = cfg["live_watch_enabled"]
+        self.max_pages = max_pages or cfg["live_watch_max_pages"]
+        self.window = timedelta(minutes=window_minutes or cfg["live_watch_window_minutes"])
+        self.markets = cfg["live_watch_markets"]
+        self.debounce_ms = cfg["live_watch_debounce_ms"]
+        self.max_page_age = cfg["live_watch_max_page_age"]
+
+        self._lock = threading.Lock()
+        self._candidates: Dict[str, Dict] = {}
+        self._counters = {"rotations": 0, "installs": 0, "reopens": 0, "errors": 0, "changes": 0, "rows_pushed": 0}
+
+        # Solo se tocan desde el event loop del motor
+        self._watches: Dict[WatchKey, asyncio.Task] = {}
+        self._watched: Dict[WatchKey, Dict] = {}
+        self._pushes: Set[asyncio.Task] = set()  # escrituras de cambios en curso
+
+    # ------------------------------------------------------------------
+    # API sync (scheduler)
+    # ------------------------------------------------------------------
+
+    def update(self, events: List[Dict]):
+        """Reemplaza los eventos candidatos y rota las páginas vigiladas"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            self._candidates = {e["flashscore_url"]: e for e in events if e.get("flashscore_url")}
+        return self.engine.submit(self._rotate())
+
+    def stop(self):
+        """
+        Cierra todas las páginas vigiladas. El futuro devuelto termina cuando
+        las páginas están cerradas y los cambios recibidos, escritos
+        """
+        with self._lock:
+            self._candidates = {}
+        return self.engine.submit(self._stop())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            candidates = len(self._candidates)
+        watches = dict(self._watches)
+        watched = [
+            {"url": url, "market": market, "start_time_utc": str(event.get("start_time_utc"))}
+            for (url, market), event in list(self._watched.items())
+            if (url, market) in watches and not watches[(url, market)].done()
+        ]
+        return {
+            "enabled": self.enabled,
+            "max_pages": self.max_pages,
+            "candidates": candidates,
+            "watching": len(watched),
+            "watched": watched,
+            **counters,
+        }
+
+    # ------------------------------------------------------------------
+    # Rotación (event loop del motor)
+    # ------------------------------------------------------------------
+
+    def _wanted(self) -> Dict[WatchKey, Dict]:
+        """(evento, mercado) a vigilar: los que empiezan antes dentro de la ventana"""
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            candidates = list(self._candidates.values())
+
+        upcoming = []
+        for event in candidates:
+            start = _start_time(event)
+            if start is not None and now < start <= now + self.window:
+                upcoming.append((start, event))
+        upcoming.sort(key=lambda item: item[0])
+
+        wanted = {}
+        for _, event in upcoming:
+            for market in self.markets.get(event.get("sport"), []):
+                if len(wanted) >= self.max_pages:
+                    return wanted
+                wanted[(event["flashscore_url"], market)] = event
+        return wanted
+
+    async def _rotate(self):
+        wanted = self._wanted()
+
+        for key in [k for k in self._watches if k not in wanted]:
+            self._watches.pop(key).cancel()
+            self._watched.pop(key, None)
+
+        for key, event in wanted.items():
+            task = self._watches.get(key)
+            if task is None or task.done():
+                self._watches[key] = asyncio.ensure_future(self._watch(key, event))
+                self._watched[key] = event
+
+        with self._lock:
+            self._counters["rotations"] += 1
+        logger.debug(f"👁️ Rotación live: {len(self._watches)} páginas vigiladas")
+
+    async def _stop(self):
+        watches = list(self._watches.values())
+        self._watches.clear()
+        self._watched.clear()
+        for task in watches:
+            task.cancel()
+        await asyncio.gather(*watches, return_exceptions=True)
+        # Con las páginas cerradas ya no llegan cambios nuevos
+        await asyncio.gather(*self._pushes, return_exceptions=True)
+
+    # ------------------------------------------------------------------
+    # Una página vigilada
+    # ------------------------------------------------------------------
+
+    async def _watch(self, key: WatchKey, event: Dict):
+        url, market = key
+        if not allowed_markets(url, [market]):
+            return
+
+        try:
+            event_id = await self._event_id(event)
+            while await self._watch_page(event_id, event, url, market):
+                with self._lock:
+                    self._counters["reopens"] += 1
+                if not allowed_markets(url, [market]):
+                    return
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Falla un solo mercado: no se achaca al breaker del host
+            flashscore_breakers.for_market(market).record_failure()
+            with self._lock:
+                self._counters["errors"] += 1
+            logger.warning(f"❌ Error vigilando {market} ({url}): {e}")
+        finally:
+            release_probes(url, [market])
+
+    async def _watch_page(self, event_id: int, event: Dict, url: str, market: str) -> bool:
+        """
+        Abre la pestaña del mercado y la vigila hasta que se cierra (False)
+        o hasta que hay que reabrirla (True): su navegador se está retirando
+        o la página superó max_page_age. Al salir se devuelve la página y el
+        navegador retirado puede cerrarse.
+        """
+        pool = self.engine.browser_pool()
+        async with pool.page() as page:
+            closed = asyncio.Event()
+            page.on("close", lambda _: closed.set())
+            page.on("crash", lambda _: closed.set())
+
+            await page.expose_binding(
+                BINDING_NAME,
+                lambda source, changed: self._on_changes(event_id, url, market, changed),
+            )
+
+            full_url = build_market_url(url, market)
+            await flashscore_rate_limiter.acquire_async(full_url)
+            await page.goto(full_url, wait_until="domcontentloaded", timeout=30000)
+            await page.wait_for_selector(ROW_SELECTOR, timeout=15000)
+            await page.evaluate(OBSERVER_JS, [ROW_SELECTOR, BINDING_NAME, self.debounce_ms])
+
+            record_scrape_outcome(url, {market}, set())
+            with self._lock:
+                self._counters["installs"] += 1
+            logger.info(f"👁️ Vigilando {market} de {event.get('home')} vs {event.get('away')}")
+
+            loop = asyncio.get_running_loop()
+            expires_at = loop.time() + self.max_page_age
+            while not closed.is_set():
+                if pool.is_retiring(page):
+                    logger.info(f"♻️ Navegador retirado, reabriendo {market} {url}")
+                    return True
+                if loop.time() >= expires_at:
+                    logger.info(f"♻️ Página vigilada con más de {self.max_page_age}s, reabriendo {market} {url}")
+                    return True
+                try:
+                    await asyncio.wait_for(closed.wait(), timeout=RECYCLE_CHECK_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+
+            logger.info(f"👁️ Página vigilada cerrada: {market} {url}")
+            return False
+
+    async def _event_id(self, event: Dict) -> int:
+        from ..crud import upsert_event
+
+        event_id = fixture_cache.persisted_id(event)
+        if event_id is None:
+            event_id = await asyncio.to_thread(upsert_event, event)
+            fixture_cache.mark_persisted(event, event_id)
+        return event_id
+
+    def _on_changes(self, event_id: int, url: str, market: str, changed: List[Dict]):
+        """Binding llamado desde la página con las filas que cambiaron"""
+        rows = rows_from_extracted(changed, market)
+        with self._lock:
+            self._counters["changes"] += 1
+        if rows:
+            # El loop solo guarda referencias débiles a las tareas
+            task = asyncio.ensure_future(self._push(event_id, url, rows))
+            self._pushes.add(task)
+            task.add_done_callback(self._pushes.discard)
+
+    async def _push(self, event_id: int, url: str, rows: List[Dict]):
+        try:
+            inserted = await asyncio.to_thread(odds_delta_writer.persist, event_id, rows)
+        except Exception as e:
+            fixture_cache.forget(url)
+            logger.warning(f"❌ Error guardando cuotas en vivo ({url}): {e}")
+            return
+        with self._lock:
+            self._counters["rows_pushed"] += inserted
+        if inserted:
+            logger.debug(f"⚡ {inserted} cuotas en vivo de {url}")
+
+
+# ============================================================================
+# INSTANCIA GLOBAL
+# ============================================================================
+
+live_odds_watcher = LiveOddsWatcher()
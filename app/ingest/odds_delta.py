@@ -0,0 +1,104 @@
+# app/ingest/odds_delta.py
+"""
+Persistencia de cuotas en modo delta
+Solo se inserta en `odds` la fila cuyo precio cambió respecto al último
+conocido; las que siguen iguales reciben un heartbeat (valid_until_utc)
+"""
+
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple, Any
+
+from .scraper_config import SCRAPER_CONFIG
+
+logger = logging.getLogger("betdesk.scraper")
+
+PriceKey = Tuple[str, Optional[float], str, str]  # (market, line, bookmaker, selection)
+
+
+def price_key(row: Dict) -> PriceKey:
+    line = row["line"]
+    return (row["market"], float(line) if line is not None else None, row["bookmaker"], row["selection"])
+
+
+class OddsDeltaWriter:
+    """
+    Escritura de cuotas contra el último precio conocido por
+    (event_id, market, line, bookmaker, selection).
+
+    El último precio vive solo en la tabla odds_latest: write_odds_deltas
+    compara y escribe en la misma transacción, con un lock por evento, así
+    varios workers (scrape_queue, en otros procesos o máquinas) no pueden
+    basarse en un precio que otro ya cambió. Aquí solo se deduplica cada
+    lote y se llevan los contadores.
+
+    Con odds_digest activo los mercados sin cambios ni siquiera llegan aquí;
+    su odds_digest_max_age fuerza una pasada periódica que refresca el
+    heartbeat antes de que el mercado salga de la ventana del snapshot.
+    """
+
+    def __init__(self, enabled: bool = None):
+        cfg = SCRAPER_CONFIG
+        self.enabled = cfg["odds_delta_enabled"] if enabled is None else enabled
+
+        self._lock = threading.Lock()
+        self._counters = {"rows_inserted": 0, "rows_heartbeat": 0, "writes": 0}
+
+    def persist(self, event_id: int, rows: List[Dict]) -> int:
+        """
+        Escribe las cuotas de un evento (insert completo si el modo está apagado)
+
+        Returns:
+            Filas insertadas en `odds`
+        """
+        return self.persist_many([(event_id, rows)]).get(event_id, 0)
+
+    def persist_many(self, batches: List[Tuple[int, List[Dict]]]) -> Dict[int, int]:
+        """
+        Escribe las cuotas de varios eventos en una sola transacción
+
+        Returns:
+            {event_id: filas insertadas en `odds`}
+        """
+        from ..crud import insert_odds_bulk, write_odds_deltas
+
+        merged: Dict[int, List[Dict]] = {}
+        for event_id, rows in batches:
+            merged.setdefault(event_id, []).extend(rows)
+        batches = [(event_id, rows) for event_id, rows in merged.items() if rows]
+        if not batches:
+            return {}
+        if not self.enabled:
+            insert_odds_bulk(batches)
+            return {event_id: len(rows) for event_id, rows in batches}
+
+        # Una fila por clave (la última): ON CONFLICT no admite tocar la misma fila dos veces
+        deduped = [(event_id, list({price_key(r): r for r in rows}.values())) for event_id, rows in batches]
+        written = write_odds_deltas(deduped)
+
+        inserted = {event_id: counts[0] for event_id, counts in written.items()}
+        heartbeats = sum(counts[1] for counts in written.values())
+        with self._lock:
+            self._counters["rows_inserted"] += sum(inserted.values())
+            self._counters["rows_heartbeat"] += heartbeats
+            self._counters["writes"] += 1
+        if heartbeats:
+            logger.debug(f"💓 {heartbeats} cuotas sin cambios en {len(batches)} eventos, solo heartbeat")
+        return inserted
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+        written = counters["rows_inserted"] + counters["rows_heartbeat"]
+        return {
+            "enabled": self.enabled,
+            **counters,
+            "insert_ratio": round(counters["rows_inserted"] / written, 3) if written else None,
+        }
+
+
+# ============================================================================
+# INSTANCIA GLOBAL
+# ============================================================================
+
+odds_delta_writer = OddsDeltaWriter()
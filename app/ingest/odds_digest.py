@@ -0,0 +1,133 @@
+# app/ingest/odds_digest.py
+"""
+Cache de digests de cuotas por (evento, mercado)
+Si la tabla de cuotas de un mercado no cambió desde el último scrape
+no se vuelve a insertar en `odds`
+"""
+
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Tuple, Any
+
+from .scraper_config import SCRAPER_CONFIG
+
+logger = logging.getLogger("betdesk.scraper")
+
+DigestKey = Tuple[str, str]  # (flashscore_url, market)
+
+
+def odds_digest(rows: List[Dict]) -> str:
+    """
+    Digest de las cuotas de un mercado.
+    Independiente del orden y de captured_at_utc, así DOM, XHR y feed
+    producen el mismo digest para la misma tabla.
+    """
+    canonical = sorted(
+        (r["bookmaker"], r["selection"], r["line"], r["odds"]) for r in rows
+    )
+    return hashlib.blake2b(repr(canonical).encode(), digest_size=16).hexdigest()
+
+
+class OddsDigestCache:
+    """
+    Último digest insertado por (evento, mercado).
+
+    Un digest igual al anterior es un hit y el mercado no se inserta, salvo
+    que el último insert tenga más de max_age segundos: los snapshots
+    (fetch_latest_odds_snapshot) solo miran una ventana de minutos y
+    necesitan filas recientes aunque las cuotas no se muevan.
+
+    Los digests se guardan con store() después de insertar, para que un
+    insert fallido no deje el mercado marcado como "sin cambios".
+    """
+
+    def __init__(
+        self,
+        enabled: bool = None,
+        max_age_per_sport: Dict[str, int] = None,
+        max_entries: int = None,
+    ):
+        cfg = SCRAPER_CONFIG
+        self.enabled = cfg["odds_digest_enabled"] if enabled is None else enabled
+        self.max_age_per_sport = max_age_per_sport or cfg["odds_digest_max_age"]
+        self.max_entries = max_entries or cfg["odds_digest_max_entries"]
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[DigestKey, Tuple[str, float]]" = OrderedDict()
+        self._counters = {"hits": 0, "misses": 0, "expired": 0, "rows_skipped": 0}
+
+    def changed(self, event_url: str, rows: List[Dict], sport: str) -> Tuple[List[Dict], Dict[DigestKey, str]]:
+        """
+        Filtra las filas de los mercados sin cambios.
+
+        Returns:
+            (filas a insertar, digests a guardar con store() tras el insert)
+        """
+        if not self.enabled or not rows:
+            return rows, {}
+
+        by_market: Dict[str, List[Dict]] = {}
+        for row in rows:
+            by_market.setdefault(row["market"], []).append(row)
+
+        max_age = self.max_age_per_sport.get(sport, 0)
+        now = time.monotonic()
+        to_insert, pending = [], {}
+
+        with self._lock:
+            for market, market_rows in by_market.items():
+                key = (event_url, market)
+                digest = odds_digest(market_rows)
+                previous = self._entries.get(key)
+
+                if previous and previous[0] == digest:
+                    if now - previous[1] < max_age:
+                        self._counters["hits"] += 1
+                        self._counters["rows_skipped"] += len(market_rows)
+                        self._entries.move_to_end(key)
+                        continue
+                    self._counters["expired"] += 1
+                else:
+                    self._counters["misses"] += 1
+
+                to_insert.extend(market_rows)
+                pending[key] = digest
+
+        skipped = len(rows) - len(to_insert)
+        if skipped:
+            logger.debug(f"♻️ {skipped} cuotas sin cambios en {event_url}, no se insertan")
+        return to_insert, pending
+
+    def store(self, digests: Dict[DigestKey, str]):
+        """Guarda los digests de mercados ya insertados"""
+        if not digests:
+            return
+        now = time.monotonic()
+        with self._lock:
+            for key, digest in digests.items():
+                self._entries[key] = (digest, now)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            size = len(self._entries)
+        lookups = counters["hits"] + counters["misses"] + counters["expired"]
+        return {
+            "enabled": self.enabled,
+            "entries": size,
+            **counters,
+            "hit_rate": round(counters["hits"] / lookups, 3) if lookups else None,
+        }
+
+
+# ============================================================================
+# INSTANCIA GLOBAL
+# ============================================================================
+
+odds_digest_cache = OddsDigestCache()
@@ -8,9 +8,10 @@ import re
 import logging
 from datetime import datetime, timezone
 from typing import List, Dict, Optional
-from bs4 import BeautifulSoup
 import json
 
+from .parser_backends import get_backend, RowCells
+
 logger = logging.getLogger("betdesk.scraper")
 
 
@@ -18,13 +19,14 @@ logger = logging.getLogger("betdesk.scraper")
 # BASKETBALL ODDS PARSER
 # ============================================================================
 
-def parse_basketball_odds(html: str, event_url: str = None) -> List[Dict]:
+def parse_basketball_odds(html: str, event_url: str = None, backend: str = None) -> List[Dict]:
     """
     Parsea cuotas de basketball desde HTML de Flashscore
     
     Args:
         html: HTML de la página del evento
         event_url: URL del evento (para logging)
+        backend: "lxml" o "bs4" (default: SCRAPER_CONFIG["html_parser_backend"])
         
     Returns:
         Lista de odds:
@@ -38,74 +40,19 @@ def parse_basketball_odds(html: str, event_url: str = None) -> List[Dict]:
         }
     """
     logger.info(f"🏀 Parsing basketball odds from {event_url or 'HTML'}")
-    
-    try:
-        soup = BeautifulSoup(html, 'lxml')
-        odds_list = []
-        captured_at = datetime.now(timezone.utc)
-        
-        # Estrategia 1: Buscar datos en JSON embebido
-        odds_from_json = _extract_odds_from_json(soup, "basketball")
-        if odds_from_json:
-            for odd in odds_from_json:
-                odd["captured_at_utc"] = captured_at
-            return odds_from_json
-        
-        # Estrategia 2: Parsear tablas HTML de odds
-        odds_tables = soup.find_all('div', class_=re.compile(r'oddsTab|ui-table'))
-        
-        for table in odds_tables:
-            # Identificar mercado
-            market_header = table.find_previous(class_=re.compile(r'oddsHeader|marketHeader'))
-            if not market_header:
-                continue
-            
-            market_text = market_header.get_text(strip=True).upper()
-            market_type = _identify_basketball_market(market_text)
-            
-            if not market_type:
-                continue
-            
-            # Extraer línea si existe
-            line = _extract_line_from_text(market_text)
-            
-            # Parsear filas de bookmakers
-            rows = table.find_all('div', class_=re.compile(r'oddsRow|table__row'))
-            
-            for row in rows:
-                try:
-                    odd = _parse_basketball_odds_row(row, market_type, line, captured_at)
-                    if odd:
-                        odds_list.append(odd)
-                except Exception as e:
-                    logger.debug(f"Error parsing basketball odds row: {e}")
-                    continue
-        
-        logger.info(f"✅ Parsed {len(odds_list)} basketball odds")
-        return odds_list
-        
-    except Exception as e:
-        logger.error(f"❌ Basketball odds parsing failed: {e}")
-        return []
+    return _parse_odds_html(html, "basketball", backend)
 
 
-def _parse_basketball_odds_row(row, market: str, line: Optional[float], captured_at: datetime) -> Optional[Dict]:
+def _parse_basketball_odds_row(cells: RowCells, market: str, line: Optional[float], captured_at: datetime) -> Optional[Dict]:
     """Parsea una fila de odds de basketball"""
     try:
-        # Extraer bookmaker
-        bookmaker_elem = row.find(class_=re.compile(r'bookmaker|participant'))
-        if not bookmaker_elem:
-            return None
-        
-        bookmaker = bookmaker_elem.get_text(strip=True)
-        
-        # Extraer odds (pueden ser 2 o 3 columnas dependiendo del mercado)
-        odds_cells = row.find_all(class_=re.compile(r'odds|cell'))
+        # Bookmaker y odds (pueden ser 2 o 3 columnas dependiendo del mercado)
+        bookmaker, odds_cells = cells
         
         if market == "TOTAL" and len(odds_cells) >= 2:
             # Over/Under
-            over_odds = _parse_odds_value(odds_cells[0].get_text(strip=True))
-            under_odds = _parse_odds_value(odds_cells[1].get_text(strip=True))
+            over_odds = _parse_odds_value(odds_cells[0])
+            under_odds = _parse_odds_value(odds_cells[1])
             
             result = []
             if over_odds:
@@ -130,8 +77,8 @@ def _parse_basketball_odds_row(row, market: str, line: Optional[float], captured
         
         elif market == "SPREAD" and len(odds_cells) >= 2:
             # Spread (Handicap)
-            home_odds = _parse_odds_value(odds_cells[0].get_text(strip=True))
-            away_odds = _parse_odds_value(odds_cells[1].get_text(strip=True))
+            home_odds = _parse_odds_value(odds_cells[0])
+            away_odds = _parse_odds_value(odds_cells[1])
             
             result = []
             if home_odds:
@@ -156,8 +103,8 @@ def _parse_basketball_odds_row(row, market: str, line: Optional[float], captured
         
         elif market == "MONEYLINE" and len(odds_cells) >= 2:
             # Moneyline (1X2 sin empate)
-            home_odds = _parse_odds_value(odds_cells[0].get_text(strip=True))
-            away_odds = _parse_odds_value(odds_cells[1].get_text(strip=True))
+            home_odds = _parse_odds_value(odds_cells[0])
+            away_odds = _parse_odds_value(odds_cells[1])
             
             result = []
             if home_odds:
@@ -205,7 +152,7 @@ def _identify_basketball_market(text: str) -> Optional[str]:
 # FOOTBALL ODDS PARSER
 # ============================================================================
 
-def parse_football_odds(html: str, event_url: str = None) -> List[Dict]:
+def parse_football_odds(html: str, event_url: str = None, backend: str = None) -> List[Dict]:
     """
     Parsea cuotas de football desde HTML de Flashscore
     
@@ -213,72 +160,19 @@ def parse_football_odds(html: str, event_url: str = None) -> List[Dict]:
         Lista de odds para mercados: 1X2, TOTAL, BTTS
     """
     logger.info(f"⚽ Parsing football odds from {event_url or 'HTML'}")
-    
-    try:
-        soup = BeautifulSoup(html, 'lxml')
-        odds_list = []
-        captured_at = datetime.now(timezone.utc)
-        
-        # Estrategia 1: JSON embebido
-        odds_from_json = _extract_odds_from_json(soup, "football")
-        if odds_from_json:
-            for odd in odds_from_json:
-                odd["captured_at_utc"] = captured_at
-            return odds_from_json
-        
-        # Estrategia 2: Parsear tablas HTML
-        odds_tables = soup.find_all('div', class_=re.compile(r'oddsTab|ui-table'))
-        
-        for table in odds_tables:
-            market_header = table.find_previous(class_=re.compile(r'oddsHeader|marketHeader'))
-            if not market_header:
-                continue
-            
-            market_text = market_header.get_text(strip=True).upper()
-            market_type = _identify_football_market(market_text)
-            
-            if not market_type:
-                continue
-            
-            line = _extract_line_from_text(market_text)
-            
-            rows = table.find_all('div', class_=re.compile(r'oddsRow|table__row'))
-            
-            for row in rows:
-                try:
-                    odd = _parse_football_odds_row(row, market_type, line, captured_at)
-                    if odd:
-                        if isinstance(odd, list):
-                            odds_list.extend(odd)
-                        else:
-                            odds_list.append(odd)
-                except Exception as e:
-                    logger.debug(f"Error parsing football odds row: {e}")
-                    continue
-        
-        logger.info(f"✅ Parsed {len(odds_list)} football odds")
-        return odds_list
-        
-    except Exception as e:
-        logger.error(f"❌ Football odds parsing failed: {e}")
-        return []
+    return _parse_odds_html(html, "football", backend)
 
 
-def _parse_football_odds_row(row, market: str, line: Optional[float], captured_at: datetime):
+def _parse_football_odds_row(cells: RowCells, market: str, line: Optional[float], captured_at: datetime):
     """Parsea una fila de odds de football"""
     try:
-        bookmaker_elem = row.find(class_=re.compile(r'bookmaker|participant'))
-        if not bookmaker_elem:
-            return None
-        
-        bookmaker = bookmaker_elem.get_text(strip=True)
-        odds_cells = row.find_all(class_=re.compile(r'odds|cell'))
+        bookmaker, odds_cells = cells
         
         if market == "1X2" and len(odds_cells) >= 3:
             # 1X2 (Home, Draw, Away)
-            home_odds = _parse_odds_value(odds_cells[0].get_text(strip=True))
-            draw_odds = _parse_odds_value(odds_cells[1].get_text(strip=True))
-            away_odds = _parse_odds_value(odds_cells[2].get_text(strip=True))
+            home_odds = _parse_odds_value(odds_cells[0])
+            draw_odds = _parse_odds_value(odds_cells[1])
+            away_odds = _parse_odds_value(odds_cells[2])
             
             result = []
             if home_odds:
@@ -312,8 +206,8 @@ def _parse_football_odds_row(row, market: str, line: Optional[float], captured_a
         
         elif market == "TOTAL" and len(odds_cells) >= 2:
             # Over/Under goles
-            over_odds = _parse_odds_value(odds_cells[0].get_text(strip=True))
-            under_odds = _parse_odds_value(odds_cells[1].get_text(strip=True))
+            over_odds = _parse_odds_value(odds_cells[0])
+            under_odds = _parse_odds_value(odds_cells[1])
             
             result = []
             if over_odds:
@@ -338,8 +232,8 @@ def _parse_football_odds_row(row, market: str, line: Optional[float], captured_a
         
         elif market == "BTTS" and len(odds_cells) >= 2:
             # Both Teams To Score
-            yes_odds = _parse_odds_value(odds_cells[0].get_text(strip=True))
-            no_odds = _parse_odds_value(odds_cells[1].get_text(strip=True))
+            yes_odds = _parse_odds_value(odds_cells[0])
+            no_odds = _parse_odds_value(odds_cells[1])
             
             result = []
             if yes_odds:
@@ -387,7 +281,7 @@ def _identify_football_market(text: str) -> Optional[str]:
 # TENNIS ODDS PARSER
 # ============================================================================
 
-def parse_tennis_odds(html: str, event_url: str = None) -> List[Dict]:
+def parse_tennis_odds(html: str, event_url: str = None, backend: str = None) -> List[Dict]:
     """
     Parsea cuotas de tennis desde HTML de Flashscore
     
@@ -395,71 +289,18 @@ def parse_tennis_odds(html: str, event_url: str = None) -> List[Dict]:
         Lista de odds para mercados: MONEYLINE, TOTAL_GAMES, HANDICAP_SETS
     """
     logger.info(f"🎾 Parsing tennis odds from {event_url or 'HTML'}")
-    
-    try:
-        soup = BeautifulSoup(html, 'lxml')
-        odds_list = []
-        captured_at = datetime.now(timezone.utc)
-        
-        # Estrategia 1: JSON embebido
-        odds_from_json = _extract_odds_from_json(soup, "tennis")
-        if odds_from_json:
-            for odd in odds_from_json:
-                odd["captured_at_utc"] = captured_at
-            return odds_from_json
-        
-        # Estrategia 2: Parsear tablas HTML
-        odds_tables = soup.find_all('div', class_=re.compile(r'oddsTab|ui-table'))
-        
-        for table in odds_tables:
-            market_header = table.find_previous(class_=re.compile(r'oddsHeader|marketHeader'))
-            if not market_header:
-                continue
-            
-            market_text = market_header.get_text(strip=True).upper()
-            market_type = _identify_tennis_market(market_text)
-            
-            if not market_type:
-                continue
-            
-            line = _extract_line_from_text(market_text)
-            
-            rows = table.find_all('div', class_=re.compile(r'oddsRow|table__row'))
-            
-            for row in rows:
-                try:
-                    odd = _parse_tennis_odds_row(row, market_type, line, captured_at)
-                    if odd:
-                        if isinstance(odd, list):
-                            odds_list.extend(odd)
-                        else:
-                            odds_list.append(odd)
-                except Exception as e:
-                    logger.debug(f"Error parsing tennis odds row: {e}")
-                    continue
-        
-        logger.info(f"✅ Parsed {len(odds_list)} tennis odds")
-        return odds_list
-        
-    except Exception as e:
-        logger.error(f"❌ Tennis odds parsing failed: {e}")
-        return []
+    return _parse_odds_html(html, "tennis", backend)
 
 
-def _parse_tennis_odds_row(row, market: str, line: Optional[float], captured_at: datetime):
+def _parse_tennis_odds_row(cells: RowCells, market: str, line: Optional[float], captured_at: datetime):
     """Parsea una fila de odds de tennis"""
     try:
-        bookmaker_elem = row.find(class_=re.compile(r'bookmaker|participant'))
-        if not bookmaker_elem:
-            return None
-        
-        bookmaker = bookmaker_elem.get_text(strip=True)
-        odds_cells = row.find_all(class_=re.compile(r'odds|cell'))
+        bookmaker, odds_cells = cells
         
         if market == "MONEYLINE" and len(odds_cells) >= 2:
             # Winner (Player 1 vs Player 2)
-            player1_odds = _parse_odds_value(odds_cells[0].get_text(strip=True))
-            player2_odds = _parse_odds_value(odds_cells[1].get_text(strip=True))
+            player1_odds = _parse_odds_value(odds_cells[0])
+            player2_odds = _parse_odds_value(odds_cells[1])
             
             result = []
             if player1_odds:
@@ -484,8 +325,8 @@ def _parse_tennis_odds_row(row, market: str, line: Optional[float], captured_at:
         
         elif market == "TOTAL_GAMES" and len(odds_cells) >= 2:
             # Over/Under total games
-            over_odds = _parse_odds_value(odds_cells[0].get_text(strip=True))
-            under_odds = _parse_odds_value(odds_cells[1].get_text(strip=True))
+            over_odds = _parse_odds_value(odds_cells[0])
+            under_odds = _parse_odds_value(odds_cells[1])
             
             result = []
             if over_odds:
@@ -510,8 +351,8 @@ def _parse_tennis_odds_row(row, market: str, line: Optional[float], captured_at:
         
         elif market == "HANDICAP_SETS" and len(odds_cells) >= 2:
             # Handicap de sets
-            player1_odds = _parse_odds_value(odds_cells[0].get_text(strip=True))
-            player2_odds = _parse_odds_value(odds_cells[1].get_text(strip=True))
+            player1_odds = _parse_odds_value(odds_cells[0])
+            player2_odds = _parse_odds_value(odds_cells[1])
             
             result = []
             if player1_odds:
@@ -555,26 +396,94 @@ def _identify_tennis_market(text: str) -> Optional[str]:
     return None
 
 
+# ============================================================================
+# PIPELINE COMÚN
+# ============================================================================
+
+# deporte -> (identificador de mercado, parser de fila)
+SPORT_PARSERS = {
+    "basketball": (_identify_basketball_market, _parse_basketball_odds_row),
+    "football": (_identify_football_market, _parse_football_odds_row),
+    "tennis": (_identify_tennis_market, _parse_tennis_odds_row),
+}
+
+
+def _parse_odds_html(html: str, sport: str, backend: str = None) -> List[Dict]:
+    """
+    Estrategias comunes a todos los deportes sobre un backend de parsing:
+    1. JSON embebido en <script>
+    2. Tablas de odds: cabecera de mercado previa + filas de bookmakers
+    """
+    identify_market, parse_row = SPORT_PARSERS[sport]
+    
+    try:
+        parser = get_backend(backend)
+        doc = parser.parse(html)
+        odds_list = []
+        captured_at = datetime.now(timezone.utc)
+        
+        # Estrategia 1: Buscar datos en JSON embebido
+        odds_from_json = _extract_odds_from_scripts(parser.script_texts(doc), sport)
+        if odds_from_json:
+            for odd in odds_from_json:
+                odd["captured_at_utc"] = captured_at
+            return odds_from_json
+        
+        # Estrategia 2: Parsear tablas HTML de odds
+        for table, header_text in parser.odds_tables(doc):
+            # Identificar mercado (cabecera previa a la tabla)
+            if header_text is None:
+                continue
+            
+            market_text = header_text.upper()
+            market_type = identify_market(market_text)
+            
+            if not market_type:
+                continue
+            
+            # Extraer línea si existe
+            line = _extract_line_from_text(market_text)
+            
+            # Parsear filas de bookmakers
+            for row in parser.rows(table):
+                try:
+                    cells = parser.row_cells(row)
+                    odd = parse_row(cells, market_type, line, captured_at) if cells else None
+                    if odd:
+                        if isinstance(odd, list):
+                            odds_list.extend(odd)
+                        else:
+                            odds_list.append(odd)
+                except Exception as e:
+                    logger.debug(f"Error parsing {sport} odds row: {e}")
+                    continue
+        
+        logger.info(f"✅ Parsed {len(odds_list)} {sport} odds")
+        return odds_list
+        
+    except Exception as e:
+        logger.error(f"❌ {sport.capitalize()} odds parsing failed: {e}")
+        return []
+
+
 # ============================================================================
 # UTILIDADES COMUNES
 # ============================================================================
 
-def _extract_odds_from_json(soup: BeautifulSoup, sport: str) -> List[Dict]:
+def _extract_odds_from_scripts(script_texts: List[Optional[str]], sport: str) -> List[Dict]:
     """
-    Intenta extraer odds desde JSON embebido en el HTML
+    Intenta extraer odds desde JSON embebido en los <script> del HTML
     Flashscore a veces incluye datos en window.__INITIAL_STATE__ o similar
     """
     try:
-        scripts = soup.find_all('script')
-        
-        for script in scripts:
-            if not script.string:
+        for script_text in script_texts:
+            if not script_text:
                 continue
             
             # Buscar patrones comunes de datos JSON
-            if 'window.__INITIAL_STATE__' in script.string:
+            if 'window.__INITIAL_STATE__' in script_text:
                 # Extraer JSON
-                match = re.search(r'window\.__INITIAL_STATE__\s*=\s*({.+?});', script.string, re.DOTALL)
+                match = re.search(r'window\.__INITIAL_STATE__\s*=\s*({.+?});', script_text, re.DOTALL)
                 if match:
                     json_str = match.group(1)
                     data = json.loads(json_str)
@@ -583,7 +492,7 @@ def _extract_odds_from_json(soup: BeautifulSoup, sport: str) -> List[Dict]:
                     logger.debug("Found JSON data in HTML")
                     return []  # Por ahora retornamos vacío
             
-            elif 'oddsData' in script.string or 'bookmakers' in script.string:
+            elif 'oddsData' in script_text or 'bookmakers' in script_text:
                 # Otro patrón posible
                 logger.debug("Found potential odds data in script")
                 return []
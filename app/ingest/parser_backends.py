@@ -0,0 +1,183 @@
+# app/ingest/parser_backends.py
+"""
+Backends de parsing HTML para odds_parser
+Cada backend sabe encontrar tablas, cabeceras de mercado, filas y celdas;
+la interpretación de las cuotas es común (odds_parser), así ambos
+producen exactamente las mismas filas
+
+- "bs4":  BeautifulSoup + find_all con regex de clases (implementación original)
+- "lxml": lxml.html + expresiones XPath precompiladas (sin árbol de BeautifulSoup)
+"""
+
+import re
+import logging
+from typing import Iterator, List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+
+from .scraper_config import SCRAPER_CONFIG
+
+logger = logging.getLogger("betdesk.scraper")
+
+# Clases que buscan los parsers. Son alternativas literales, así que
+# re.search sobre el atributo class equivale a contains(@class, ...) en XPath
+TABLE_CLASSES = ("oddsTab", "ui-table")
+HEADER_CLASSES = ("oddsHeader", "marketHeader")
+ROW_CLASSES = ("oddsRow", "table__row")
+BOOKMAKER_CLASSES = ("bookmaker", "participant")
+CELL_CLASSES = ("odds", "cell")
+
+# (bookmaker, textos de las celdas de cuotas)
+RowCells = Tuple[str, List[str]]
+
+
+def _class_regex(classes: Tuple[str, ...]):
+    return re.compile("|".join(classes))
+
+
+def _class_test(classes: Tuple[str, ...]) -> str:
+    return " or ".join(f"contains(@class, '{c}')" for c in classes)
+
+
+# ============================================================================
+# BEAUTIFULSOUP
+# ============================================================================
+
+class BeautifulSoupBackend:
+    """Árbol completo de BeautifulSoup y regex de clases en cada nodo"""
+
+    name = "bs4"
+
+    TABLE_RE = _class_regex(TABLE_CLASSES)
+    HEADER_RE = _class_regex(HEADER_CLASSES)
+    ROW_RE = _class_regex(ROW_CLASSES)
+    BOOKMAKER_RE = _class_regex(BOOKMAKER_CLASSES)
+    CELL_RE = _class_regex(CELL_CLASSES)
+
+    def parse(self, html: str):
+        return BeautifulSoup(html, "lxml")
+
+    def script_texts(self, doc) -> List[Optional[str]]:
+        return [script.string for script in doc.find_all("script")]
+
+    def odds_tables(self, doc) -> Iterator[Tuple[object, Optional[str]]]:
+        """(tabla, texto de la cabecera de mercado previa o None)"""
+        for table in doc.find_all("div", class_=self.TABLE_RE):
+            header = table.find_previous(class_=self.HEADER_RE)
+            yield table, header.get_text(strip=True) if header else None
+
+    def rows(self, table) -> list:
+        return table.find_all("div", class_=self.ROW_RE)
+
+    def row_cells(self, row) -> Optional[RowCells]:
+        bookmaker = row.find(class_=self.BOOKMAKER_RE)
+        if not bookmaker:
+            return None
+        cells = row.find_all(class_=self.CELL_RE)
+        return bookmaker.get_text(strip=True), [c.get_text(strip=True) for c in cells]
+
+
+# ============================================================================
+# LXML + XPATH
+# ============================================================================
+
+class LxmlBackend:
+    """
+    lxml.html con XPath precompilado.
+
+    Equivalencias con BeautifulSoup:
+    - find_previous(): el último nodo anterior en orden de documento
+      (preceding | ancestor); se resuelve en una sola pasada sobre las
+      tablas y cabeceras en orden de documento
+    - find(): primer descendiente (descendant::*[...][1], no //*[...][1])
+    - get_text(strip=True): textos descendientes sin comentarios ni el
+      contenido de script/style/template/rt/rp, cada uno con strip()
+    """
+
+    name = "lxml"
+
+    def __init__(self):
+        from lxml import etree
+
+        self._tables_and_headers = etree.XPath(
+            f"//div[{_class_test(TABLE_CLASSES)}] | //*[{_class_test(HEADER_CLASSES)}]"
+        )
+        self._rows = etree.XPath(f"descendant::div[{_class_test(ROW_CLASSES)}]")
+        self._bookmaker = etree.XPath(f"descendant::*[{_class_test(BOOKMAKER_CLASSES)}][1]")
+        self._cells = etree.XPath(f"descendant::*[{_class_test(CELL_CLASSES)}]")
+        self._scripts = etree.XPath("//script")
+        self._text = etree.XPath(
+            "descendant::text()[not(ancestor::script or ancestor::style"
+            " or ancestor::template or ancestor::rt or ancestor::rp)]"
+        )
+
+    def parse(self, html: str):
+        from lxml import html as lxml_html
+        from lxml.etree import ParserError
+
+        try:
+            return lxml_html.document_fromstring(html)
+        except ValueError:
+            # str con declaración de encoding: lxml la exige en bytes
+            return lxml_html.document_fromstring(html.encode("utf-8"))
+        except ParserError:
+            return None  # documento vacío
+
+    def script_texts(self, doc) -> List[Optional[str]]:
+        if doc is None:
+            return []
+        return [script.text for script in self._scripts(doc)]
+
+    def odds_tables(self, doc) -> Iterator[Tuple[object, Optional[str]]]:
+        """(tabla, texto de la cabecera de mercado previa o None)"""
+        if doc is None:
+            return
+        header_text = None  # cabecera más reciente en orden de documento
+        for element in self._tables_and_headers(doc):
+            classes = element.get("class", "")
+            if element.tag == "div" and any(c in classes for c in TABLE_CLASSES):
+                yield element, header_text
+            if any(c in classes for c in HEADER_CLASSES):
+                header_text = self.get_text(element)
+
+    def rows(self, table) -> list:
+        return self._rows(table)
+
+    def row_cells(self, row) -> Optional[RowCells]:
+        bookmaker = self._bookmaker(row)
+        if not bookmaker:
+            return None
+        return self.get_text(bookmaker[0]), [self.get_text(c) for c in self._cells(row)]
+
+    def get_text(self, element) -> str:
+        return "".join(s for s in (t.strip() for t in self._text(element)) if s)
+
+
+# ============================================================================
+# SELECCIÓN DE BACKEND
+# ============================================================================
+
+BACKENDS = {
+    "bs4": BeautifulSoupBackend,
+    "lxml": LxmlBackend,
+}
+
+_instances = {}
+
+
+def get_backend(name: str = None):
+    """
+    Backend por nombre (default: SCRAPER_CONFIG["html_parser_backend"]).
+    Si lxml no está instalado se usa BeautifulSoup.
+    """
+    name = name or SCRAPER_CONFIG["html_parser_backend"]
+    if name not in BACKENDS:
+        raise ValueError(f"Backend de parsing desconocido: {name}")
+
+    if name not in _instances:
+        try:
+            _instances[name] = BACKENDS[name]()
+        except ImportError:
+            logger.warning(f"⚠️  Backend {name} no disponible, usando bs4")
+            return get_backend("bs4")
+    return _instances[name]
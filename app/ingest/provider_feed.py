@@ -0,0 +1,282 @@
+# app/ingest/provider_feed.py
+"""
+Proveedor de cuotas sin navegador: pide directamente los feeds de datos
+que usa el front de Flashscore (httpx con pool de conexiones y HTTP/2)
+y los convierte al mismo esquema de filas que odds_for_event
+"""
+
+import os
+import re
+import json
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Any
+
+from .scraper_config import SCRAPER_CONFIG, flashscore_breakers
+from .html_utils import extract_event_id
+from .provider_flashscore import MARKET_SPECS
+from .rate_limiter import flashscore_rate_limiter
+
+logger = logging.getLogger("betdesk.scraper")
+
+# ============================================================================
+# MAPEO DE MERCADOS DEL FEED
+# ============================================================================
+
+# bettingType del feed -> mercado interno, por deporte
+FEED_MARKETS = {
+    "basketball": {
+        "OVER_UNDER": "TOTAL",
+        "ASIAN_HANDICAP": "SPREAD",
+        "HOME_AWAY": "MONEYLINE",
+    },
+    "football": {
+        "OVER_UNDER": "TOTAL",
+        "HOME_DRAW_AWAY": "1X2",
+        "BOTH_TEAMS_TO_SCORE": "BTTS",
+    },
+    "tennis": {
+        "HOME_AWAY": "MONEYLINE",
+        "OVER_UNDER": "TOTAL_GAMES",
+    },
+}
+
+# Selecciones por posición cuando el feed no trae una selección explícita
+POSITIONAL_SELECTIONS = {
+    "MONEYLINE": ("HOME", "AWAY"),
+    "1X2": ("HOME", "DRAW", "AWAY"),
+}
+
+MARKET_HAS_LINE = {market: spec["has_line"] for market, spec in MARKET_SPECS.items()}
+
+
+def event_id_from_url(url: str) -> Optional[str]:
+    """ID de evento de Flashscore: parámetro ?mid= o /match/<id>/"""
+    match = re.search(r'[?&]mid=([A-Za-z0-9]+)', url)
+    if match:
+        return match.group(1)
+    return extract_event_id(url)
+
+
+def _to_float(value) -> Optional[float]:
+    try:
+        return float(str(value).replace(",", "."))
+    except (TypeError, ValueError):
+        return None
+
+
+def decode_odds_payload(payload: Dict[str, Any], sport: str, markets: List[str] = None) -> List[Dict]:
+    """
+    Convierte la respuesta del feed de cuotas en filas de odds
+
+    Estructura esperada (data.findOddsByEventId):
+        odds: [{bookmakerId, bettingType, bettingScope,
+                odds: [{value, active, selection, handicap: {value}, bothTeamsToScore}]}]
+        settings.bookmakers: [{bookmaker: {id, name}}]
+    """
+    data = (payload or {}).get("data") or {}
+    found = data.get("findOddsByEventId") or {}
+
+    bookmakers = {}
+    for entry in (found.get("settings") or {}).get("bookmakers") or []:
+        bm = entry.get("bookmaker") or {}
+        if bm.get("id") is not None:
+            bookmakers[bm["id"]] = bm.get("name") or str(bm["id"])
+
+    type_map = FEED_MARKETS.get(sport, {})
+    captured_at = datetime.now(timezone.utc)
+    rows = []
+
+    for group in found.get("odds") or []:
+        if group.get("bettingScope", "FULL_TIME") != "FULL_TIME":
+            continue
+
+        market = type_map.get(group.get("bettingType"))
+        if not market or (markets and market not in markets):
+            continue
+
+        bookmaker = bookmakers.get(group.get("bookmakerId"), str(group.get("bookmakerId")))
+        rows.extend(_decode_group(group.get("odds") or [], market, bookmaker, captured_at))
+
+    return rows
+
+
+def _decode_group(items: List[Dict], market: str, bookmaker: str, captured_at: datetime) -> List[Dict]:
+    """Decodifica las cuotas de un bookmaker para un mercado"""
+    decoded = []  # (selection, line, item del feed)
+
+    if market in ("TOTAL", "TOTAL_GAMES"):
+        for item in items:
+            handicap = item.get("handicap") or {}
+            selection = (item.get("selection") or "").upper()
+            if selection in ("OVER", "UNDER"):
+                decoded.append((selection, _to_float(handicap.get("value")), item))
+
+    elif market == "BTTS":
+        for item in items:
+            btts = item.get("bothTeamsToScore")
+            if btts is not None:
+                decoded.append(("YES" if btts else "NO", None, item))
+
+    elif market == "SPREAD":
+        # Pares (local, visitante); la línea de la fila es la del local,
+        # igual que en la tabla de asian-handicap
+        for home, away in zip(items[0::2], items[1::2]):
+            line = _to_float((home.get("handicap") or {}).get("value"))
+            decoded.append(("HOME", line, home))
+            decoded.append(("AWAY", line, away))
+
+    else:
+        # MONEYLINE / 1X2: local, (empate), visitante en el orden del feed
+        for selection, item in zip(POSITIONAL_SELECTIONS[market], items):
+            decoded.append((selection, None, item))
+
+    rows = []
+    for selection, line, item in decoded:
+        if item.get("active") is False:
+            continue
+
+        odds = _to_float(item.get("value"))
+        if not odds or odds <= 1.0:
+            continue
+
+        if MARKET_HAS_LINE[market] and line is None:
+            continue
+
+        rows.append({
+            "market": market,
+            "line": line,
+            "bookmaker": bookmaker,
+            "selection": selection,
+            "odds": odds,
+            "captured_at_utc": captured_at,
+        })
+
+    return rows
+
+
+# ============================================================================
+# CLIENTE HTTP
+# ============================================================================
+
+class FlashscoreFeedClient:
+    """
+    Cliente de los feeds de Flashscore con un httpx.Client compartido
+    (pool de conexiones keep-alive y HTTP/2 si está instalado h2)
+
+    Con FLASHSCORE_FEED_RECORD_DIR definido, cada payload recibido se
+    guarda en ese directorio para poder reproducirlo con feed_stub.
+    """
+
+    def __init__(self, base_url: str = None, record_dir: str = None):
+        self.base_url = (base_url or SCRAPER_CONFIG["feed_base_url"]).rstrip("/")
+        self.record_dir = record_dir or os.environ.get("FLASHSCORE_FEED_RECORD_DIR")
+        self._client = None
+        self._client_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._counters = {"requests": 0, "ok": 0, "fallbacks": 0, "errors": 0,
+                          "http2_responses": 0, "breaker_skips": 0}
+
+    @property
+    def client(self):
+        with self._client_lock:
+            if self._client is None:
+                self._client = self._make_client()
+            return self._client
+
+    def _make_client(self):
+        import httpx
+
+        limits = httpx.Limits(
+            max_connections=SCRAPER_CONFIG["feed_max_connections"],
+            max_keepalive_connections=SCRAPER_CONFIG["feed_max_connections"],
+        )
+        headers = {
+            "User-Agent": SCRAPER_CONFIG["user_agent"],
+            "Accept": "application/json",
+            "Origin": "https://www.flashscore.com",
+            "Referer": "https://www.flashscore.com/",
+        }
+        try:
+            return httpx.Client(http2=True, limits=limits, headers=headers,
+                                timeout=SCRAPER_CONFIG["timeout"])
+        except ImportError:
+            logger.warning("⚠️  Paquete h2 no instalado, feeds por HTTP/1.1")
+            return httpx.Client(limits=limits, headers=headers, timeout=SCRAPER_CONFIG["timeout"])
+
+    def fetch_odds_payload(self, event_id: str) -> Optional[Dict[str, Any]]:
+        """Descarga el payload de cuotas de un evento"""
+        params = dict(SCRAPER_CONFIG["feed_odds_params"])
+        params["eventId"] = event_id
+
+        breaker = flashscore_breakers.for_host(self.base_url)
+        if not breaker.allow():
+            self._count("breaker_skips")
+            return None
+
+        self._count("requests")
+        flashscore_rate_limiter.acquire(self.base_url)
+        try:
+            response = self.client.get(f"{self.base_url}/odds/pq_graphql", params=params)
+            response.raise_for_status()
+            payload = response.json()
+        except Exception as e:
+            breaker.record_failure()
+            self._count("errors")
+            logger.warning(f"❌ Feed de cuotas falló para {event_id}: {e}")
+            return None
+
+        breaker.record_success()
+
+        if response.http_version == "HTTP/2":
+            self._count("http2_responses")
+
+        if self.record_dir:
+            self._record(f"odds_{event_id}.json", payload)
+        return payload
+
+    def odds_for_event(self, url: str, sport: str, markets: List[str] = None) -> List[Dict]:
+        """
+        Filas de odds de un evento desde el feed.
+        Vacío si no hay datos: el llamador debe caer a Playwright.
+        """
+        event_id = event_id_from_url(url)
+        if not event_id:
+            logger.debug(f"Sin event id en URL: {url}")
+            return []
+
+        payload = self.fetch_odds_payload(event_id)
+        rows = decode_odds_payload(payload, sport, markets) if payload else []
+
+        self._count("ok" if rows else "fallbacks")
+        return rows
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"base_url": self.base_url, **self._counters}
+
+    def close(self):
+        with self._client_lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+    def _count(self, key: str):
+        with self._lock:
+            self._counters[key] += 1
+
+    def _record(self, filename: str, payload: Dict[str, Any]):
+        try:
+            os.makedirs(self.record_dir, exist_ok=True)
+            with open(os.path.join(self.record_dir, filename), "w", encoding="utf-8") as f:
+                json.dump(payload, f)
+        except OSError as e:
+            logger.debug(f"No se pudo grabar payload {filename}: {e}")
+
+
+# ============================================================================
+# INSTANCIA GLOBAL
+# ============================================================================
+
+flashscore_feed_client = FlashscoreFeedClient()
@@ -1,248 +1,605 @@
 # app/ingest/provider_flashscore.py
 
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeout
+from playwright.sync_api import TimeoutError as PlaywrightTimeout
 from datetime import datetime, timezone
-import time
+import re
+import threading
 from typing import Optional
 
-def scrape_flashscore_odds(
-    event_url: str,
-    market: str,  # "TOTAL", "SPREAD", "MONEYLINE"
-    sport: str = "basketball"
-) -> list[dict]:
+from .browser_pool import flashscore_browser_pool
+from .rate_limiter import flashscore_rate_limiter
+from .replay_corpus import record_page, recording_enabled, KIND_ODDS
+from .scraper_config import SCRAPER_CONFIG, flashscore_breakers
+from .scraper_errors import NetworkError
+
+# Mercados soportados: pestaña de cuotas en Flashscore, selecciones en el
+# orden de las columnas de la tabla y si cada fila trae su propia línea
+MARKET_SPECS = {
+    "TOTAL": {
+        "path": "odds/over-under/full-time/",
+        "selections": ("OVER", "UNDER"),
+        "has_line": True,
+    },
+    "SPREAD": {
+        "path": "odds/asian-handicap/full-time/",
+        "selections": ("HOME", "AWAY"),
+        "has_line": True,
+    },
+    "MONEYLINE": {
+        "path": "odds/1x2-odds/full-time/",
+        "selections": ("HOME", "AWAY"),
+        "has_line": False,
+    },
+    "1X2": {
+        "path": "odds/1x2-odds/full-time/",
+        "selections": ("HOME", "DRAW", "AWAY"),
+        "has_line": False,
+    },
+    "BTTS": {
+        "path": "odds/both-teams-to-score/full-time/",
+        "selections": ("YES", "NO"),
+        "has_line": False,
+    },
+    "TOTAL_GAMES": {
+        "path": "odds/over-under/full-time/",
+        "selections": ("OVER", "UNDER"),
+        "has_line": True,
+    },
+}
+
+# Mercados que se extraen por deporte en cada ingesta
+SPORT_MARKETS = {
+    "basketball": ["TOTAL", "SPREAD", "MONEYLINE"],
+    "football": ["TOTAL", "1X2", "BTTS"],
+    "tennis": ["MONEYLINE", "TOTAL_GAMES"],
+}
+
+ROW_SELECTOR = "div.ui-table__row"
+# Solo filas del mercado actual (ver _switch_market_tab)
+LIVE_ROW_SELECTOR = f"{ROW_SELECTOR}:not([data-betdesk-stale])"
+
+# XHR con el que el front de Flashscore rellena las tablas de cuotas
+ODDS_FEED_PATH = "/odds/pq_graphql"
+
+
+def build_market_url(event_url: str, market: str) -> str:
     """
-    Scraper unificado para Flashscore con soporte para múltiples mercados
+    Construye la URL de la pestaña de cuotas de un mercado
+    Formato: https://www.flashscore.com/match/basketball/team1-id/team2-id/odds/1x2-odds/full-time/?mid=xxx
     """
-    
-    # Mapeo de mercados a URLs de Flashscore (formato correcto)
-    market_urls = {
-        "TOTAL": "odds/over-under/full-time/",
-        "SPREAD": "odds/asian-handicap/full-time/",
-        "MONEYLINE": "odds/1x2-odds/full-time/"
-    }
-    
-    if market not in market_urls:
+    if market not in MARKET_SPECS:
         raise ValueError(f"Mercado no soportado: {market}")
     
-    # Construir URL completa
-    # Formato: https://www.flashscore.com/match/basketball/team1-id/team2-id/odds/1x2-odds/full-time/?mid=xxx
-    base_url = event_url.rstrip('/')
-    
     # Extraer mid si existe en la URL original
     mid_param = ""
     if "?mid=" in event_url:
         mid_param = "?" + event_url.split("?")[1]
     elif "mid=" in event_url:
-        # Extraer mid de la URL
-        import re
         mid_match = re.search(r'mid=([^/&]+)', event_url)
         if mid_match:
             mid_param = f"?mid={mid_match.group(1)}"
     
     # Limpiar base_url de parámetros y paths extras
-    base_url = base_url.split('?')[0].rstrip('/')
-    
-    full_url = f"{base_url}/{market_urls[market]}{mid_param}"
+    base_url = event_url.split('?')[0].rstrip('/')
     
-    print(f"🔍 Scraping {market} desde: {full_url}")
+    return f"{base_url}/{MARKET_SPECS[market]['path']}{mid_param}"
+
+
+def scrape_flashscore_odds(
+    event_url: str,
+    market: str,  # "TOTAL", "SPREAD", "MONEYLINE", "1X2", "BTTS", "TOTAL_GAMES"
+    sport: str = "basketball"
+) -> list[dict]:
+    """
+    Scraper unificado para Flashscore de un solo mercado
+    """
+    if market not in MARKET_SPECS:
+        raise ValueError(f"Mercado no soportado: {market}")
     
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context(
-            viewport={'width': 1920, 'height': 1080},
-            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        )
-        page = context.new_page()
-        
-        try:
-            # Navegar a la página
-            page.goto(full_url, wait_until="domcontentloaded", timeout=30000)
-            
-            # Esperar a que cargue la tabla de cuotas
-            page.wait_for_selector("div.ui-table__row", timeout=15000)
-            
-            # Cerrar modales si aparecen
+    return scrape_flashscore_markets(event_url, [market], sport)
+
+
+def scrape_flashscore_markets(
+    event_url: str,
+    markets: list[str],
+    sport: str = "basketball"
+) -> list[dict]:
+    """
+    Extrae varios mercados de un evento en una sola sesión de página.
+
+    Navega una vez a la pestaña del primer mercado y cambia al resto
+    haciendo click en las pestañas de cuotas (over-under, asian-handicap,
+    1x2...) dentro de la misma página. Si una pestaña no aparece se navega
+    directamente a su URL.
+
+    Con capture_odds_xhr las cuotas se decodifican del XHR de cuotas que
+    recibe la página al navegar; solo los mercados que no vengan en el
+    payload se parsean desde la tabla.
+
+    Returns:
+        Lista combinada de filas de todos los mercados
+    """
+    for market in markets:
+        if market not in MARKET_SPECS:
+            raise ValueError(f"Mercado no soportado: {market}")
+
+    if not markets:
+        return []
+
+    markets = allowed_markets(event_url, markets)
+    if not markets:
+        print(f"⛔ Circuit breaker abierto, se omite {event_url}")
+        return []
+
+    try:
+        with flashscore_browser_pool.page() as page:
+            return run_steps(scrape_markets_steps(page, event_url, markets, sport))
+    finally:
+        release_probes(event_url, markets)
+
+
+# ============================================================================
+# FLUJO DE SCRAPING COMPARTIDO (SYNC Y ASYNC)
+# ============================================================================
+# El flujo de una página (selectores, URLs, XHR, pestañas, breakers) se
+# escribe una sola vez como generador: cede cada operación de Playwright y
+# recibe su resultado. run_steps la ejecuta con la API sync y
+# run_steps_async con la async; los errores de Playwright se relanzan
+# dentro del generador, así que sus try/except valen para ambas. El
+# TimeoutError de playwright.sync_api y el de async_api son la misma clase.
+
+class PageCall:
+    """Llamada a un método de Playwright (page, elemento o respuesta)"""
+
+    def __init__(self, target, method: str, *args, **kwargs):
+        self.target = target
+        self.method = method
+        self.args = args
+        self.kwargs = kwargs
+
+    def run(self):
+        return getattr(self.target, self.method)(*self.args, **self.kwargs)
+
+    async def run_async(self):
+        return await getattr(self.target, self.method)(*self.args, **self.kwargs)
+
+
+class RateLimit:
+    """Espera del token bucket del host antes de una petición"""
+
+    def __init__(self, url: str):
+        self.url = url
+
+    def run(self):
+        flashscore_rate_limiter.acquire(self.url)
+
+    async def run_async(self):
+        await flashscore_rate_limiter.acquire_async(self.url)
+
+
+def run_steps(steps):
+    """Ejecuta un flujo de pasos con la API sync de Playwright"""
+    try:
+        result, error = None, None
+        while True:
             try:
-                close_button = page.query_selector("button.close, .modal-close, [aria-label='Close']")
-                if close_button:
-                    close_button.click()
-                    time.sleep(0.5)
-            except:
-                pass
-            
-            # Parsear según el mercado
-            if market == "TOTAL":
-                rows = _parse_total_market(page)
-            elif market == "SPREAD":
-                rows = _parse_spread_market(page)
-            elif market == "MONEYLINE":
-                rows = _parse_moneyline_market(page)
-            
-            print(f"✅ Extraídas {len(rows)} cuotas del mercado {market}")
-            return rows
-            
-        except PlaywrightTimeout:
-            print(f"⏱️ Timeout al cargar {full_url}")
-            return []
-        except Exception as e:
-            print(f"❌ Error scraping {market}: {e}")
-            return []
-        finally:
-            browser.close()
+                op = steps.send(result) if error is None else steps.throw(error)
+            except StopIteration as stop:
+                return stop.value
+            result, error = None, None
+            try:
+                result = op.run()
+            except Exception as e:
+                error = e
+    finally:
+        steps.close()
+
+
+async def run_steps_async(steps):
+    """Ejecuta un flujo de pasos con playwright.async_api"""
+    try:
+        result, error = None, None
+        while True:
+            try:
+                op = steps.send(result) if error is None else steps.throw(error)
+            except StopIteration as stop:
+                return stop.value
+            result, error = None, None
+            try:
+                result = await op.run_async()
+            except Exception as e:
+                error = e
+    finally:
+        # Cancelado (p.ej. event_timeout): el finally del flujo informa a los breakers
+        steps.close()
+
+
+def scrape_markets_steps(page, event_url: str, markets: list[str], sport: str, market_errors: dict = None):
+    """
+    Flujo de scrape_flashscore_markets sobre una página ya prestada.
+    `markets` ya viene filtrado por allowed_markets. Si se pasa
+    `market_errors`, se rellena con {mercado: error} de los que fallaron.
+
+    Returns (al terminar el generador):
+        Lista combinada de filas de todos los mercados
+    """
+    if not markets:
+        return []
+
+    all_rows = []
+    current_path = None
+    pending = markets
+    succeeded, failed = set(), set()
+    page_loaded = None  # True: alguna navegación cargó; False: solo fallos de carga
+    if market_errors is None:
+        market_errors = {}
+
+    try:
+        if SCRAPER_CONFIG["capture_odds_xhr"]:
+            first_url = build_market_url(event_url, markets[0])
+            print(f"🔍 Capturando cuotas (XHR) desde: {first_url}")
+            rows = []
+            try:
+                rows = yield from _capture_odds_xhr(page, first_url, sport, markets)
+                page_loaded = True
+                current_path = MARKET_SPECS[markets[0]]["path"]
+            except NetworkError as e:
+                print(f"🌐 No se pudo cargar {first_url}: {e}")
+                page_loaded = page_loaded or False
+            except Exception as e:
+                print(f"❌ Error capturando XHR de cuotas ({event_url}): {e}")
+
+            captured = {row["market"] for row in rows}
+            pending = [m for m in markets if m not in captured]
+            record_xhr_capture(captured, pending)
+            succeeded.update(captured)
+            all_rows.extend(rows)
+
+            if captured:
+                print(f"✅ Decodificadas {len(rows)} cuotas del XHR ({', '.join(sorted(captured))})")
+            if pending:
+                print(f"↩️ Sin payload para {', '.join(pending)} en {event_url}, parseando DOM")
+                if current_path is not None:
+                    yield from _close_modals(page)
+
+        for market in pending:
+            path = MARKET_SPECS[market]["path"]
+            full_url = build_market_url(event_url, market)
+
+            try:
+                if current_path is None:
+                    print(f"🔍 Scraping {market} desde: {full_url}")
+                    yield from _goto_market(page, full_url)
+                    yield from _close_modals(page)
+                elif path != current_path:
+                    print(f"🔀 Cambiando a pestaña {market}")
+                    yield from _switch_market_tab(page, path, full_url)
+                else:
+                    # Pestaña ya abierta por la captura XHR: falta la tabla
+                    yield PageCall(page, "wait_for_selector", LIVE_ROW_SELECTOR, timeout=15000)
+                current_path = path
+
+                rows = yield from _parse_market(page, market)
+                print(f"✅ Extraídas {len(rows)} cuotas del mercado {market}")
+                yield from _record_odds_page(page, full_url, sport)
+                page_loaded = True
+                all_rows.extend(rows)
+                succeeded.add(market)
+
+            except NetworkError as e:
+                # goto fallido o página bloqueada: cuenta contra el host, no contra el mercado
+                print(f"🌐 No se pudo cargar {full_url}: {e}")
+                current_path = None
+                page_loaded = page_loaded or False
+                market_errors[market] = str(e)
+            except PlaywrightTimeout:
+                # La página cargó pero la tabla no apareció.
+                # Estado de la página incierto: el siguiente mercado navega de nuevo
+                current_path = None
+                page_loaded = True
+                if (yield from _has_odds_tabs(page)):
+                    print(f"⏱️ Sin tabla de cuotas en {full_url}")
+                    failed.add(market)
+                    market_errors[market] = f"sin tabla de cuotas en {full_url}"
+                else:
+                    print(f"ℹ️ {event_url} aún no tiene cuotas")
+                    market_errors[market] = "el evento aún no tiene cuotas"
+            except Exception as e:
+                print(f"❌ Error scraping {market} ({full_url}): {e}")
+                current_path = None
+                failed.add(market)
+                market_errors[market] = str(e) or type(e).__name__
+    finally:
+        record_scrape_outcome(event_url, succeeded, failed, page_loaded)
+
+    return all_rows
+
+
+# ============================================================================
+# CAPTURA DEL XHR DE CUOTAS
+# ============================================================================
 
+_xhr_lock = threading.Lock()
+_xhr_counters = {
+    "events": 0,
+    "events_full_xhr": 0,      # todos los mercados salieron del payload
+    "events_no_payload": 0,    # ningún mercado en el payload: todo por DOM
+    "markets_xhr": 0,
+    "markets_dom_fallback": 0,
+}
+
+
+def is_odds_feed_response(response) -> bool:
+    """True si la respuesta es el payload de cuotas del evento"""
+    return ODDS_FEED_PATH in response.url and response.status == 200
+
+
+def _capture_odds_xhr(page, full_url: str, sport: str, markets: list[str]):
+    """
+    Navega a la pestaña de cuotas escuchando page.on("response") y decodifica
+    los payloads de cuotas que recibe la página, sin esperar a la tabla.
+    Devuelve [] si no llega ningún payload en odds_xhr_timeout.
+    """
+    from .provider_feed import decode_odds_payload
+
+    responses = {}  # url -> response (la SPA puede repetir la petición)
+
+    def on_response(response):
+        if is_odds_feed_response(response):
+            responses[response.url] = response
+
+    page.on("response", on_response)
+    try:
+        yield from _navigate(page, full_url)
+        if not responses:
+            try:
+                yield PageCall(
+                    page, "wait_for_event", "response",
+                    predicate=is_odds_feed_response,
+                    timeout=SCRAPER_CONFIG["odds_xhr_timeout"],
+                )
+            except PlaywrightTimeout:
+                pass
+    finally:
+        page.remove_listener("response", on_response)
 
-def _parse_total_market(page) -> list[dict]:
-    """Parser para mercado TOTAL (Over/Under)"""
     rows = []
-    row_elements = page.query_selector_all("div.ui-table__row")
-    
-    for row_el in row_elements:
+    for response in responses.values():
         try:
-            # Bookmaker
-            bookmaker_el = row_el.query_selector(".oddsCell__bookmakerCell a.prematchLink img")
-            if not bookmaker_el:
-                continue
-            bookmaker = bookmaker_el.get_attribute("alt").strip()
-            
-            # Línea (total)
-            line_el = row_el.query_selector("div.wcl-oddsCell_qJ5md span.wcl-oddsValue_3e8Cq")
-            if not line_el:
-                continue
-            line_text = line_el.inner_text().strip()
-            line = float(line_text.replace(",", "."))
-            
-            # Cuotas Over y Under
-            odds_elements = row_el.query_selector_all("a.oddsCell__odd")
-            if len(odds_elements) < 2:
-                continue
-                
-            odds_over = float(odds_elements[0].inner_text().strip().replace(",", "."))
-            odds_under = float(odds_elements[1].inner_text().strip().replace(",", "."))
-            
-            captured_at = datetime.now(timezone.utc)
-            
-            # Agregar ambas selecciones
-            rows.append({
-                "market": "TOTAL",
-                "line": line,
-                "bookmaker": bookmaker,
-                "selection": "OVER",
-                "odds": odds_over,
-                "captured_at_utc": captured_at,
-            })
-            rows.append({
-                "market": "TOTAL",
-                "line": line,
-                "bookmaker": bookmaker,
-                "selection": "UNDER",
-                "odds": odds_under,
-                "captured_at_utc": captured_at,
-            })
-            
+            payload = yield PageCall(response, "json")
+            rows.extend(decode_odds_payload(payload, sport, markets))
         except Exception as e:
-            print(f"⚠️ Error parseando fila TOTAL: {e}")
-            continue
-    
+            print(f"⚠️ Payload de cuotas ilegible ({response.url}): {e}")
     return rows
 
 
-def _parse_spread_market(page) -> list[dict]:
-    """Parser para mercado SPREAD (Handicap)"""
-    rows = []
-    row_elements = page.query_selector_all("div.ui-table__row")
+def record_xhr_capture(captured: set, pending: list[str]):
+    """Acumula el resultado de una captura XHR (sync o async)"""
+    with _xhr_lock:
+        _xhr_counters["events"] += 1
+        _xhr_counters["markets_xhr"] += len(captured)
+        _xhr_counters["markets_dom_fallback"] += len(pending)
+        if not pending:
+            _xhr_counters["events_full_xhr"] += 1
+        elif not captured:
+            _xhr_counters["events_no_payload"] += 1
+
+
+def xhr_capture_stats() -> dict:
+    with _xhr_lock:
+        counters = dict(_xhr_counters)
+    total_markets = counters["markets_xhr"] + counters["markets_dom_fallback"]
+    return {
+        "enabled": SCRAPER_CONFIG["capture_odds_xhr"],
+        **counters,
+        "xhr_hit_rate": round(counters["markets_xhr"] / total_markets, 3) if total_markets else None,
+    }
+
+
+# ============================================================================
+# CIRCUIT BREAKERS
+# ============================================================================
+
+def allowed_markets(event_url: str, markets: list[str]) -> list[str]:
+    """
+    Mercados que los circuit breakers dejan intentar.
+    [] si el host del evento o todos los mercados están abiertos.
     
-    for row_el in row_elements:
-        try:
-            # Bookmaker
-            bookmaker_el = row_el.query_selector(".oddsCell__bookmakerCell a.prematchLink img")
-            if not bookmaker_el:
-                continue
-            bookmaker = bookmaker_el.get_attribute("alt").strip()
-            
-            # Línea de handicap (puede ser +/- X.5)
-            line_el = row_el.query_selector("div.wcl-oddsCell_qJ5md span.wcl-oddsValue_3e8Cq")
-            if not line_el:
-                continue
-            line_text = line_el.inner_text().strip()
-            # Extraer valor numérico (ej. "-5.5" -> -5.5)
-            line = float(line_text.replace(",", "."))
-            
-            # Cuotas para ambos equipos
-            odds_elements = row_el.query_selector_all("a.oddsCell__odd")
-            if len(odds_elements) < 2:
-                continue
-                
-            odds_home = float(odds_elements[0].inner_text().strip().replace(",", "."))
-            odds_away = float(odds_elements[1].inner_text().strip().replace(",", "."))
-            
-            captured_at = datetime.now(timezone.utc)
-            
-            rows.append({
-                "market": "SPREAD",
-                "line": line,
-                "bookmaker": bookmaker,
-                "selection": "HOME",
-                "odds": odds_home,
-                "captured_at_utc": captured_at,
-            })
-            rows.append({
-                "market": "SPREAD",
-                "line": line,
-                "bookmaker": bookmaker,
-                "selection": "AWAY",
-                "odds": odds_away,
-                "captured_at_utc": captured_at,
-            })
-            
-        except Exception as e:
-            print(f"⚠️ Error parseando fila SPREAD: {e}")
-            continue
+    El host se consulta primero: con el host abierto no se toca ningún
+    breaker de mercado (allow() puede conceder la prueba HALF_OPEN).
+    Quien reciba mercados debe llamar a release_probes al terminar.
+    """
+    host = flashscore_breakers.for_host(event_url)
+    if not markets or not host.allow():
+        return []
+    markets = [m for m in markets if flashscore_breakers.for_market(m).allow()]
+    if not markets:
+        host.release()
+    return markets
+
+
+def release_probes(event_url: str, markets: list[str]):
+    """
+    Devuelve las pruebas HALF_OPEN que allowed_markets concedió y que no
+    recibieron resultado (evento sin cuotas, scrape que no llegó a empezar...)
+    """
+    flashscore_breakers.for_host(event_url).release()
+    for market in markets:
+        flashscore_breakers.for_market(market).release()
+
+
+def record_scrape_outcome(event_url: str, succeeded: set, failed: set, page_loaded: Optional[bool] = True):
+    """
+    Informa a los breakers del resultado de un evento (sync o async).
     
-    return rows
+    El host solo responde de la navegación: page_loaded=False (goto fallido,
+    página bloqueada o con error HTTP) cuenta contra él, True a su favor y
+    None (no se llegó a navegar) no lo toca. Una tabla que no aparece cuenta
+    contra el breaker de su mercado; los mercados de un evento que aún no
+    tiene cuotas no van ni en succeeded ni en failed.
+    """
+    if page_loaded is not None:
+        host = flashscore_breakers.for_host(event_url)
+        if page_loaded:
+            host.record_success()
+        else:
+            host.record_failure()
+    
+    for market in succeeded:
+        flashscore_breakers.for_market(market).record_success()
+    for market in failed:
+        flashscore_breakers.for_market(market).record_failure()
+
+
+def _navigate(page, full_url: str):
+    """
+    page.goto con rate limit. Un fallo de carga (error de red, timeout de
+    navegación, HTTP >= 400) se relanza como NetworkError
+    """
+    yield RateLimit(full_url)
+    try:
+        response = yield PageCall(page, "goto", full_url, wait_until="domcontentloaded", timeout=30000)
+    except Exception as e:
+        raise NetworkError(f"goto {full_url}: {e}", {"url": full_url}) from e
+    if response is not None and response.status >= 400:
+        raise NetworkError(f"HTTP {response.status} en {full_url}", {"url": full_url, "status": response.status})
+
+
+def _goto_market(page, full_url: str):
+    """Navega a la pestaña de un mercado y espera la tabla de cuotas"""
+    yield from _navigate(page, full_url)
+    yield PageCall(page, "wait_for_selector", ROW_SELECTOR, timeout=15000)
+
+
+def _has_odds_tabs(page):
+    """False si la página del evento no tiene pestañas de cuotas (aún no hay cuotas)"""
+    try:
+        tab = yield PageCall(page, "query_selector", "a[href*='/odds/']")
+    except Exception:
+        return True
+    return tab is not None
+
+
+def _close_modals(page):
+    """Cierra modales si aparecen"""
+    try:
+        close_button = yield PageCall(page, "query_selector", "button.close, .modal-close, [aria-label='Close']")
+        if close_button:
+            yield PageCall(close_button, "click")
+            yield PageCall(page, "wait_for_timeout", 500)
+    except Exception:
+        pass
+
+
+def _switch_market_tab(page, path: str, full_url: str):
+    """
+    Cambia de mercado dentro de la página ya abierta.
+    
+    Marca las filas actuales como obsoletas antes del click para poder
+    esperar a que la tabla del nuevo mercado se renderice.
+    """
+    tab_path = path.split("/full-time")[0]  # "odds/over-under"
+    tab = yield PageCall(page, "query_selector", f"a[href*='/{tab_path}/']")
+    
+    if not tab:
+        yield from _goto_market(page, full_url)
+        return
+    
+    yield PageCall(
+        page, "evaluate",
+        "sel => document.querySelectorAll(sel).forEach(r => r.dataset.betdeskStale = '1')",
+        ROW_SELECTOR,
+    )
+    yield RateLimit(full_url)
+    yield PageCall(tab, "click")
+    
+    try:
+        yield PageCall(page, "wait_for_selector", LIVE_ROW_SELECTOR, timeout=10000)
+    except PlaywrightTimeout:
+        # La SPA no re-renderizó la tabla: navegación directa como respaldo
+        yield from _goto_market(page, full_url)
+
+
+# Extrae todas las filas de la tabla en un solo round trip al navegador.
+# Devuelve [{bookmaker, line, odds: [...]}] con los textos crudos de cada celda.
+EXTRACT_ROWS_JS = """
+(rowSelector) => {
+    const out = [];
+    for (const row of document.querySelectorAll(rowSelector)) {
+        const img = row.querySelector(".oddsCell__bookmakerCell a.prematchLink img");
+        if (!img) continue;
+        const lineEl = row.querySelector("div.wcl-oddsCell_qJ5md span.wcl-oddsValue_3e8Cq");
+        out.push({
+            bookmaker: img.getAttribute("alt") || "",
+            line: lineEl ? lineEl.innerText : null,
+            odds: Array.from(row.querySelectorAll("a.oddsCell__odd"), a => a.innerText),
+        });
+    }
+    return out;
+}
+"""
+
+def _record_odds_page(page, full_url: str, sport: str):
+    """Graba la pestaña ya parseada en el corpus de replay (BETDESK_REPLAY_RECORD_DIR)"""
+    if not recording_enabled():
+        return
+    try:
+        html = yield PageCall(page, "content")
+        record_page(html, full_url, sport, KIND_ODDS)
+    except Exception as e:
+        print(f"⚠️ No se pudo grabar {full_url}: {e}")
+
+
+def _parse_market(page, market: str):
+    """Parser de la tabla de cuotas de un mercado (una sola llamada a page.evaluate)"""
+    extracted = yield PageCall(page, "evaluate", EXTRACT_ROWS_JS, LIVE_ROW_SELECTOR)
+    return rows_from_extracted(extracted, market)
 
 
-def _parse_moneyline_market(page) -> list[dict]:
-    """Parser para mercado MONEYLINE (Ganador directo)"""
+def rows_from_extracted(extracted: list[dict], market: str) -> list[dict]:
+    """
+    Convierte las filas crudas de EXTRACT_ROWS_JS en filas de odds.
+    Una fila por bookmaker: línea opcional + una cuota por selección.
+    """
+    spec = MARKET_SPECS[market]
+    selections = spec["selections"]
+    captured_at = datetime.now(timezone.utc)
     rows = []
-    row_elements = page.query_selector_all("div.ui-table__row")
     
-    for row_el in row_elements:
+    for raw in extracted:
         try:
-            # Bookmaker
-            bookmaker_el = row_el.query_selector(".oddsCell__bookmakerCell a.prematchLink img")
-            if not bookmaker_el:
+            bookmaker = raw["bookmaker"].strip()
+            if not bookmaker:
                 continue
-            bookmaker = bookmaker_el.get_attribute("alt").strip()
             
-            # Cuotas para local y visitante (no hay línea en ML)
-            odds_elements = row_el.query_selector_all("a.oddsCell__odd")
-            if len(odds_elements) < 2:
+            # Línea (total o handicap, ej. "-5.5" -> -5.5)
+            line = None
+            if spec["has_line"]:
+                if raw["line"] is None:
+                    continue
+                line = float(raw["line"].strip().replace(",", "."))
+            
+            # Una cuota por selección, en orden de columnas
+            if len(raw["odds"]) < len(selections):
                 continue
-                
-            odds_home = float(odds_elements[0].inner_text().strip().replace(",", "."))
-            odds_away = float(odds_elements[1].inner_text().strip().replace(",", "."))
             
-            captured_at = datetime.now(timezone.utc)
+            odds_values = [
+                float(text.strip().replace(",", "."))
+                for text in raw["odds"][:len(selections)]
+            ]
             
-            rows.append({
-                "market": "MONEYLINE",
-                "line": None,  # No hay línea en moneyline
-                "bookmaker": bookmaker,
-                "selection": "HOME",
-                "odds": odds_home,
-                "captured_at_utc": captured_at,
-            })
-            rows.append({
-                "market": "MONEYLINE",
-                "line": None,
-                "bookmaker": bookmaker,
-                "selection": "AWAY",
-                "odds": odds_away,
-                "captured_at_utc": captured_at,
-            })
+            for selection, odds in zip(selections, odds_values):
+                rows.append({
+                    "market": market,
+                    "line": line,
+                    "bookmaker": bookmaker,
+                    "selection": selection,
+                    "odds": odds,
+                    "captured_at_utc": captured_at,
+                })
             
         except Exception as e:
-            print(f"⚠️ Error parseando fila MONEYLINE: {e}")
+            print(f"⚠️ Error parseando fila {market}: {e}")
             continue
     
     return rows
@@ -259,24 +616,17 @@ def fetch_event_page_html(url: str) -> str:
     Returns:
         HTML de la página como string
     """
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context(
-            viewport={'width': 1920, 'height': 1080},
-            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        )
-        page = context.new_page()
-        
+    with flashscore_browser_pool.page() as page:
         try:
+            flashscore_rate_limiter.acquire(url)
             page.goto(url, wait_until="domcontentloaded", timeout=30000)
-            time.sleep(2)  # Esperar a que cargue contenido dinámico
+            page.wait_for_timeout(2000)  # Esperar a que cargue contenido dinámico
             html = page.content()
+            record_page(html, url, _detect_sport_from_url(url), KIND_ODDS)
             return html
         except Exception as e:
             print(f"❌ Error obteniendo HTML: {e}")
             return ""
-        finally:
-            browser.close()
 
 
 # ============================================================================
@@ -349,25 +699,22 @@ def odds_for_event(url: str) -> List[Dict]:
             logger.warning(f"Could not detect sport from URL: {url}")
             return []
         
-        # Usar scraper existente para cada mercado
-        all_odds = []
-        
-        if sport == "basketball":
-            markets = ["TOTAL", "SPREAD", "MONEYLINE"]
-        elif sport == "football":
-            markets = ["TOTAL"]  # Agregar más según necesidad
-        elif sport == "tennis":
-            markets = ["MONEYLINE"]
-        else:
+        markets = SPORT_MARKETS.get(sport)
+        if not markets:
             return []
         
-        for market in markets:
-            try:
-                odds = scrape_flashscore_odds(url, market, sport)
-                all_odds.extend(odds)
-            except Exception as e:
-                logger.debug(f"Error scraping {market} for {url}: {e}")
-                continue
+        all_odds = []
+        if SCRAPER_CONFIG["odds_provider"] == "http":
+            from .provider_feed import flashscore_feed_client
+            all_odds = flashscore_feed_client.odds_for_event(url, sport, markets)
+            if not all_odds:
+                logger.info(f"Feed sin cuotas para {url}, usando Playwright")
+        
+        # Los mercados que el feed no trajo, en una sola sesión de página
+        from_feed = {row["market"] for row in all_odds}
+        missing = [m for m in markets if m not in from_feed]
+        if missing:
+            all_odds = all_odds + scrape_flashscore_markets(url, missing, sport)
         
         logger.info(f"✅ Extracted {len(all_odds)} odds from {url}")
         return all_odds
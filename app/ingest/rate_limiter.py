@@ -0,0 +1,159 @@
+# app/ingest/rate_limiter.py
+"""
+Rate limiting por host con token bucket
+Compartido por los hilos del scheduler y por el event loop del motor
+de ingesta: cada host tiene su propio ritmo y una ráfaga permitida
+"""
+
+import time
+import random
+import asyncio
+import logging
+import threading
+from typing import Dict, Any
+from urllib.parse import urlparse
+
+from .scraper_config import SCRAPER_CONFIG
+
+logger = logging.getLogger("betdesk.scraper")
+
+
+def host_of(url_or_host: str) -> str:
+    """Host de una URL ("https://www.flashscore.com/x" -> "www.flashscore.com")"""
+    if "://" in url_or_host:
+        return urlparse(url_or_host).hostname or "unknown"
+    return url_or_host
+
+
+class TokenBucket:
+    """
+    Token bucket con reservas: reserve() descuenta un token aunque no haya
+    y devuelve cuánto debe esperar el llamador. La espera se hace fuera
+    del lock, así varios hilos/tareas quedan escalonados en orden de llegada
+    sin bloquearse entre sí ni bloquear otros hosts.
+
+    Cuando hay que esperar se suma un extra aleatorio de 0..jitter segundos
+    para que las peticiones no salgan a intervalos exactos. El extra solo
+    alarga la espera del llamador, nunca adelanta turnos.
+    """
+
+    def __init__(self, rate: float, capacity: float, jitter: float = 0.0):
+        self.rate = rate          # tokens por segundo
+        self.capacity = capacity  # ráfaga máxima
+        self.jitter = jitter      # segundos aleatorios extra por espera
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            wait = -self._tokens / self.rate
+        if self.jitter > 0:
+            wait += random.uniform(0, self.jitter)
+        return wait
+
+
+class HostRateLimiter:
+    """
+    Un TokenBucket por host.
+
+    Ritmo por defecto: 1 / delay_between_requests requests por segundo con
+    ráfaga rate_limit_burst y hasta delay_variance segundos aleatorios extra
+    en cada espera; rate_limit_hosts permite ajustar hosts concretos
+    (ej. el host de los feeds, que aguanta más que las páginas).
+
+    Uso:
+        flashscore_rate_limiter.acquire(url)              # hilos
+        await flashscore_rate_limiter.acquire_async(url)  # event loop
+    """
+
+    def __init__(self, rate: float = None, burst: float = None, jitter: float = None,
+                 host_overrides: Dict[str, Dict] = None):
+        cfg = SCRAPER_CONFIG
+        self.rate = rate or 1.0 / cfg["delay_between_requests"]
+        self.burst = burst or cfg["rate_limit_burst"]
+        self.jitter = jitter if jitter is not None else cfg["delay_variance"]
+        self.host_overrides = host_overrides if host_overrides is not None else cfg["rate_limit_hosts"]
+
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._metrics: Dict[str, Dict[str, float]] = {}
+
+    def bucket(self, host: str) -> TokenBucket:
+        with self._lock:
+            if host not in self._buckets:
+                override = self.host_overrides.get(host, {})
+                self._buckets[host] = TokenBucket(
+                    rate=override.get("rate", self.rate),
+                    capacity=override.get("burst", self.burst),
+                    jitter=override.get("jitter", self.jitter),
+                )
+            return self._buckets[host]
+
+    def acquire(self, url_or_host: str) -> float:
+        """Espera (time.sleep) hasta tener turno para el host. Devuelve segundos esperados"""
+        host = host_of(url_or_host)
+        wait = self.bucket(host).reserve()
+        self._record(host, wait)
+        if wait > 0:
+            logger.debug(f"⏱️  Rate limiting {host}: sleeping {wait:.2f}s")
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, url_or_host: str) -> float:
+        """Versión async de acquire (asyncio.sleep, no bloquea el loop)"""
+        host = host_of(url_or_host)
+        wait = self.bucket(host).reserve()
+        self._record(host, wait)
+        if wait > 0:
+            logger.debug(f"⏱️  Rate limiting {host}: sleeping {wait:.2f}s")
+            await asyncio.sleep(wait)
+        return wait
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+            self._metrics.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hosts = {}
+            for host, m in self._metrics.items():
+                bucket = self._buckets.get(host)
+                if bucket is None:
+                    continue
+                hosts[host] = {
+                    "rate_per_s": round(bucket.rate, 3),
+                    "burst": bucket.capacity,
+                    "acquired": int(m["acquired"]),
+                    "waited": int(m["waited"]),
+                    "wait_seconds": round(m["wait_seconds"], 2),
+                    "avg_wait": round(m["wait_seconds"] / m["acquired"], 3) if m["acquired"] else 0.0,
+                    "max_wait": round(m["max_wait"], 2),
+                }
+        return {"hosts": hosts}
+
+    def _record(self, host: str, wait: float):
+        with self._lock:
+            # setdefault: reset() puede vaciar las métricas entre bucket() y _record()
+            m = self._metrics.setdefault(
+                host, {"acquired": 0, "waited": 0, "wait_seconds": 0.0, "max_wait": 0.0}
+            )
+            m["acquired"] += 1
+            if wait > 0:
+                m["waited"] += 1
+                m["wait_seconds"] += wait
+                m["max_wait"] = max(m["max_wait"], wait)
+
+
+# ============================================================================
+# INSTANCIA GLOBAL
+# ============================================================================
+
+flashscore_rate_limiter = HostRateLimiter()
@@ -0,0 +1,129 @@
+# app/ingest/replay_corpus.py
+"""
+Corpus de páginas grabadas para reproducir offline
+Cada página se guarda comprimida con zstd (<sha>.html.zst) junto a sus
+metadatos (<sha>.json): URL, deporte, tipo de página y fecha de captura
+
+Grabar páginas reales mientras corre el scraper:
+    BETDESK_REPLAY_RECORD_DIR=debug/replay python -m uvicorn app.main:app
+
+Reproducirlas: ver replay_benchmark.py
+"""
+
+import os
+import json
+import glob
+import hashlib
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple, Any
+
+logger = logging.getLogger("betdesk.scraper")
+
+# Tipos de página
+KIND_FIXTURES = "fixtures"  # listados de partidos -> event_discovery
+KIND_ODDS = "odds"          # página de evento -> odds_parser
+
+ZSTD_LEVEL = 10
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError("El corpus de replay necesita el paquete zstandard (pip install zstandard)")
+    return zstandard
+
+
+def guess_kind(html: str) -> str:
+    return KIND_FIXTURES if "event__match" in html else KIND_ODDS
+
+
+def guess_sport(name: str) -> Optional[str]:
+    name = name.lower()
+    if "basket" in name or "nba" in name:
+        return "basketball"
+    if "football" in name or "futbol" in name or "soccer" in name:
+        return "football"
+    if "tennis" in name:
+        return "tennis"
+    return None
+
+
+class ReplayCorpus:
+    """Directorio con páginas HTML comprimidas y sus metadatos"""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def store(self, html: str, url: str, sport: str = None, kind: str = None, **meta) -> str:
+        """Guarda una página (idempotente por contenido). Devuelve su sha"""
+        data = html.encode("utf-8")
+        sha = hashlib.sha1(data).hexdigest()[:16]
+        os.makedirs(self.root, exist_ok=True)
+
+        html_path = os.path.join(self.root, f"{sha}.html.zst")
+        if not os.path.exists(html_path):
+            compressed = _zstd().ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+            with open(html_path, "wb") as f:
+                f.write(compressed)
+
+        metadata = {
+            "sha": sha,
+            "url": url,
+            "sport": sport or guess_sport(url),
+            "kind": kind or guess_kind(html),
+            "captured_at_utc": datetime.now(timezone.utc).isoformat(),
+            "bytes": len(data),
+            **meta,
+        }
+        with open(os.path.join(self.root, f"{sha}.json"), "w", encoding="utf-8") as f:
+            json.dump(metadata, f, indent=2)
+        return sha
+
+    def entries(self) -> List[Dict[str, Any]]:
+        entries = []
+        for path in sorted(glob.glob(os.path.join(self.root, "*.json"))):
+            with open(path, encoding="utf-8") as f:
+                meta = json.load(f)
+            if "sha" in meta:
+                entries.append(meta)
+        return entries
+
+    def load(self, sha: str) -> str:
+        with open(os.path.join(self.root, f"{sha}.html.zst"), "rb") as f:
+            return _zstd().ZstdDecompressor().decompress(f.read()).decode("utf-8")
+
+    def pages(self) -> Iterator[Tuple[Dict[str, Any], str]]:
+        """(metadatos, html) de cada página del corpus"""
+        for meta in self.entries():
+            yield meta, self.load(meta["sha"])
+
+    def import_files(self, paths: List[str]) -> int:
+        """Importa HTML sueltos (ej. debug/*.html) deduciendo deporte y tipo"""
+        imported = 0
+        for path in paths:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                html = f.read()
+            self.store(html, url=f"file://{os.path.basename(path)}", sport=guess_sport(path), source=path)
+            imported += 1
+        return imported
+
+
+def recording_enabled() -> bool:
+    """True si BETDESK_REPLAY_RECORD_DIR está definido (evita pedir el HTML si no se graba)"""
+    return bool(os.environ.get("BETDESK_REPLAY_RECORD_DIR"))
+
+
+def record_page(html: str, url: str, sport: str = None, kind: str = None):
+    """
+    Graba una página en BETDESK_REPLAY_RECORD_DIR si está definido.
+    Nunca interrumpe el scraping: los errores solo se registran.
+    """
+    root = os.environ.get("BETDESK_REPLAY_RECORD_DIR")
+    if not root or not html:
+        return
+    try:
+        ReplayCorpus(root).store(html, url=url, sport=sport, kind=kind)
+    except Exception as e:
+        logger.debug(f"No se pudo grabar la página {url}: {e}")
@@ -0,0 +1,266 @@
+# app/ingest/route_blocking.py
+"""
+Bloqueo de recursos pesados en las páginas de Playwright
+Solo leemos texto del DOM y el atributo alt de los logos de bookmakers,
+así que imágenes, fuentes, anuncios y trackers sobran. Las hojas de estilo
+se cargan: innerText depende del layout CSS
+"""
+
+import logging
+import threading
+from typing import Dict, Any, Optional, Iterable
+from urllib.parse import urlparse
+
+from .scraper_config import SCRAPER_CONFIG
+
+logger = logging.getLogger("betdesk.scraper")
+
+# Tamaño típico por tipo de recurso (bytes). Se usa para estimar el ahorro
+# hasta que las páginas de referencia (sin bloqueo) midan valores reales.
+DEFAULT_RESOURCE_BYTES = {
+    "image": 25_000,
+    "media": 250_000,
+    "font": 40_000,
+    "stylesheet": 30_000,
+    "script": 60_000,
+    "xhr": 5_000,
+    "fetch": 5_000,
+    "other": 5_000,
+}
+
+# Tiempo de carga hasta DOMContentLoaded según Navigation Timing
+LOAD_TIME_JS = """
+() => {
+    const nav = performance.getEntriesByType("navigation")[0];
+    return nav ? nav.domContentLoadedEventEnd : null;
+}
+"""
+
+
+def _host_matches(host: str, domains: Iterable[str]) -> bool:
+    """True si host es alguno de los dominios o un subdominio suyo"""
+    return any(host == d or host.endswith("." + d) for d in domains)
+
+
+class PageTraffic:
+    """Tráfico de una página prestada por el pool (un scrape)"""
+
+    def __init__(self, baseline: bool):
+        self.baseline = baseline
+        self.blocked: Dict[str, int] = {}
+        self.bytes_loaded: Dict[str, int] = {}
+        self.requests_loaded: Dict[str, int] = {}
+
+    def on_response(self, response):
+        try:
+            resource_type = response.request.resource_type
+            size = int(response.headers.get("content-length", 0))
+        except Exception:
+            return
+        self.bytes_loaded[resource_type] = self.bytes_loaded.get(resource_type, 0) + size
+        self.requests_loaded[resource_type] = self.requests_loaded.get(resource_type, 0) + 1
+
+
+class ResourceBlocker:
+    """
+    Capa de bloqueo de requests compartida por todos los scrapers.
+
+    Reglas (en orden):
+    1. Dominio en allowed_domains -> no se bloquea por dominio
+    2. Dominio en blocked_domains -> bloqueado
+    3. Tipo en allowed_resource_types -> permitido
+    4. Tipo en blocked_resource_types -> bloqueado
+
+    Cada `baseline_every` páginas una se carga sin bloqueo para medir el
+    tiempo de carga y los bytes reales por tipo de recurso; con eso se
+    reporta el ahorro estimado por scrape.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = None,
+        blocked_resource_types: Iterable[str] = None,
+        allowed_resource_types: Iterable[str] = None,
+        blocked_domains: Iterable[str] = None,
+        allowed_domains: Iterable[str] = None,
+        baseline_every: int = None,
+    ):
+        cfg = SCRAPER_CONFIG
+        self.enabled = cfg["block_resources"] if enabled is None else enabled
+        self.blocked_resource_types = set(blocked_resource_types or cfg["blocked_resource_types"])
+        self.allowed_resource_types = set(allowed_resource_types or cfg["allowed_resource_types"])
+        self.blocked_domains = list(blocked_domains or cfg["blocked_domains"])
+        self.allowed_domains = list(allowed_domains or cfg["allowed_domains"])
+        self.baseline_every = cfg["block_baseline_every"] if baseline_every is None else baseline_every
+
+        self._lock = threading.Lock()
+        self._pages = 0
+        self._counters = {
+            "pages_blocked": 0,
+            "pages_baseline": 0,
+            "requests_blocked": 0,
+            "bytes_saved_estimate": 0,
+            "load_ms_blocked_total": 0.0,
+            "load_ms_baseline_total": 0.0,
+        }
+        self._blocked_by_type: Dict[str, int] = {}
+        # Bytes medidos en páginas de referencia: tipo -> [bytes, requests]
+        self._baseline_bytes: Dict[str, list] = {}
+
+    # ------------------------------------------------------------------
+    # Reglas
+    # ------------------------------------------------------------------
+
+    def should_block(self, resource_type: str, url: str) -> bool:
+        host = urlparse(url).hostname or ""
+
+        if not _host_matches(host, self.allowed_domains):
+            if _host_matches(host, self.blocked_domains):
+                return True
+
+        if resource_type in self.allowed_resource_types:
+            return False
+        return resource_type in self.blocked_resource_types
+
+    # ------------------------------------------------------------------
+    # Instalación en páginas (sync / async)
+    # ------------------------------------------------------------------
+
+    def install(self, page) -> Optional[PageTraffic]:
+        """Instala el bloqueo en una página de la API sync"""
+        if not self.enabled:
+            return None
+
+        traffic = self._new_traffic()
+        page.on("response", traffic.on_response)
+
+        if not traffic.baseline:
+            def handle(route):
+                request = route.request
+                if self.should_block(request.resource_type, request.url):
+                    self._record_block(traffic, request.resource_type)
+                    route.abort()
+                else:
+                    route.continue_()
+
+            page.route("**/*", handle)
+        return traffic
+
+    async def install_async(self, page) -> Optional[PageTraffic]:
+        """Instala el bloqueo en una página de playwright.async_api"""
+        if not self.enabled:
+            return None
+
+        traffic = self._new_traffic()
+        page.on("response", traffic.on_response)
+
+        if not traffic.baseline:
+            async def handle(route):
+                request = route.request
+                if self.should_block(request.resource_type, request.url):
+                    self._record_block(traffic, request.resource_type)
+                    await route.abort()
+                else:
+                    await route.continue_()
+
+            await page.route("**/*", handle)
+        return traffic
+
+    def finish(self, page, traffic: Optional[PageTraffic]):
+        """Cierra la medición de la página (antes de page.close())"""
+        if traffic is None:
+            return
+        try:
+            load_ms = page.evaluate(LOAD_TIME_JS)
+        except Exception:
+            load_ms = None
+        self._record_page(traffic, load_ms)
+
+    async def finish_async(self, page, traffic: Optional[PageTraffic]):
+        if traffic is None:
+            return
+        try:
+            load_ms = await page.evaluate(LOAD_TIME_JS)
+        except Exception:
+            load_ms = None
+        self._record_page(traffic, load_ms)
+
+    # ------------------------------------------------------------------
+    # Métricas
+    # ------------------------------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            c = dict(self._counters)
+            blocked_by_type = dict(self._blocked_by_type)
+
+        avg_blocked = c["load_ms_blocked_total"] / c["pages_blocked"] if c["pages_blocked"] else None
+        avg_baseline = c["load_ms_baseline_total"] / c["pages_baseline"] if c["pages_baseline"] else None
+
+        return {
+            "enabled": self.enabled,
+            "pages_blocked": c["pages_blocked"],
+            "pages_baseline": c["pages_baseline"],
+            "requests_blocked": c["requests_blocked"],
+            "blocked_by_type": blocked_by_type,
+            "bytes_saved_estimate": c["bytes_saved_estimate"],
+            "bytes_saved_per_scrape": (
+                round(c["bytes_saved_estimate"] / c["pages_blocked"]) if c["pages_blocked"] else 0
+            ),
+            "avg_load_ms_blocked": round(avg_blocked, 1) if avg_blocked is not None else None,
+            "avg_load_ms_baseline": round(avg_baseline, 1) if avg_baseline is not None else None,
+            "load_ms_saved_per_scrape": (
+                round(avg_baseline - avg_blocked, 1)
+                if avg_blocked is not None and avg_baseline is not None else None
+            ),
+        }
+
+    def _new_traffic(self) -> PageTraffic:
+        with self._lock:
+            self._pages += 1
+            baseline = bool(self.baseline_every) and self._pages % self.baseline_every == 0
+        return PageTraffic(baseline)
+
+    def _record_block(self, traffic: PageTraffic, resource_type: str):
+        traffic.blocked[resource_type] = traffic.blocked.get(resource_type, 0) + 1
+
+    def _avg_bytes(self, resource_type: str) -> int:
+        measured = self._baseline_bytes.get(resource_type)
+        if measured and measured[1]:
+            return int(measured[0] / measured[1])
+        return DEFAULT_RESOURCE_BYTES.get(resource_type, DEFAULT_RESOURCE_BYTES["other"])
+
+    def _record_page(self, traffic: PageTraffic, load_ms: Optional[float]):
+        with self._lock:
+            if traffic.baseline:
+                self._counters["pages_baseline"] += 1
+                if load_ms:
+                    self._counters["load_ms_baseline_total"] += load_ms
+                for rtype, size in traffic.bytes_loaded.items():
+                    acc = self._baseline_bytes.setdefault(rtype, [0, 0])
+                    acc[0] += size
+                    acc[1] += traffic.requests_loaded.get(rtype, 0)
+                return
+
+            saved = sum(n * self._avg_bytes(rtype) for rtype, n in traffic.blocked.items())
+            blocked = sum(traffic.blocked.values())
+
+            self._counters["pages_blocked"] += 1
+            self._counters["requests_blocked"] += blocked
+            self._counters["bytes_saved_estimate"] += saved
+            if load_ms:
+                self._counters["load_ms_blocked_total"] += load_ms
+            for rtype, n in traffic.blocked.items():
+                self._blocked_by_type[rtype] = self._blocked_by_type.get(rtype, 0) + n
+
+        load_txt = f"{load_ms:.0f}ms" if load_ms else "n/d"
+        logger.debug(
+            f"🧹 Bloqueados {blocked} recursos (~{saved / 1024:.0f}KB ahorrados), carga {load_txt}"
+        )
+
+
+# ============================================================================
+# INSTANCIA GLOBAL
+# ============================================================================
+
+flashscore_resource_blocker = ResourceBlocker()
@@ -0,0 +1,189 @@
+# app/ingest/scrape_queue.py
+"""
+Cola de scraping en Postgres (tabla scrape_tasks, sql/scrape_queue.sql)
+
+Productores: los jobs job_ingest_* encolan una tarea por (evento, mercado)
+Workers: uno o varios procesos, en la misma máquina o en otras, reclaman
+tareas con FOR UPDATE SKIP LOCKED y las scrapean con el motor async
+
+    BETDESK_SCRAPE_QUEUE=1 python -m uvicorn app.main:app     # productor
+    python -m app.ingest.scrape_queue --batch 10               # worker(s)
+
+Cada tarea reclamada lleva un lease: si el worker muere, otro la retoma
+cuando vence. Los fallos se reintentan con backoff hasta max_attempts.
+"""
+
+import os
+import sys
+import signal
+import socket
+import logging
+import argparse
+import threading
+from collections import defaultdict
+from typing import Dict, List, Tuple, Any
+
+from .scraper_config import SCRAPER_CONFIG
+from .provider_flashscore import SPORT_MARKETS
+
+logger = logging.getLogger("betdesk.scraper")
+
+
+# ============================================================================
+# PRODUCTOR
+# ============================================================================
+
+def enqueue_events(events: List[Dict]) -> int:
+    """
+    Encola (evento, mercado) para los mercados de SPORT_MARKETS de cada evento
+    y purga las tareas terminadas más viejas que la retención.
+
+    Returns:
+        Tareas nuevas (las que ya estaban pendientes no se duplican)
+    """
+    from ..crud import enqueue_scrape_tasks, purge_scrape_tasks
+
+    created = enqueue_scrape_tasks(events, SPORT_MARKETS, SCRAPER_CONFIG["scrape_queue_max_attempts"])
+    purged = purge_scrape_tasks(SCRAPER_CONFIG["scrape_queue_retention_hours"])
+    if purged:
+        logger.debug(f"🧹 {purged} tareas de scraping antiguas purgadas")
+    return created
+
+
+# ============================================================================
+# WORKER
+# ============================================================================
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class ScrapeWorker:
+    """
+    Reclama lotes de tareas, agrupa los mercados de un mismo evento en una
+    sola sesión de página y los scrapea con ingest_engine.
+    """
+
+    def __init__(self, worker_id: str = None, batch: int = None, lease_seconds: int = None, poll_seconds: float = None):
+        cfg = SCRAPER_CONFIG
+        self.worker_id = worker_id or default_worker_id()
+        self.batch = batch or cfg["scrape_queue_batch"]
+        self.lease_seconds = lease_seconds or cfg["scrape_queue_lease"]
+        self.poll_seconds = poll_seconds or cfg["scrape_queue_poll"]
+        self.retry_delay = cfg["scrape_queue_retry_delay"]
+        self.counters = {"claimed": 0, "done": 0, "failed": 0, "batches": 0}
+
+    def run_once(self) -> int:
+        """
+        Reclama y procesa un lote
+
+        Returns:
+            Tareas reclamadas (0 = cola vacía)
+        """
+        from ..crud import claim_scrape_tasks, complete_scrape_tasks, fail_scrape_tasks
+        from .async_engine import ingest_engine
+
+        tasks = claim_scrape_tasks(self.worker_id, self.batch, self.lease_seconds)
+        if not tasks:
+            return 0
+        self.counters["claimed"] += len(tasks)
+        self.counters["batches"] += 1
+
+        # Un evento por URL con todos sus mercados reclamados
+        events: Dict[str, Dict[str, Any]] = {}
+        task_ids: Dict[Tuple[str, str], int] = {}
+        for task in tasks:
+            url = task["flashscore_url"]
+            if url not in events:
+                events[url] = {
+                    key: task[key]
+                    for key in ("sport", "league", "start_time_utc", "home", "away", "flashscore_url")
+                }
+                events[url]["markets"] = []
+            events[url]["markets"].append(task["market"])
+            task_ids[(url, task["market"])] = task["id"]
+
+        by_sport: Dict[str, List[Dict]] = defaultdict(list)
+        for event in events.values():
+            by_sport[event["sport"]].append(event)
+
+        for sport, sport_events in by_sport.items():
+            try:
+                summary = ingest_engine.ingest_events(sport, sport_events)
+                errors, market_errors = summary["errors"], summary["market_errors"]
+            except Exception as e:
+                errors = {event["flashscore_url"]: str(e) for event in sport_events}
+                market_errors = {}
+
+            # Cada tarea (evento, mercado) recibe su propio resultado: un evento
+            # que falla entero falla todos sus mercados, si no solo los suyos
+            done: List[int] = []
+            failed: Dict[str, List[int]] = defaultdict(list)  # error -> tareas
+            for event in sport_events:
+                url = event["flashscore_url"]
+                for market in event["markets"]:
+                    error = errors.get(url) or market_errors.get(url, {}).get(market)
+                    if error is None:
+                        done.append(task_ids[(url, market)])
+                    else:
+                        failed[error].append(task_ids[(url, market)])
+
+            closed = complete_scrape_tasks(self.worker_id, done)
+            self.counters["done"] += closed
+            for error, ids in failed.items():
+                n = fail_scrape_tasks(self.worker_id, ids, error, self.retry_delay)
+                self.counters["failed"] += n
+                closed += n
+
+            lost = len(done) + sum(len(ids) for ids in failed.values()) - closed
+            if lost:
+                logger.warning(f"⚠️ Worker {self.worker_id}: {lost} tareas con el lease perdido, no se actualizan")
+
+        logger.info(
+            f"🛠️ Worker {self.worker_id}: {len(tasks)} tareas de {len(events)} eventos "
+            f"(done={self.counters['done']} failed={self.counters['failed']})"
+        )
+        return len(tasks)
+
+    def run(self, stop: threading.Event = None):
+        """Procesa lotes hasta que `stop` se active; espera poll_seconds con la cola vacía"""
+        stop = stop or threading.Event()
+        logger.info(f"🛠️ Worker {self.worker_id} escuchando la cola (lote={self.batch}, lease={self.lease_seconds}s)")
+        while not stop.is_set():
+            try:
+                claimed = self.run_once()
+            except Exception:
+                logger.exception(f"❌ Worker {self.worker_id}: error procesando lote")
+                claimed = 0
+            if not claimed:
+                stop.wait(self.poll_seconds)
+        logger.info(f"🛑 Worker {self.worker_id} detenido")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker de la cola de scraping")
+    parser.add_argument("--worker-id", default=None, help="identificador (default: host-pid)")
+    parser.add_argument("--batch", type=int, default=None, help="tareas reclamadas por lote")
+    parser.add_argument("--lease", type=int, default=None, help="segundos de lease por tarea")
+    parser.add_argument("--poll", type=float, default=None, help="segundos de espera con la cola vacía")
+    parser.add_argument("--once", action="store_true", help="procesar un solo lote y salir")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    worker = ScrapeWorker(args.worker_id, args.batch, args.lease, args.poll)
+
+    if args.once:
+        print(f"🛠️ {worker.run_once()} tareas procesadas")
+        return 0
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    try:
+        worker.run(stop)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,11 +4,16 @@ Configuración del scraper para Flashscore
 Incluye rate limiting, user agents y manejo de errores
 """
 
+import os
 import time
 import random
 import logging
+import threading
 from typing import Dict, Callable, Any
 from functools import wraps
+from urllib.parse import urlparse
+
+from .scraper_errors import CircuitOpenError
 
 logger = logging.getLogger("betdesk.scraper")
 
@@ -19,7 +24,7 @@ logger = logging.getLogger("betdesk.scraper")
 SCRAPER_CONFIG = {
     # Rate limiting
     "delay_between_requests": 2.0,  # segundos entre requests
-    "delay_variance": 1.0,  # variación aleatoria (+/- segundos)
+    "delay_variance": 1.0,  # espera aleatoria extra (0..n segundos) cuando el rate limiter hace esperar
     
     # Timeouts
     "timeout": 30,  # segundos
@@ -33,6 +38,136 @@ SCRAPER_CONFIG = {
     # Headers
     "rotate_user_agents": True,
     "use_random_headers": True,
+
+    # Navegador (Playwright)
+    "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+    "browser_max_pages": 50,  # páginas servidas antes de reciclar el navegador
+    "browser_max_memory_mb": 1024,  # límite de memoria del navegador (requiere psutil)
+    "browser_memory_check_every": 10,  # medir memoria cada N páginas
+    "browser_idle_timeout": 1800,  # segundos sin uso antes de relanzar
+
+    # Ingesta concurrente (motor async)
+    "concurrency_per_sport": {  # eventos scrapeados a la vez por deporte
+        "basketball": 4,
+        "football": 6,
+        "tennis": 4,
+    },
+    "concurrency_per_host": 6,  # páginas abiertas a la vez contra un mismo host
+    "event_timeout": 120,  # segundos máximos de scraping por evento
+
+    # Bloqueo de recursos en Playwright (ver route_blocking.py)
+    "block_resources": True,
+    # Sin "stylesheet": innerText depende del layout CSS (display:none, saltos de línea)
+    "blocked_resource_types": ["image", "media", "font"],
+    "allowed_resource_types": [],  # tipos que nunca se bloquean
+    "blocked_domains": [  # anuncios y trackers
+        "doubleclick.net",
+        "googlesyndication.com",
+        "googletagmanager.com",
+        "google-analytics.com",
+        "adservice.google.com",
+        "amazon-adsystem.com",
+        "facebook.net",
+        "scorecardresearch.com",
+        "criteo.com",
+        "taboola.com",
+        "outbrain.com",
+        "hotjar.com",
+        "onetrust.com",
+        "cookielaw.org",
+    ],
+    "allowed_domains": [],  # dominios que nunca se bloquean por dominio
+    "block_baseline_every": 25,  # 1 de cada N páginas sin bloqueo para medir el ahorro (0 = nunca)
+
+    # Proveedor de cuotas: "playwright" (DOM) o "http" (feeds, con Playwright como respaldo)
+    "odds_provider": os.environ.get("BETDESK_ODDS_PROVIDER", "playwright"),
+    "feed_base_url": os.environ.get("FLASHSCORE_FEED_URL", "https://global.ds.lsapp.eu"),
+    "feed_odds_params": {  # parámetros fijos de /odds/pq_graphql
+        "_hash": "oce",
+        "projectId": "2",
+        "geoIpCode": "US",
+    },
+    "feed_max_connections": 20,
+
+    # Con Playwright: leer las cuotas del XHR /odds/pq_graphql que recibe la página
+    # en lugar de la tabla renderizada (DOM como respaldo si no llega)
+    "capture_odds_xhr": True,
+    "odds_xhr_timeout": 10000,  # ms esperando el payload tras la navegación
+
+    # Digest por (evento, mercado): no reinsertar cuotas sin cambios
+    "odds_digest_enabled": True,
+    # Segundos máximos sin reinsertar un mercado sin cambios. Debe ser menor que
+    # (ventana del snapshot - intervalo de ingesta) para que los jobs de alertas
+    # sigan viendo el mercado: basketball 60-10 min, football 30-15, tennis 30-20
+    "odds_digest_max_age": {
+        "basketball": 2700,
+        "football": 840,
+        "tennis": 540,
+    },
+    "odds_digest_max_entries": 20000,
+
+    # Modo delta: insertar en `odds` solo los cambios de precio; el resto recibe
+    # un heartbeat en valid_until_utc (requiere sql/odds_schema.sql actualizado)
+    "odds_delta_enabled": os.environ.get("BETDESK_ODDS_DELTA", "1") == "1",
+    # Filas de cuotas acumuladas (de varios eventos) antes de escribirlas en una
+    # transacción; el último lote de cada ingesta se escribe al terminar
+    "odds_write_batch_rows": 2000,
+
+    # Vigilancia en vivo (live_watcher.py): pestañas abiertas con MutationObserver
+    # para los eventos que empiezan antes, rotadas en cada job_live_watch.
+    # Opt-in con BETDESK_LIVE_WATCH=1
+    "live_watch_enabled": os.environ.get("BETDESK_LIVE_WATCH", "0") == "1",
+    "live_watch_max_pages": 8,  # páginas vigiladas a la vez (una por evento y mercado)
+    "live_watch_window_minutes": 120,  # solo eventos que empiezan dentro de esta ventana
+    "live_watch_rotate_every": 60,  # segundos entre rotaciones
+    "live_watch_debounce_ms": 250,  # agrupa mutaciones antes de enviar cambios
+    # Una página vigilada retiene su navegador: se reabre al retirarse este
+    # (reciclado por páginas/memoria) y como mucho tras live_watch_max_page_age segundos
+    "live_watch_max_page_age": 1800,
+    "live_watch_markets": {
+        "basketball": ["TOTAL", "SPREAD"],
+        "football": ["1X2", "TOTAL"],
+        "tennis": ["MONEYLINE"],
+    },
+
+    # Cola de scraping en Postgres (scrape_queue.py): con BETDESK_SCRAPE_QUEUE=1 los
+    # jobs de ingesta solo encolan y los workers (python -m app.ingest.scrape_queue) scrapean
+    "scrape_queue_enabled": os.environ.get("BETDESK_SCRAPE_QUEUE", "0") == "1",
+    "scrape_queue_batch": 10,  # tareas reclamadas por lote
+    "scrape_queue_lease": 600,  # segundos; mayor que lo que tarda un lote (event_timeout)
+    "scrape_queue_poll": 5,  # segundos de espera con la cola vacía
+    "scrape_queue_max_attempts": 3,
+    "scrape_queue_retry_delay": 60,  # segundos, se duplica en cada reintento
+    "scrape_queue_retention_hours": 24,  # tareas done/failed que se conservan
+
+    # Cache de fixtures: segundos antes de volver a cargar la página de una liga
+    "fixture_ttl_default": 3600,
+    "fixture_ttl": {
+        "NBA": 3600,
+        "CBA": 3600,
+        "Premier League": 7200,
+        "La Liga": 7200,
+        "Champions League": 7200,
+        "ATP": 900,  # la portada de tenis cambia durante el día
+    },
+
+    # Token bucket por host (ritmo base: 1 / delay_between_requests por segundo)
+    "rate_limit_burst": 3,  # requests seguidos permitidos antes de esperar
+    "rate_limit_hosts": {  # ajustes por host: {"rate": req/s, "burst": n, "jitter": s}
+        "global.ds.lsapp.eu": {"rate": 5.0, "burst": 10, "jitter": 0.0},
+    },
+
+    # Circuit breakers: fallos seguidos para abrir y segundos hasta la prueba HALF_OPEN
+    "breaker_host_failures": 5,
+    "breaker_host_recovery": 300,
+    "breaker_market_failures": 3,
+    "breaker_market_recovery": 600,
+
+    # Backend de odds_parser: "lxml" (XPath precompilado) o "bs4" (BeautifulSoup)
+    "html_parser_backend": os.environ.get("BETDESK_HTML_PARSER", "lxml"),
+    # event_discovery: lxml localiza las filas event__match y solo esas pasan a BeautifulSoup
+    # (más rápido en todas las páginas medidas, ver benchmark_discovery_parse.py)
+    "discovery_partial_parse": True,
 }
 
 # ============================================================================
@@ -106,37 +241,22 @@ def get_random_user_agent() -> str:
 # RATE LIMITING
 # ============================================================================
 
-_last_request_time = 0.0
-
-def apply_rate_limit():
-    """
-    Aplica rate limiting entre requests
-    Espera el tiempo configurado desde el último request
+def apply_rate_limit(url: str = "www.flashscore.com") -> float:
     """
-    global _last_request_time
-    
-    current_time = time.time()
-    time_since_last = current_time - _last_request_time
-    
-    delay = SCRAPER_CONFIG["delay_between_requests"]
-    variance = SCRAPER_CONFIG["delay_variance"]
-    
-    # Agregar variación aleatoria
-    actual_delay = delay + random.uniform(-variance, variance)
-    actual_delay = max(0.5, actual_delay)  # Mínimo 0.5 segundos
-    
-    if time_since_last < actual_delay:
-        sleep_time = actual_delay - time_since_last
-        logger.debug(f"⏱️  Rate limiting: sleeping {sleep_time:.2f}s")
-        time.sleep(sleep_time)
+    Aplica rate limiting antes de un request al host de `url`
+    Delegado en el token bucket por host de rate_limiter (seguro entre hilos)
     
-    _last_request_time = time.time()
+    Returns:
+        Segundos esperados
+    """
+    from .rate_limiter import flashscore_rate_limiter
+    return flashscore_rate_limiter.acquire(url)
 
 
 def reset_rate_limit():
-    """Resetea el contador de rate limiting"""
-    global _last_request_time
-    _last_request_time = 0.0
+    """Resetea los buckets de rate limiting"""
+    from .rate_limiter import flashscore_rate_limiter
+    flashscore_rate_limiter.reset()
 
 
 # ============================================================================
@@ -206,15 +326,26 @@ class CircuitBreaker:
     Estados:
     - CLOSED: Funcionando normalmente
     - OPEN: Demasiados errores, bloqueando requests
-    - HALF_OPEN: Probando si el servicio se recuperó
+    - HALF_OPEN: Probando si el servicio se recuperó (una sola prueba a la vez)
+    
+    Seguro entre hilos: los jobs del scheduler y el motor de ingesta
+    comparten las mismas instancias.
+    
+    Dos formas de uso:
+        breaker.call(func, *args)            # envuelve una función
+        
+        if breaker.allow():                  # caminos que no son una sola función
+            ... breaker.record_success() / breaker.record_failure()
     """
     
     def __init__(
         self,
         failure_threshold: int = 5,
         recovery_timeout: float = 60.0,
-        expected_exception: type = Exception
+        expected_exception: type = Exception,
+        name: str = "flashscore"
     ):
+        self.name = name
         self.failure_threshold = failure_threshold
         self.recovery_timeout = recovery_timeout
         self.expected_exception = expected_exception
@@ -222,42 +353,89 @@ class CircuitBreaker:
         self.failure_count = 0
         self.last_failure_time = None
         self.state = "CLOSED"  # CLOSED, OPEN, HALF_OPEN
+        
+        self._lock = threading.Lock()
+        self._probe_started = None  # time.time() de la prueba HALF_OPEN en curso
+        self.rejected = 0
+    
+    def allow(self) -> bool:
+        """
+        True si se puede intentar la operación.
+        En OPEN, pasado recovery_timeout deja pasar una prueba (HALF_OPEN);
+        si la prueba no informa resultado en recovery_timeout se permite otra.
+        """
+        with self._lock:
+            if self.state == "CLOSED":
+                return True
+            
+            now = time.time()
+            if self.state == "OPEN":
+                if not self._should_attempt_reset():
+                    self.rejected += 1
+                    return False
+                self.state = "HALF_OPEN"
+                self._probe_started = now
+                logger.info(f"🔄 Circuit breaker {self.name}: HALF_OPEN (testing recovery)")
+                return True
+            
+            # HALF_OPEN: solo una prueba en vuelo
+            if self._probe_started is not None and now - self._probe_started < self.recovery_timeout:
+                self.rejected += 1
+                return False
+            self._probe_started = now
+            return True
     
     def call(self, func: Callable, *args, **kwargs) -> Any:
         """Ejecuta función con circuit breaker"""
         
-        if self.state == "OPEN":
-            if self._should_attempt_reset():
-                self.state = "HALF_OPEN"
-                logger.info("🔄 Circuit breaker: HALF_OPEN (testing recovery)")
-            else:
-                raise Exception("Circuit breaker is OPEN")
+        if not self.allow():
+            raise CircuitOpenError(f"Circuit breaker {self.name} is OPEN", {"breaker": self.name})
         
         try:
             result = func(*args, **kwargs)
-            self._on_success()
+            self.record_success()
             return result
         except self.expected_exception as e:
-            self._on_failure()
+            self.record_failure()
             raise e
     
-    def _on_success(self):
+    def record_success(self):
         """Llamado cuando una operación tiene éxito"""
-        self.failure_count = 0
-        if self.state == "HALF_OPEN":
-            self.state = "CLOSED"
-            logger.info("✅ Circuit breaker: CLOSED (recovered)")
-    
-    def _on_failure(self):
+        with self._lock:
+            self.failure_count = 0
+            self._probe_started = None
+            if self.state != "CLOSED":
+                self.state = "CLOSED"
+                logger.info(f"✅ Circuit breaker {self.name}: CLOSED (recovered)")
+    
+    def release(self):
+        """
+        Devuelve la prueba HALF_OPEN concedida por allow() que no llegó a
+        usarse (ni éxito ni fallo), para que otro llamador pueda probar.
+        En CLOSED u OPEN no hace nada.
+        """
+        with self._lock:
+            if self.state == "HALF_OPEN":
+                self._probe_started = None
+    
+    def record_failure(self):
         """Llamado cuando una operación falla"""
-        self.failure_count += 1
-        self.last_failure_time = time.time()
-        
-        if self.failure_count >= self.failure_threshold:
-            self.state = "OPEN"
-            logger.error(
-                f"🚫 Circuit breaker: OPEN (too many failures: {self.failure_count})"
-            )
+        with self._lock:
+            self.failure_count += 1
+            self.last_failure_time = time.time()
+            self._probe_started = None
+            
+            if self.state == "HALF_OPEN" or (
+                self.state == "CLOSED" and self.failure_count >= self.failure_threshold
+            ):
+                self.state = "OPEN"
+                logger.error(
+                    f"🚫 Circuit breaker {self.name}: OPEN (too many failures: {self.failure_count})"
+                )
+    
+    # Nombres anteriores
+    _on_success = record_success
+    _on_failure = record_failure
     
     def _should_attempt_reset(self) -> bool:
         """Verifica si es tiempo de intentar recuperación"""
@@ -268,23 +446,90 @@ class CircuitBreaker:
     
     def reset(self):
         """Resetea el circuit breaker manualmente"""
-        self.failure_count = 0
-        self.last_failure_time = None
-        self.state = "CLOSED"
-        logger.info("🔄 Circuit breaker: RESET")
+        with self._lock:
+            self.failure_count = 0
+            self.last_failure_time = None
+            self._probe_started = None
+            self.state = "CLOSED"
+        logger.info(f"🔄 Circuit breaker {self.name}: RESET")
+    
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            retry_in = None
+            if self.state == "OPEN" and self.last_failure_time is not None:
+                retry_in = max(0.0, self.recovery_timeout - (time.time() - self.last_failure_time))
+            return {
+                "state": self.state,
+                "failure_count": self.failure_count,
+                "failure_threshold": self.failure_threshold,
+                "rejected": self.rejected,
+                "retry_in_s": round(retry_in, 1) if retry_in is not None else None,
+            }
+
+
+class CircuitBreakerRegistry:
+    """
+    Circuit breakers por clave, creados bajo demanda:
+    - "host:<host>"     páginas, feeds o fixtures de un host
+    - "market:<MARKET>" pestaña de cuotas de un tipo de mercado
+    """
+    
+    def __init__(self, host_threshold: int, host_recovery: float, market_threshold: int, market_recovery: float):
+        self.host_threshold = host_threshold
+        self.host_recovery = host_recovery
+        self.market_threshold = market_threshold
+        self.market_recovery = market_recovery
+        self._lock = threading.Lock()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+    
+    def _get(self, key: str, threshold: int, recovery: float) -> CircuitBreaker:
+        with self._lock:
+            if key not in self._breakers:
+                self._breakers[key] = CircuitBreaker(
+                    failure_threshold=threshold,
+                    recovery_timeout=recovery,
+                    name=key,
+                )
+            return self._breakers[key]
+    
+    def for_host(self, url_or_host: str) -> CircuitBreaker:
+        host = urlparse(url_or_host).hostname if "://" in url_or_host else url_or_host
+        return self._get(f"host:{host or 'unknown'}", self.host_threshold, self.host_recovery)
+    
+    def for_market(self, market: str) -> CircuitBreaker:
+        return self._get(f"market:{market}", self.market_threshold, self.market_recovery)
+    
+    def reset(self, key: str = None) -> bool:
+        """Resetea un breaker (o todos con key=None). False si la clave no existe"""
+        with self._lock:
+            targets = list(self._breakers.values()) if key is None else [self._breakers.get(key)]
+        if None in targets:
+            return False
+        for breaker in targets:
+            breaker.reset()
+        return True
+    
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {key: breaker.snapshot() for key, breaker in sorted(breakers.items())}
 
 
 # ============================================================================
 # INSTANCIA GLOBAL DE CIRCUIT BREAKER
 # ============================================================================
 
-# Circuit breaker para scraping de Flashscore
-flashscore_circuit_breaker = CircuitBreaker(
-    failure_threshold=5,
-    recovery_timeout=300.0,  # 5 minutos
-    expected_exception=Exception
+# Breakers por host y por mercado, compartidos por todo el proceso
+flashscore_breakers = CircuitBreakerRegistry(
+    host_threshold=SCRAPER_CONFIG["breaker_host_failures"],
+    host_recovery=SCRAPER_CONFIG["breaker_host_recovery"],
+    market_threshold=SCRAPER_CONFIG["breaker_market_failures"],
+    market_recovery=SCRAPER_CONFIG["breaker_market_recovery"],
 )
 
+# Circuit breaker para scraping de Flashscore (host principal)
+flashscore_circuit_breaker = flashscore_breakers.for_host("www.flashscore.com")
+
 
 # ============================================================================
 # UTILIDADES
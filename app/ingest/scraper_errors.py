@@ -58,6 +58,11 @@ class AuthenticationError(ScraperError):
     pass
 
 
+class CircuitOpenError(ScraperError):
+    """Error cuando un circuit breaker está abierto y se omite la operación"""
+    pass
+
+
 class DataValidationError(ScraperError):
     """Error al validar datos scrapeados"""
     pass
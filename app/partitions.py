@@ -0,0 +1,266 @@
+#app/partitions.py
+"""
+Particiones diarias de la tabla odds (RANGE sobre captured_at_utc)
+
+- maintain_odds_partitions(): crea las particiones de hoy y de los próximos
+  ODDS_PARTITIONS_AHEAD días y retira (DROP o DETACH) las que quedan fuera
+  de ODDS_RETENTION_DAYS. Lo ejecutan create_tables al arrancar y
+  job_odds_partitions en el scheduler.
+- migrate_odds_to_partitioned(): convierte una tabla odds previa sin
+  particionar; la tabla vieja queda como partición odds_legacy hasta que
+  la retención la alcance.
+
+    python -m app.partitions             # mantenimiento
+    python -m app.partitions --migrate   # migración (una vez)
+"""
+import re
+import sys
+import logging
+import argparse
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from .db import ENGINE, ODDS_PARTITIONS_AHEAD, ODDS_RETENTION_DAYS, ODDS_RETENTION_MODE
+
+logger = logging.getLogger("betdesk")
+
+BOUND_RE = re.compile(r"FROM \((.+?)\) TO \((.+?)\)")
+
+
+def partition_name(day: datetime) -> str:
+    return f"odds_p{day:%Y%m%d}"
+
+
+def _utc_midnight(dt: datetime) -> datetime:
+    return dt.astimezone(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _parse_bound(value: str) -> Optional[datetime]:
+    """'2026-10-17 00:00:00+00' -> datetime; MINVALUE/MAXVALUE -> None"""
+    value = value.strip().strip("'")
+    if value in ("MINVALUE", "MAXVALUE"):
+        return None
+    return datetime.fromisoformat(value)
+
+
+def odds_is_partitioned(conn) -> bool:
+    kind = conn.execute(text("SELECT relkind FROM pg_class WHERE oid = 'odds'::regclass")).scalar()
+    return kind == "p"
+
+
+def list_odds_partitions(conn) -> List[Tuple[str, Optional[datetime], Optional[datetime]]]:
+    """
+    Returns:
+        [(nombre, desde, hasta)]; None = MINVALUE/MAXVALUE; la partición DEFAULT no se incluye
+    """
+    rows = conn.execute(text("""
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'odds'::regclass
+    """)).all()
+
+    partitions = []
+    for name, bound in rows:
+        match = BOUND_RE.search(bound or "")
+        if match:
+            partitions.append((name, _parse_bound(match.group(1)), _parse_bound(match.group(2))))
+    return partitions
+
+
+def _overlaps(partitions, start: datetime, end: datetime) -> bool:
+    for _, lower, upper in partitions:
+        if (lower is None or lower < end) and (upper is None or upper > start):
+            return True
+    return False
+
+
+# ============================================================================
+# MANTENIMIENTO
+# ============================================================================
+
+def _create_day_partition(name: str, start: datetime, end: datetime) -> int:
+    """
+    Crea la partición de un día en su propia transacción.
+
+    Postgres no deja crear una partición si odds_default ya tiene filas de
+    su rango, así que esas filas se sacan antes de odds_default y se vuelven
+    a insertar en la partición nueva.
+
+    Returns:
+        Filas movidas desde odds_default
+    """
+    bounds = {"start": start, "end": end}
+    with ENGINE.begin() as conn:
+        # Sin inserciones en odds_default entre el DELETE y el CREATE
+        conn.execute(text("LOCK TABLE odds_default IN SHARE ROW EXCLUSIVE MODE"))
+        conn.execute(text("CREATE TEMP TABLE odds_moving (LIKE odds_default) ON COMMIT DROP"))
+        moved = conn.execute(text("""
+            WITH moved AS (
+              DELETE FROM odds_default
+              WHERE captured_at_utc >= :start AND captured_at_utc < :end
+              RETURNING *
+            )
+            INSERT INTO odds_moving SELECT * FROM moved
+        """), bounds).rowcount
+        conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF odds "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        ))
+        if moved:
+            conn.execute(text(f"INSERT INTO {name} SELECT * FROM odds_moving"))
+    return moved
+
+
+def maintain_odds_partitions(
+    ahead: int = None,
+    retention_days: int = None,
+    mode: str = None,
+) -> Dict[str, List[str]]:
+    """
+    Crea las particiones futuras y retira las vencidas
+
+    Cada partición nueva se crea en su propia transacción y la retención va
+    en otra: un día que falla se registra y se reintenta en la próxima
+    ejecución sin deshacer el resto.
+
+    Args:
+        ahead: días futuros a pre-crear (default ODDS_PARTITIONS_AHEAD)
+        retention_days: días de histórico conservados (default ODDS_RETENTION_DAYS)
+        mode: "drop" borra la partición, "detach" la separa y la conserva como tabla
+
+    Returns:
+        {"created": [...], "skipped": [...], "retired": [...]}
+    """
+    ahead = ODDS_PARTITIONS_AHEAD if ahead is None else ahead
+    retention_days = retention_days or ODDS_RETENTION_DAYS
+    mode = mode or ODDS_RETENTION_MODE
+    summary = {"created": [], "skipped": [], "retired": []}
+
+    today = _utc_midnight(datetime.now(timezone.utc))
+    cutoff = today - timedelta(days=retention_days)
+
+    with ENGINE.begin() as conn:
+        if not odds_is_partitioned(conn):
+            logger.warning("⚠️ La tabla odds no está particionada: python -m app.partitions --migrate")
+            return summary
+        conn.execute(text("CREATE TABLE IF NOT EXISTS odds_default PARTITION OF odds DEFAULT"))
+        partitions = list_odds_partitions(conn)
+
+    for offset in range(ahead + 1):
+        start = today + timedelta(days=offset)
+        end = start + timedelta(days=1)
+        if _overlaps(partitions, start, end):
+            continue
+        name = partition_name(start)
+        try:
+            moved = _create_day_partition(name, start, end)
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo crear la partición {name}, se reintenta en la próxima ejecución: {e}")
+            summary["skipped"].append(name)
+            continue
+        if moved:
+            logger.info(f"🗄️ {moved} filas de odds_default movidas a {name}")
+        partitions.append((name, start, end))
+        summary["created"].append(name)
+
+    expired = [name for name, _, upper in partitions if upper is not None and upper <= cutoff]
+    try:
+        with ENGINE.begin() as conn:
+            for name in expired:
+                if mode == "detach":
+                    conn.execute(text(f"ALTER TABLE odds DETACH PARTITION {name}"))
+                else:
+                    conn.execute(text(f"DROP TABLE {name}"))
+
+            # Últimos precios que apuntan a filas ya retiradas
+            conn.execute(
+                text("DELETE FROM odds_latest WHERE valid_until_utc < :cutoff"),
+                {"cutoff": cutoff},
+            )
+        summary["retired"] = expired
+    except Exception as e:
+        logger.warning(f"⚠️ Retención de odds fallida ({mode} {expired}): {e}")
+
+    with ENGINE.connect() as conn:
+        stray = conn.execute(text("SELECT COUNT(*) FROM odds_default")).scalar()
+    if stray:
+        logger.warning(f"⚠️ {stray} filas de odds en odds_default (fuera de las particiones diarias)")
+
+    if summary["created"] or summary["skipped"] or summary["retired"]:
+        logger.info(
+            f"🗄️ Particiones de odds: creadas={summary['created']} omitidas={summary['skipped']} "
+            f"retiradas ({mode})={summary['retired']}"
+        )
+    return summary
+
+
+# ============================================================================
+# MIGRACIÓN DESDE LA TABLA SIN PARTICIONAR
+# ============================================================================
+
+def migrate_odds_to_partitioned() -> bool:
+    """
+    Convierte odds en tabla particionada en una transacción:
+    la tabla actual pasa a ser la partición odds_legacy (desde MINVALUE
+    hasta mañana) y el resto del histórico entra en particiones diarias.
+
+    Returns:
+        False si odds ya estaba particionada
+    """
+    tomorrow = _utc_midnight(datetime.now(timezone.utc)) + timedelta(days=1)
+
+    with ENGINE.begin() as conn:
+        if odds_is_partitioned(conn):
+            logger.info("ℹ️ odds ya está particionada")
+            return False
+
+        logger.info("🔄 Migrando odds a tabla particionada (odds_legacy + particiones diarias)...")
+        for statement in (
+            "ALTER TABLE odds RENAME TO odds_legacy",
+            "ALTER TABLE odds_legacy RENAME CONSTRAINT odds_pkey TO odds_legacy_pkey",
+            "ALTER INDEX IF EXISTS idx_odds_event_market_line_time RENAME TO idx_odds_legacy_event_market_line_time",
+            "ALTER TABLE odds_legacy ADD COLUMN IF NOT EXISTS valid_until_utc TIMESTAMPTZ NULL",
+            """
+            CREATE TABLE odds (
+              id BIGINT NOT NULL DEFAULT nextval('odds_id_seq'),
+              event_id BIGINT REFERENCES events(id) ON DELETE CASCADE,
+              market TEXT NOT NULL,
+              line NUMERIC NULL,
+              bookmaker TEXT NOT NULL,
+              selection TEXT NOT NULL,
+              odds NUMERIC NOT NULL,
+              captured_at_utc TIMESTAMPTZ NOT NULL,
+              valid_until_utc TIMESTAMPTZ NULL,
+              PRIMARY KEY (id, captured_at_utc)
+            ) PARTITION BY RANGE (captured_at_utc)
+            """,
+            "ALTER SEQUENCE odds_id_seq OWNED BY odds.id",
+            "CREATE INDEX idx_odds_event_market_line_time ON odds(event_id, market, line, captured_at_utc)",
+            f"ALTER TABLE odds ATTACH PARTITION odds_legacy FOR VALUES FROM (MINVALUE) TO ('{tomorrow.isoformat()}')",
+        ):
+            conn.execute(text(statement))
+
+    logger.info("✅ odds particionada")
+    maintain_odds_partitions()
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Particiones diarias de odds")
+    parser.add_argument("--migrate", action="store_true", help="convertir una tabla odds sin particionar")
+    parser.add_argument("--mode", choices=("drop", "detach"), default=None, help="retención: borrar o separar")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.migrate:
+        migrate_odds_to_partitioned()
+    summary = maintain_odds_partitions(mode=args.mode)
+    print(f"🗄️ creadas={summary['created']} omitidas={summary['skipped']} retiradas={summary['retired']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -15,11 +15,9 @@ from apscheduler.schedulers.background import BackgroundScheduler
 
 from .telegram import send_telegram
 from .crud import (
-    upsert_event, insert_odds,
-    fetch_latest_odds_snapshot,
-    create_alert_from_anomaly,
-    create_alert_ev,
-    mark_sent
+    create_alerts_from_anomaly,
+    create_alerts_ev,
+    mark_sent_many
 )
 from .decision.anomaly import detect_anomalies
 from .decision.ev import (
@@ -57,8 +55,13 @@ from .ingest.provider_flashscore import (
     upcoming_basketball_events,
     upcoming_football_events,
     upcoming_tennis_events,
-    odds_for_event
 )
+from .ingest.async_engine import ingest_engine
+from .ingest.live_watcher import live_odds_watcher
+from .ingest.scrape_queue import enqueue_events
+from .ingest.scraper_config import SCRAPER_CONFIG
+from .partitions import maintain_odds_partitions
+from .snapshot_cache import odds_snapshots
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("betdesk")
@@ -72,26 +75,60 @@ def job_ingest_mock():
     try:
         # Intenta obtener eventos reales, si falla usa mock automáticamente
         events = upcoming_basketball_events()
-        for e in events:
-            event_id = upsert_event(e)
-            rows = odds_for_event(e["flashscore_url"])
-            insert_odds(event_id, rows)
-        logger.info(f"✅ Basketball ingest OK. Events: {len(events)}")
+        if SCRAPER_CONFIG["scrape_queue_enabled"]:
+            # Los workers de la cola hacen el scraping
+            created = enqueue_events(events)
+            logger.info(f"📬 Basketball ingest: {created} tareas encoladas ({len(events)} eventos)")
+            return
+        # Scraping concurrente; cada evento se escribe en cuanto termina
+        summary = ingest_engine.ingest_events("basketball", events)
+        logger.info(
+            f"✅ Basketball ingest OK. Events: {summary['events']} "
+            f"ok={summary['ok']} failed={summary['failed']} odds={summary['odds']} "
+            f"in {summary['seconds']}s"
+        )
     except Exception:
         logger.exception("❌ Basketball ingest FAILED")
 
+def _send_alerts(create_batch, pending: List[tuple]) -> int:
+    """
+    Crea en un solo INSERT las alertas de un run, envía por Telegram las
+    nuevas (las dedupeadas devuelven id 0) y las marca enviadas en un UPDATE.
+
+    Args:
+        create_batch: create_alerts_ev o create_alerts_from_anomaly
+        pending: [(fila, score, mensaje, log opcional)]
+
+    Returns:
+        Alertas enviadas
+    """
+    if not pending:
+        return 0
+    ids = create_batch([(row, score) for row, score, _, _ in pending])
+
+    sent = []
+    try:
+        for (_, _, msg, log_msg), alert_id in zip(pending, ids):
+            if not alert_id:
+                continue
+            send_telegram(msg)
+            sent.append(alert_id)
+            if log_msg:
+                logger.info(log_msg)
+    finally:
+        mark_sent_many(sent)
+    return len(sent)
+
 def job_anomalies():
     try:
-        rows = fetch_latest_odds_snapshot(minutes=60, sport="basketball")
+        rows = odds_snapshots.get(minutes=60, sport="basketball")
         hits = detect_anomalies(rows, z_threshold=1.2, min_books=2)
         logger.info(f"Basketball anomalies scan OK. rows={len(rows)} hits={len(hits)}")
 
-        for row, z in hits:
-            alert_id = create_alert_from_anomaly(row, score=abs(z))
-            if alert_id:
-                msg = format_alert_basketball_anomaly(row, z)
-                send_telegram(msg)
-                mark_sent(alert_id)
+        _send_alerts(
+            create_alerts_from_anomaly,
+            [(row, abs(z), format_alert_basketball_anomaly(row, z), None) for row, z in hits],
+        )
     except Exception:
         logger.exception("Basketball anomalies FAILED")
 
@@ -116,13 +153,22 @@ def start_scheduler() -> BackgroundScheduler:
     
     # ========== UTILIDADES ==========
     sched.add_job(job_flashscore_smoke, "interval", minutes=60, next_run_time=now, id="flashscore_smoke")
+    # Sin next_run_time: create_tables ya mantuvo las particiones al arrancar
+    sched.add_job(job_odds_partitions, "interval", hours=6, id="odds_partitions")
+    
+    # ========== CUOTAS EN VIVO ==========
+    live_jobs = 0
+    if SCRAPER_CONFIG["live_watch_enabled"]:
+        sched.add_job(job_live_watch, "interval", seconds=SCRAPER_CONFIG["live_watch_rotate_every"],
+                      next_run_time=now, id="live_watch")
+        live_jobs = 1
 
     sched.start()
-    logger.info("✅ Scheduler started with 10 jobs (3 sports)")
+    logger.info(f"✅ Scheduler started with {11 + live_jobs} jobs (3 sports)")
     logger.info("   🏀 Basketball: 3 jobs")
     logger.info("   ⚽ Football: 3 jobs")
     logger.info("   🎾 Tennis: 3 jobs")
-    logger.info("   🔧 Utils: 1 job")
+    logger.info(f"   🔧 Utils: {2 + live_jobs} job(s)")
     return sched
 
 def job_ev_baseline():
@@ -135,7 +181,7 @@ def job_ev_baseline():
     - Clasificación de picks
     """
     try:
-        rows = fetch_latest_odds_snapshot(minutes=60, sport="basketball")
+        rows = odds_snapshots.get(minutes=60, sport="basketball")
         
         if not rows:
             logger.info("Basketball EV: No odds found")
@@ -155,7 +201,7 @@ def job_ev_baseline():
         
         # PASO 2: Procesar odds normales con sistema mejorado
         processed = 0
-        alerts_sent = 0
+        pending = []  # alertas del run: se crean y marcan en lote al final
         
         for r in rows:
             # Solo basketball
@@ -237,29 +283,23 @@ def job_ev_baseline():
                 if classification["action"] not in ["BET_NOW", "BET_SOON"]:
                     continue
                 
-                # Crear alerta
-                alert_id = create_alert_ev(r, ev=ev_result["ev"])
-                
-                if alert_id:
-                    # Formatear mensaje mejorado
-                    msg = _format_improved_basketball_alert(
-                        r, ev_result, quality, classification
-                    )
-                    send_telegram(msg)
-                    mark_sent(alert_id)
-                    alerts_sent += 1
-                    
-                    logger.info(
-                        f"✅ Basketball EV alert: {r.get('event', 'Unknown')} | "
-                        f"EV={ev_result['ev_pct']:.1f}% | "
-                        f"Quality={quality['quality_score']*100:.0f}% | "
-                        f"Type={classification['type']}"
-                    )
+                # Alerta pendiente (mensaje mejorado + log si se envía)
+                pending.append((
+                    r,
+                    ev_result["ev"],
+                    _format_improved_basketball_alert(r, ev_result, quality, classification),
+                    f"✅ Basketball EV alert: {r.get('event', 'Unknown')} | "
+                    f"EV={ev_result['ev_pct']:.1f}% | "
+                    f"Quality={quality['quality_score']*100:.0f}% | "
+                    f"Type={classification['type']}",
+                ))
                     
             except Exception as e:
                 logger.error(f"Error processing odd: {e}")
                 continue
         
+        alerts_sent = _send_alerts(create_alerts_ev, pending)
+        
         logger.info(
             f"Basketball EV scan OK. "
             f"rows={len(rows)} processed={processed} alerts={alerts_sent} errors={len(errors)}"
@@ -346,6 +386,36 @@ def job_flashscore_smoke():
     logger.info(f"Flashscore smoke OK. html_len={len(html)}")
 
 
+def job_live_watch():
+    """
+    Rota las páginas de cuotas vigiladas en vivo (live_watcher.py): los
+    eventos más próximos a empezar de los tres deportes. El descubrimiento
+    sale de la cache de fixtures salvo que haya vencido su TTL.
+    """
+    try:
+        events = upcoming_basketball_events() + upcoming_football_events() + upcoming_tennis_events()
+        live_odds_watcher.update(events)
+        stats = live_odds_watcher.stats()
+        logger.info(
+            f"👁️ Live watch: candidates={len(events)} watching={stats['watching']} "
+            f"rows_pushed={stats['rows_pushed']}"
+        )
+    except Exception:
+        logger.exception("❌ Live watch FAILED")
+
+
+def job_odds_partitions():
+    """
+    Pre-crea las particiones diarias de odds y retira las que superan
+    ODDS_RETENTION_DAYS (partitions.py)
+    """
+    try:
+        summary = maintain_odds_partitions()
+        logger.info(f"🗄️ Particiones de odds OK: creadas={len(summary['created'])} retiradas={len(summary['retired'])}")
+    except Exception:
+        logger.exception("❌ Odds partitions FAILED")
+
+
 # ============================================================================
 # JOBS DE FÚTBOL
 # ============================================================================
@@ -355,11 +425,18 @@ def job_ingest_mock_football():
     try:
         # Intenta obtener eventos reales, si falla usa mock automáticamente
         events = upcoming_football_events()
-        for e in events:
-            event_id = upsert_event(e)
-            rows = odds_for_event(e["flashscore_url"])
-            insert_odds(event_id, rows)
-        logger.info(f"✅ Football ingest OK. Events: {len(events)}")
+        if SCRAPER_CONFIG["scrape_queue_enabled"]:
+            # Los workers de la cola hacen el scraping
+            created = enqueue_events(events)
+            logger.info(f"📬 Football ingest: {created} tareas encoladas ({len(events)} eventos)")
+            return
+        # Scraping concurrente; cada evento se escribe en cuanto termina
+        summary = ingest_engine.ingest_events("football", events)
+        logger.info(
+            f"✅ Football ingest OK. Events: {summary['events']} "
+            f"ok={summary['ok']} failed={summary['failed']} odds={summary['odds']} "
+            f"in {summary['seconds']}s"
+        )
     except Exception:
         logger.exception("❌ Football ingest FAILED")
 
@@ -367,7 +444,7 @@ def job_ingest_mock_football():
 def job_anomalies_football():
     """Detecta anomalías en cuotas de fútbol"""
     try:
-        rows = fetch_latest_odds_snapshot(minutes=30, sport="football")
+        rows = odds_snapshots.get(minutes=30, sport="football")
         
         # Usar umbral por defecto para fútbol (1.5)
         z_threshold = 1.5
@@ -376,12 +453,10 @@ def job_anomalies_football():
         hits = detect_anomalies(rows, z_threshold=z_threshold, min_books=min_books)
         logger.info(f"Football anomalies scan OK. rows={len(rows)} hits={len(hits)}")
 
-        for row, z in hits:
-            alert_id = create_alert_from_anomaly(row, score=abs(z))
-            if alert_id:
-                msg = format_alert_football_anomaly(row, z)
-                send_telegram(msg)
-                mark_sent(alert_id)
+        _send_alerts(
+            create_alerts_from_anomaly,
+            [(row, abs(z), format_alert_football_anomaly(row, z), None) for row, z in hits],
+        )
     except Exception:
         logger.exception("Football anomalies FAILED")
 
@@ -389,7 +464,8 @@ def job_anomalies_football():
 def job_ev_football():
     """Calcula EV para mercados de fútbol"""
     try:
-        rows = fetch_latest_odds_snapshot(minutes=30, sport="football")
+        rows = odds_snapshots.get(minutes=30, sport="football")
+        pending = []  # alertas del run: se crean y marcan en lote al final
         
         for r in rows:
             league = r["league"]
@@ -445,13 +521,10 @@ def job_ev_football():
             
             ev = expected_value(p, odds)
             if ev >= ev_min:
-                alert_id = create_alert_ev(r, ev=ev)
-                if alert_id:
-                    msg = format_alert_football_ev(r, ev, p)
-                    send_telegram(msg)
-                    mark_sent(alert_id)
-                    
-        logger.info(f"Football EV scan OK. rows={len(rows)}")
+                pending.append((r, ev, format_alert_football_ev(r, ev, p), None))
+        
+        alerts_sent = _send_alerts(create_alerts_ev, pending)
+        logger.info(f"Football EV scan OK. rows={len(rows)} alerts={alerts_sent}")
     except Exception:
         logger.exception("Football EV FAILED")
 
@@ -465,11 +538,18 @@ def job_ingest_mock_tennis():
     try:
         # Intenta obtener eventos reales, si falla usa mock automáticamente
         events = upcoming_tennis_events()
-        for e in events:
-            event_id = upsert_event(e)
-            rows = odds_for_event(e["flashscore_url"])
-            insert_odds(event_id, rows)
-        logger.info(f"✅ Tennis ingest OK. Events: {len(events)}")
+        if SCRAPER_CONFIG["scrape_queue_enabled"]:
+            # Los workers de la cola hacen el scraping
+            created = enqueue_events(events)
+            logger.info(f"📬 Tennis ingest: {created} tareas encoladas ({len(events)} eventos)")
+            return
+        # Scraping concurrente; cada evento se escribe en cuanto termina
+        summary = ingest_engine.ingest_events("tennis", events)
+        logger.info(
+            f"✅ Tennis ingest OK. Events: {summary['events']} "
+            f"ok={summary['ok']} failed={summary['failed']} odds={summary['odds']} "
+            f"in {summary['seconds']}s"
+        )
     except Exception:
         logger.exception("❌ Tennis ingest FAILED")
 
@@ -477,7 +557,7 @@ def job_ingest_mock_tennis():
 def job_anomalies_tennis():
     """Detecta anomalías en cuotas de tenis"""
     try:
-        rows = fetch_latest_odds_snapshot(minutes=30, sport="tennis")
+        rows = odds_snapshots.get(minutes=30, sport="tennis")
         
         # Usar umbral por defecto para tenis (1.8)
         z_threshold = 1.8
@@ -486,12 +566,10 @@ def job_anomalies_tennis():
         hits = detect_anomalies(rows, z_threshold=z_threshold, min_books=min_books)
         logger.info(f"Tennis anomalies scan OK. rows={len(rows)} hits={len(hits)}")
 
-        for row, z in hits:
-            alert_id = create_alert_from_anomaly(row, score=abs(z))
-            if alert_id:
-                msg = format_alert_tennis_anomaly(row, z)
-                send_telegram(msg)
-                mark_sent(alert_id)
+        _send_alerts(
+            create_alerts_from_anomaly,
+            [(row, abs(z), format_alert_tennis_anomaly(row, z), None) for row, z in hits],
+        )
     except Exception:
         logger.exception("Tennis anomalies FAILED")
 
@@ -499,7 +577,8 @@ def job_anomalies_tennis():
 def job_ev_tennis():
     """Calcula EV para mercados de tenis"""
     try:
-        rows = fetch_latest_odds_snapshot(minutes=30, sport="tennis")
+        rows = odds_snapshots.get(minutes=30, sport="tennis")
+        pending = []  # alertas del run: se crean y marcan en lote al final
         
         for r in rows:
             league = r["league"]
@@ -541,12 +620,9 @@ def job_ev_tennis():
             
             ev = expected_value(p, odds)
             if ev >= ev_min:
-                alert_id = create_alert_ev(r, ev=ev)
-                if alert_id:
-                    msg = format_alert_tennis_ev(r, ev, p)
-                    send_telegram(msg)
-                    mark_sent(alert_id)
-                    
-        logger.info(f"Tennis EV scan OK. rows={len(rows)}")
+                pending.append((r, ev, format_alert_tennis_ev(r, ev, p), None))
+        
+        alerts_sent = _send_alerts(create_alerts_ev, pending)
+        logger.info(f"Tennis EV scan OK. rows={len(rows)} alerts={alerts_sent}")
     except Exception:
         logger.exception("Tennis EV FAILED")
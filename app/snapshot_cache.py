@@ -0,0 +1,126 @@
+#app/snapshot_cache.py
+"""
+Snapshot de cuotas compartido entre los jobs del scheduler
+Los jobs de anomalías y EV de un deporte piden el mismo (deporte, ventana)
+casi a la vez: una sola lectura de fetch_latest_odds_snapshot sirve a
+todos mientras no venza el TTL, y las peticiones simultáneas esperan a la
+lectura en curso en vez de lanzar otra.
+"""
+import os
+import time
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple, Any
+
+from .crud import fetch_latest_odds_snapshot
+
+logger = logging.getLogger("betdesk")
+
+# Segundos que un snapshot se reutiliza (los jobs corren cada 2-5 minutos)
+SNAPSHOT_TTL_SECONDS = float(os.environ.get("BETDESK_SNAPSHOT_TTL", "60"))
+
+SnapshotKey = Tuple[Optional[str], int]  # (sport, minutes)
+
+
+class _Flight:
+    """Lectura en curso de un snapshot; los demás hilos esperan en `done`"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.rows: List[Dict] = []
+        self.error: Optional[BaseException] = None
+
+
+class SnapshotCache:
+    """
+    Snapshots por (sport, minutes) con TTL y coalescencia de peticiones.
+
+    - get(): devuelve el snapshot cacheado si tiene menos de `ttl`
+      segundos; si otro hilo ya lo está leyendo espera a esa lectura
+    - todos los jobs comparten la misma lista: se trata como solo lectura
+      (los detectores construyen dicts nuevos, no modifican las filas)
+    - invalidate(): descarta los snapshots de un deporte (o todos)
+    """
+
+    def __init__(self, ttl: float = None, fetch=None):
+        self.ttl = SNAPSHOT_TTL_SECONDS if ttl is None else ttl
+        self._fetch = fetch or fetch_latest_odds_snapshot
+
+        self._lock = threading.Lock()
+        self._entries: Dict[SnapshotKey, Dict[str, Any]] = {}
+        self._inflight: Dict[SnapshotKey, _Flight] = {}
+        self._counters = {"hits": 0, "coalesced": 0, "misses": 0, "errors": 0}
+
+    def get(self, minutes: int = 10, sport: str = None) -> List[Dict]:
+        """Mismo contrato que fetch_latest_odds_snapshot (lista compartida, no mutar)"""
+        key = (sport, minutes)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry["fetched_at"] < self.ttl:
+                self._counters["hits"] += 1
+                return entry["rows"]
+
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+                self._counters["misses"] += 1
+            else:
+                self._counters["coalesced"] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.rows
+
+        try:
+            flight.rows = self._fetch(minutes=minutes, sport=sport)
+        except BaseException as e:
+            flight.error = e
+            with self._lock:
+                self._counters["errors"] += 1
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+                if flight.error is None:
+                    self._entries[key] = {"rows": flight.rows, "fetched_at": time.monotonic()}
+            flight.done.set()
+
+        logger.debug(f"📸 Snapshot {sport or 'all'}/{minutes}m leído: {len(flight.rows)} filas")
+        return flight.rows
+
+    def invalidate(self, sport: str = None):
+        with self._lock:
+            if sport is None:
+                self._entries.clear()
+            else:
+                for key in [k for k in self._entries if k[0] == sport]:
+                    del self._entries[key]
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            counters = dict(self._counters)
+            entries = {
+                f"{sport or 'all'}/{minutes}m": {
+                    "rows": len(entry["rows"]),
+                    "age_s": round(now - entry["fetched_at"], 1),
+                }
+                for (sport, minutes), entry in self._entries.items()
+            }
+        requests = counters["hits"] + counters["coalesced"] + counters["misses"]
+        return {
+            "ttl_s": self.ttl,
+            "entries": entries,
+            **counters,
+            "hit_rate": round((counters["hits"] + counters["coalesced"]) / requests, 3) if requests else None,
+        }
+
+
+# ============================================================================
+# INSTANCIA GLOBAL
+# ============================================================================
+
+odds_snapshots = SnapshotCache()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+"""
+Benchmark del parseo de páginas de fixtures (event_discovery)
+Compara el parseo completo con BeautifulSoup contra el parseo parcial
+(lxml localiza las filas div.event__match y solo esas pasan a bs4),
+y comprueba que ambos extraen los mismos partidos
+
+Uso:
+    python benchmark_discovery_parse.py                  # debug/*_calendar.html (+ páginas con partidos)
+    python benchmark_discovery_parse.py pagina.html ...  # HTML propios
+    python benchmark_discovery_parse.py --repeat 20
+
+Los *_calendar.html guardados son la carga inicial de la página (sin
+filas event__match renderizadas), así que también se incluyen las páginas
+de debug/ que sí traen partidos (football_page.html, playwright_live.html...).
+"""
+
+import sys
+import glob
+import time
+import argparse
+import statistics
+
+from app.ingest.event_discovery import _events_from_html
+
+LIMIT = 10_000  # sin límite de filas: medir la página completa
+
+
+def default_paths():
+    paths = sorted(glob.glob("debug/*_calendar.html"))
+    for path in sorted(glob.glob("debug/*.html")):
+        if path in paths:
+            continue
+        with open(path, encoding="utf-8", errors="replace") as f:
+            if "event__match" in f.read():
+                paths.append(path)
+    return paths
+
+
+def sport_of(path: str) -> str:
+    for sport in ("basketball", "football", "tennis"):
+        if sport in path:
+            return sport
+    return "basketball" if "nba" in path else "football"
+
+
+def same_events(a, b) -> bool:
+    """
+    Mismos partidos; la hora por defecto (ahora + 1h) se calcula en cada
+    parseo, así que las horas se comparan con un minuto de tolerancia
+    """
+    if len(a) != len(b):
+        return False
+    for x, y in zip(a, b):
+        if {**x, "start_time_utc": None} != {**y, "start_time_utc": None}:
+            return False
+        if abs((x["start_time_utc"] - y["start_time_utc"]).total_seconds()) > 60:
+            return False
+    return True
+
+
+def timed(fn, repeat):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return result, statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*", help="HTML de páginas de fixtures")
+    parser.add_argument("--repeat", type=int, default=5, help="repeticiones por página")
+    args = parser.parse_args()
+
+    paths = args.files or default_paths()
+
+    print("=" * 70)
+    print("  BENCHMARK: PARSEO DE FIXTURES (completo vs parcial)")
+    print("=" * 70)
+
+    ok = True
+    total_full = total_partial = 0.0
+    for path in paths:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            html = f.read()
+        sport = sport_of(path)
+
+        full, full_ms = timed(lambda: _events_from_html(html, sport, "bench", LIMIT, partial=False), args.repeat)
+        part, part_ms = timed(lambda: _events_from_html(html, sport, "bench", LIMIT, partial=True), args.repeat)
+        total_full += full_ms
+        total_partial += part_ms
+
+        same = same_events(full, part)
+        ok = ok and same
+        speedup = full_ms / part_ms if part_ms else float("inf")
+
+        print(f"\n📄 {path} ({len(html) / 1024:.0f} KB, {sport})")
+        print(f"   completo: {full_ms:8.2f} ms  partidos={len(full)}")
+        print(f"   parcial:  {part_ms:8.2f} ms  partidos={len(part)}")
+        print(f"   ⚡ speedup: {speedup:.1f}x  {'✅ misma salida' if same else '❌ SALIDA DISTINTA'}")
+
+    if paths and total_partial:
+        print("\n" + "-" * 70)
+        print(f"   total: {total_full:.1f} ms -> {total_partial:.1f} ms ({total_full / total_partial:.1f}x)")
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
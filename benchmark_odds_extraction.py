@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+"""
+Benchmark de extracción de tablas de cuotas (Playwright)
+Compara el parser anterior (query_selector/inner_text por celda) con la
+extracción en un solo page.evaluate por tabla
+
+Uso:
+    python benchmark_odds_extraction.py                      # debug/odds_*.html
+    python benchmark_odds_extraction.py pagina1.html ...     # HTML propios
+    python benchmark_odds_extraction.py --rows 40 --repeat 20
+
+Si no hay HTML de tablas de cuotas guardado (en debug/ solo están las
+capturas odds_*.png), se genera una tabla sintética con el mismo markup
+que usa Flashscore (div.ui-table__row, a.oddsCell__odd, ...).
+"""
+
+import sys
+import glob
+import time
+import argparse
+import statistics
+
+from app.ingest.provider_flashscore import (
+    ROW_SELECTOR,
+    EXTRACT_ROWS_JS,
+    rows_from_extracted,
+)
+
+
+# ============================================================================
+# PARSER ANTERIOR (una llamada al navegador por celda)
+# ============================================================================
+
+def parse_market_legacy(page, market: str, has_line: bool, n_selections: int) -> int:
+    rows = 0
+    for row_el in page.query_selector_all(ROW_SELECTOR):
+        bookmaker_el = row_el.query_selector(".oddsCell__bookmakerCell a.prematchLink img")
+        if not bookmaker_el:
+            continue
+        bookmaker_el.get_attribute("alt").strip()
+
+        if has_line:
+            line_el = row_el.query_selector("div.wcl-oddsCell_qJ5md span.wcl-oddsValue_3e8Cq")
+            if not line_el:
+                continue
+            float(line_el.inner_text().strip().replace(",", "."))
+
+        odds_elements = row_el.query_selector_all("a.oddsCell__odd")
+        if len(odds_elements) < n_selections:
+            continue
+        for el in odds_elements[:n_selections]:
+            float(el.inner_text().strip().replace(",", "."))
+        rows += n_selections
+    return rows
+
+
+def parse_market_evaluate(page, market: str) -> int:
+    return len(rows_from_extracted(page.evaluate(EXTRACT_ROWS_JS, ROW_SELECTOR), market))
+
+
+# ============================================================================
+# HTML DE PRUEBA
+# ============================================================================
+
+def synthetic_table(n_rows: int) -> str:
+    """Tabla over/under con el markup de Flashscore"""
+    rows = []
+    for i in range(n_rows):
+        rows.append(f"""
+        <div class="ui-table__row">
+          <div class="oddsCell__bookmakerCell">
+            <a class="prematchLink"><img alt="Bookmaker {i}" src=""></a>
+          </div>
+          <div class="wcl-oddsCell_qJ5md"><span class="wcl-oddsValue_3e8Cq">{220 + i % 10}.5</span></div>
+          <a class="oddsCell__odd">1.{80 + i % 20}</a>
+          <a class="oddsCell__odd">2.{10 - i % 10}</a>
+        </div>""")
+    return f"<html><body><div class='ui-table'>{''.join(rows)}</div></body></html>"
+
+
+def load_pages(paths, n_rows):
+    pages = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            pages.append((path, f.read()))
+
+    if not pages:
+        pages.append((f"synthetic ({n_rows} filas)", synthetic_table(n_rows)))
+    return pages
+
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+def timed(fn, repeat):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return result, statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*", help="HTML de páginas de cuotas")
+    parser.add_argument("--rows", type=int, default=30, help="filas de la tabla sintética")
+    parser.add_argument("--repeat", type=int, default=10, help="repeticiones por tabla")
+    args = parser.parse_args()
+
+    from playwright.sync_api import sync_playwright
+
+    paths = args.files or sorted(glob.glob("debug/odds_*.html"))
+    pages = load_pages(paths, args.rows)
+
+    print("=" * 70)
+    print("  BENCHMARK: EXTRACCIÓN DE TABLAS DE CUOTAS")
+    print("=" * 70)
+
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        page = browser.new_page()
+
+        for name, html in pages:
+            page.set_content(html)
+
+            legacy_rows, legacy_ms = timed(
+                lambda: parse_market_legacy(page, "TOTAL", True, 2), args.repeat
+            )
+            eval_rows, eval_ms = timed(
+                lambda: parse_market_evaluate(page, "TOTAL"), args.repeat
+            )
+
+            speedup = legacy_ms / eval_ms if eval_ms else float("inf")
+            print(f"\n📄 {name}")
+            print(f"   antes  (query_selector): {legacy_ms:8.2f} ms/tabla  filas={legacy_rows}")
+            print(f"   ahora  (page.evaluate):  {eval_ms:8.2f} ms/tabla  filas={eval_rows}")
+            print(f"   ⚡ speedup: {speedup:.1f}x")
+
+            if legacy_rows != eval_rows:
+                print("   ⚠️  Los parsers extraen distinto número de filas")
+
+        browser.close()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
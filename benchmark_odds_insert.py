@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+"""
+Benchmark de escritura de cuotas en Postgres
+Inserta N filas sintéticas (100k por defecto) repartidas entre varios
+eventos con cada método:
+
+- legacy: un INSERT por fila y una sesión por evento (insert_odds anterior)
+- rows:   un INSERT por fila, todos los eventos en una transacción
+- values: execute_values, todos los eventos en una transacción
+- copy:   COPY ... FROM STDIN, todos los eventos en una transacción
+
+Uso (contra la BD de DATABASE_URL, con sql/odds_schema.sql aplicado):
+    python benchmark_odds_insert.py
+    python benchmark_odds_insert.py --rows 20000 --events 50 --methods copy values
+
+Los eventos sintéticos (flashscore_url bench://...) y sus cuotas se borran al terminar.
+"""
+
+import sys
+import time
+import random
+import argparse
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+
+from app.db import SessionLocal
+from app.crud import insert_odds_bulk
+
+METHODS = ("legacy", "rows", "values", "copy")
+BOOKMAKERS = ["bet365", "Pinnacle", "1xBet", "Betway", "Unibet", "William Hill", "bwin", "Betfair"]
+
+
+# ============================================================================
+# DATOS SINTÉTICOS
+# ============================================================================
+
+def create_events(n_events: int) -> list[int]:
+    sql = text("""
+      INSERT INTO events (sport, league, start_time_utc, home, away, flashscore_url, status)
+      VALUES ('basketball', 'BENCH', :start, :home, :away, :url, 'scheduled')
+      RETURNING id
+    """)
+    start = datetime.now(timezone.utc) + timedelta(days=1)
+    with SessionLocal() as db:
+        ids = [
+            db.execute(sql, {"start": start, "home": f"Home {i}", "away": f"Away {i}",
+                             "url": f"bench://event/{i}"}).scalar_one()
+            for i in range(n_events)
+        ]
+        db.commit()
+    return ids
+
+
+def delete_events():
+    with SessionLocal() as db:
+        db.execute(text("DELETE FROM events WHERE flashscore_url LIKE 'bench://%'"))
+        db.commit()
+
+
+def synthetic_batches(event_ids: list[int], n_rows: int) -> list[tuple[int, list[dict]]]:
+    """Filas tipo TOTAL (OVER/UNDER por línea y bookmaker) repartidas entre los eventos"""
+    captured = datetime.now(timezone.utc)
+    per_event = max(1, n_rows // len(event_ids))
+    batches, total = [], 0
+    for event_id in event_ids:
+        rows = []
+        while len(rows) < per_event and total < n_rows:
+            line = round(random.uniform(200, 240) * 2) / 2
+            bookmaker = random.choice(BOOKMAKERS)
+            for selection in ("OVER", "UNDER"):
+                rows.append({
+                    "market": "TOTAL",
+                    "line": line,
+                    "bookmaker": bookmaker,
+                    "selection": selection,
+                    "odds": round(random.uniform(1.7, 2.1), 2),
+                    "captured_at_utc": captured,
+                })
+                total += 1
+        batches.append((event_id, rows))
+    return batches
+
+
+# ============================================================================
+# MÉTODOS
+# ============================================================================
+
+def insert_legacy(batches):
+    """insert_odds anterior: INSERT por fila con text() y commit por evento"""
+    sql = text("""
+      INSERT INTO odds (event_id, market, line, bookmaker, selection, odds, captured_at_utc)
+      VALUES (:event_id, :market, :line, :bookmaker, :selection, :odds, :captured_at_utc)
+    """)
+    for event_id, rows in batches:
+        with SessionLocal() as db:
+            for r in rows:
+                db.execute(sql, {"event_id": event_id, **r})
+            db.commit()
+
+
+def run_method(method: str, batches) -> float:
+    start = time.perf_counter()
+    if method == "legacy":
+        insert_legacy(batches)
+    else:
+        insert_odds_bulk(batches, method=method)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de inserción de cuotas")
+    parser.add_argument("--rows", type=int, default=100_000, help="filas por método")
+    parser.add_argument("--events", type=int, default=200, help="eventos entre los que se reparten")
+    parser.add_argument("--methods", nargs="+", default=list(METHODS), choices=METHODS)
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print(f"  BENCHMARK INSERT ODDS: {args.rows} filas en {args.events} eventos")
+    print("=" * 70)
+
+    delete_events()
+    try:
+        event_ids = create_events(args.events)
+        batches = synthetic_batches(event_ids, args.rows)
+        n_rows = sum(len(rows) for _, rows in batches)
+
+        results = {}
+        for method in args.methods:
+            seconds = run_method(method, batches)
+            results[method] = seconds
+            print(f"   {method:8s} {seconds:8.2f}s  {n_rows / seconds:10.0f} filas/s")
+
+            with SessionLocal() as db:
+                db.execute(text("DELETE FROM odds WHERE event_id = ANY(:ids)"), {"ids": event_ids})
+                db.commit()
+    finally:
+        delete_events()
+
+    baseline = results.get("legacy") or results.get("rows")
+    if baseline:
+        print()
+        for method, seconds in results.items():
+            print(f"   {method:8s} x{baseline / seconds:.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
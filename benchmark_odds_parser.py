@@ -0,0 +1,219 @@
+#!/usr/bin/env python
+"""
+Equivalencia y benchmark de los backends de odds_parser
+Compara BeautifulSoup ("bs4") y lxml + XPath precompilado ("lxml") con el
+parser original (odds_parser.py de BASELINE_REV, leído con git show):
+los dos backends deben devolver exactamente las mismas filas que él para
+cada página y deporte; después mide ms/página y filas/segundo de cada uno
+
+Uso:
+    python benchmark_odds_parser.py                   # debug/*.html + página sintética
+    python benchmark_odds_parser.py pagina.html ...   # HTML propios
+    python benchmark_odds_parser.py --check           # solo equivalencia (exit 1 si difieren)
+    python benchmark_odds_parser.py --baseline-rev <commit>
+    python benchmark_odds_parser.py --repeat 20
+
+El HTML guardado en debug/ no incluye tablas de cuotas (solo capturas
+odds_*.png), así que se añade una página sintética con tablas de los tres
+deportes y los casos raros del markup (comentarios, <script> en celdas,
+cabeceras anidadas, cuotas con coma o fraccionarias).
+"""
+
+import sys
+import glob
+import types
+import subprocess
+import time
+import logging
+import argparse
+import statistics
+
+from app.ingest.odds_parser import parse_basketball_odds, parse_football_odds, parse_tennis_odds
+
+PARSERS = {
+    "basketball": parse_basketball_odds,
+    "football": parse_football_odds,
+    "tennis": parse_tennis_odds,
+}
+
+BACKENDS = ("bs4", "lxml")
+
+# Último commit con el parser original (solo BeautifulSoup, antes de los backends)
+BASELINE_REV = "9477125^"
+BASELINE_PATH = "app/ingest/odds_parser.py"
+
+BOOKMAKERS = ["Bet365", "Pinnacle", "William Hill", "1xBet", "Betway", "Unibet", "bwin", "888sport"]
+
+MARKETS = [
+    ("Total Points Over/Under 228.5", 2),
+    ("Asian Handicap -5.5", 2),
+    ("Moneyline", 2),
+    ("1X2 Full Time Result", 3),
+    ("Over/Under Goals 2.5", 2),
+    ("Both Teams To Score", 2),
+    ("Match Winner", 2),
+    ("Total Games O/U 22.5", 2),
+    ("Handicap Sets -1.5", 2),
+]
+
+
+# ============================================================================
+# HTML DE PRUEBA
+# ============================================================================
+
+def synthetic_odds_page(rows_per_market: int = 12) -> str:
+    blocks = []
+    for m, (header, n_odds) in enumerate(MARKETS):
+        rows = []
+        for i in range(rows_per_market):
+            bookmaker = BOOKMAKERS[i % len(BOOKMAKERS)]
+            cells = []
+            for k in range(n_odds):
+                value = f"{1 + (i + k + m) % 9}.{(i * 7 + k) % 100:02d}"
+                if i % 5 == 1:
+                    value = value.replace(".", ",")
+                if i % 7 == 2 and k == 0:
+                    value = f"{i + 2}/{k + 4}"
+                if i % 11 == 3 and k == 1:
+                    value = "-"
+                if i % 4 == 0:
+                    value = f"<span> {value} </span><!-- {value} -->"
+                if i % 6 == 5:
+                    value = f"{value}<script>var x = '9.99';</script>"
+                cells.append(f'<a class="oddsCell__odd odds">{value}</a>')
+            rows.append(
+                f'<div class="ui-table__row oddsRow">'
+                f'<div class="bookmaker"><img alt=""> {bookmaker} </div>'
+                f'{"".join(cells)}</div>'
+            )
+        blocks.append(
+            f'<section class="{"marketHeader" if m % 3 == 0 else "wrap"}">'
+            f'<div class="oddsHeader"><span>{header}</span></div>'
+            f'<div class="ui-table oddsTab"><div class="ui-table__body">{"".join(rows)}</div></div>'
+            f'</section>'
+        )
+    return f"<html><head><title>odds</title></head><body>{''.join(blocks)}</body></html>"
+
+
+def load_pages(paths):
+    pages = [("synthetic", synthetic_odds_page())]
+    for path in paths:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            pages.append((path, f.read()))
+    return pages
+
+
+# ============================================================================
+# EQUIVALENCIA
+# ============================================================================
+
+def load_baseline(rev: str) -> dict:
+    """parse_*_odds del odds_parser.py de `rev` (no tiene imports relativos)"""
+    source = subprocess.run(
+        ["git", "show", f"{rev}:{BASELINE_PATH}"],
+        capture_output=True, text=True, check=True,
+    ).stdout
+    module = types.ModuleType("baseline_odds_parser")
+    exec(compile(source, f"{rev}:{BASELINE_PATH}", "exec"), module.__dict__)
+    return {sport: getattr(module, f"parse_{sport}_odds") for sport in PARSERS}
+
+
+def comparable(rows):
+    return [{k: v for k, v in r.items() if k != "captured_at_utc"} for r in rows]
+
+
+def check_equivalence(pages, baseline: dict) -> bool:
+    ok = True
+    for name, html in pages:
+        for sport, parse in PARSERS.items():
+            expected = comparable(baseline[sport](html))
+            same = True
+            for backend in BACKENDS:
+                got = comparable(parse(html, backend=backend))
+                if expected != got:
+                    ok = same = False
+                    print(f"   ❌ {name} [{sport}]: original={len(expected)} filas, {backend}={len(got)} filas")
+                    for a, b in zip(expected, got):
+                        if a != b:
+                            print(f"      primera diferencia: {a} != {b}")
+                            break
+            if same:
+                print(f"   ✅ {name} [{sport}]: {len(expected)} filas idénticas (original, bs4, lxml)")
+    return ok
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+def timed(fn, repeat):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return result, statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*", help="HTML de páginas de eventos")
+    parser.add_argument("--repeat", type=int, default=5, help="repeticiones por página")
+    parser.add_argument("--check", action="store_true", help="solo comprobar equivalencia")
+    parser.add_argument("--baseline-rev", default=BASELINE_REV, help="commit con el parser de referencia")
+    args = parser.parse_args()
+
+    logging.getLogger("betdesk.scraper").setLevel(logging.WARNING)
+
+    pages = load_pages(args.files or sorted(glob.glob("debug/*.html")))
+
+    try:
+        baseline = load_baseline(args.baseline_rev)
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f"❌ No se pudo leer {BASELINE_PATH} de {args.baseline_rev}: {e}")
+        return 1
+
+    print("=" * 70)
+    print(f"  ODDS PARSER: EQUIVALENCIA original ({args.baseline_rev}) vs bs4 vs lxml")
+    print("=" * 70)
+    if not check_equivalence(pages, baseline):
+        print("\n❌ Los backends no producen la misma salida que el parser original")
+        return 1
+    if args.check:
+        return 0
+
+    print()
+    print("=" * 70)
+    print("  ODDS PARSER: THROUGHPUT")
+    print("=" * 70)
+
+    totals = {b: {"ms": 0.0, "rows": 0} for b in BACKENDS}
+    for name, html in pages:
+        print(f"\n📄 {name} ({len(html) / 1024:.0f} KB)")
+        results = {}
+        for backend in BACKENDS:
+            ms, rows = 0.0, 0
+            for parse in PARSERS.values():
+                out, page_ms = timed(lambda: parse(html, backend=backend), args.repeat)
+                ms += page_ms
+                rows += len(out)
+            results[backend] = ms
+            totals[backend]["ms"] += ms
+            totals[backend]["rows"] += rows
+            print(f"   {backend:5s}: {ms:9.2f} ms/página (3 deportes)  filas={rows}")
+        if results["lxml"]:
+            print(f"   ⚡ speedup: {results['bs4'] / results['lxml']:.1f}x")
+
+    print("\n" + "-" * 70)
+    for backend in BACKENDS:
+        t = totals[backend]
+        rows_s = t["rows"] / (t["ms"] / 1000) if t["ms"] else 0
+        print(f"   {backend:5s}: {t['ms'] / len(pages):9.2f} ms/página media  {rows_s:10.0f} filas/s")
+    if totals["lxml"]["ms"]:
+        print(f"   ⚡ speedup total: {totals['bs4']['ms'] / totals['lxml']['ms']:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
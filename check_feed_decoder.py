@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+"""
+Equivalencia del proveedor de feeds con el parser del DOM
+Para cada evento grabado en debug/feeds/ levanta feed_stub, pide las
+cuotas con FlashscoreFeedClient (stub -> httpx -> decode_odds_payload) y
+las compara con las filas que saca el parser de tablas de Playwright
+(EXTRACT_ROWS_JS + rows_from_extracted) de las pestañas del mismo evento.
+
+Grabaciones de un evento <id> en debug/feeds/:
+    odds_<id>.json            payload de /odds/pq_graphql (formato de FLASHSCORE_FEED_RECORD_DIR)
+    odds_<id>_<MERCADO>.html  tabla de cuotas de la pestaña full-time de cada mercado
+
+Las grabaciones actuales de debug/feeds/ son sintéticas (montadas a mano),
+no capturas del sitio real: hay que sustituirlas por payloads grabados con
+FLASHSCORE_FEED_RECORD_DIR antes de fiarse de odds_provider="http"
+(ver debug/feeds/README).
+
+Uso:
+    python check_feed_decoder.py                # extracción del DOM con los selectores de EXTRACT_ROWS_JS (bs4)
+    python check_feed_decoder.py --playwright   # ejecuta EXTRACT_ROWS_JS en Chromium
+
+Sale con código 1 si para algún evento las filas del feed y las del DOM
+no son exactamente las mismas.
+"""
+
+import os
+import sys
+import json
+import logging
+import argparse
+
+from bs4 import BeautifulSoup
+
+from app.ingest.feed_stub import start_stub_server
+from app.ingest.provider_feed import FlashscoreFeedClient, decode_odds_payload
+from app.ingest.provider_flashscore import (
+    ROW_SELECTOR,
+    SPORT_MARKETS,
+    EXTRACT_ROWS_JS,
+    rows_from_extracted,
+)
+
+FEED_DIR = "debug/feeds"
+
+# Eventos grabados: id de Flashscore -> (deporte, URL del evento)
+EVENTS = {
+    "Ks9fL2pA": ("basketball", "https://www.flashscore.com/match/Ks9fL2pA/"),
+    "Ht3qW7zN": ("football", "https://www.flashscore.com/match/Ht3qW7zN/"),
+}
+
+# Mismos selectores que EXTRACT_ROWS_JS
+BOOKMAKER_SELECTOR = ".oddsCell__bookmakerCell a.prematchLink img"
+LINE_SELECTOR = "div.wcl-oddsCell_qJ5md span.wcl-oddsValue_3e8Cq"
+ODDS_SELECTOR = "a.oddsCell__odd"
+
+
+# ============================================================================
+# FILAS DEL DOM
+# ============================================================================
+
+def extract_rows_bs4(html: str) -> list[dict]:
+    """EXTRACT_ROWS_JS sin navegador: {bookmaker, line, odds} por fila"""
+    out = []
+    for row in BeautifulSoup(html, "lxml").select(ROW_SELECTOR):
+        img = row.select_one(BOOKMAKER_SELECTOR)
+        if img is None:
+            continue
+        line_el = row.select_one(LINE_SELECTOR)
+        out.append({
+            "bookmaker": img.get("alt") or "",
+            "line": line_el.get_text() if line_el else None,
+            "odds": [a.get_text() for a in row.select(ODDS_SELECTOR)],
+        })
+    return out
+
+
+def make_playwright_extractor(browser):
+    page = browser.new_page()
+
+    def extract(html: str) -> list[dict]:
+        page.set_content(html)
+        return page.evaluate(EXTRACT_ROWS_JS, ROW_SELECTOR)
+
+    return extract
+
+
+def dom_rows(event_id: str, markets: list[str], extract) -> list[dict]:
+    rows = []
+    for market in markets:
+        path = os.path.join(FEED_DIR, f"odds_{event_id}_{market}.html")
+        with open(path, encoding="utf-8") as f:
+            rows.extend(rows_from_extracted(extract(f.read()), market))
+    return rows
+
+
+# ============================================================================
+# COMPARACIÓN
+# ============================================================================
+
+def comparable(rows: list[dict]) -> list[tuple]:
+    """(market, line, bookmaker, selection, odds) ordenadas: el feed y el DOM listan en distinto orden"""
+    rows = [(r["market"], r["line"], r["bookmaker"], r["selection"], r["odds"]) for r in rows]
+    return sorted(rows, key=lambda r: (r[0], r[1] is not None, r[1] or 0.0, r[2], r[3]))
+
+
+def report(label: str, expected: list[tuple], got: list[tuple]) -> bool:
+    if expected == got:
+        return True
+    missing = [r for r in expected if r not in got]
+    extra = [r for r in got if r not in expected]
+    print(f"   ❌ {label}: {len(expected)} vs {len(got)} filas")
+    for r in missing[:5]:
+        print(f"      falta:  {r}")
+    for r in extra[:5]:
+        print(f"      sobra:  {r}")
+    return False
+
+
+def check_event(event_id: str, sport: str, url: str, client: FlashscoreFeedClient, extract) -> bool:
+    markets = SPORT_MARKETS[sport]
+    with open(os.path.join(FEED_DIR, f"odds_{event_id}.json"), encoding="utf-8") as f:
+        payload = json.load(f)
+
+    dom = comparable(dom_rows(event_id, markets, extract))
+    decoded = comparable(decode_odds_payload(payload, sport, markets))
+    fetched = comparable(client.odds_for_event(url, sport, markets))
+
+    print(f"\n📄 {event_id} ({sport}: {', '.join(markets)})")
+    ok = report("decode_odds_payload vs DOM", dom, decoded)
+    ok = report("feed_stub + FlashscoreFeedClient vs DOM", dom, fetched) and ok
+    if ok:
+        per_market = {m: sum(1 for r in dom if r[0] == m) for m in markets}
+        print(f"   ✅ {len(dom)} filas idénticas ({', '.join(f'{m}={n}' for m, n in per_market.items())})")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--playwright", action="store_true", help="extraer el DOM con EXTRACT_ROWS_JS en Chromium")
+    args = parser.parse_args()
+
+    logging.getLogger("betdesk.scraper").setLevel(logging.WARNING)
+
+    print("=" * 70)
+    print(f"  FEED DECODER vs DOM: {len(EVENTS)} eventos grabados en {FEED_DIR}")
+    print("=" * 70)
+
+    server = start_stub_server(FEED_DIR)
+    client = FlashscoreFeedClient(base_url=f"http://127.0.0.1:{server.server_address[1]}")
+    playwright = browser = None
+    try:
+        if args.playwright:
+            from playwright.sync_api import sync_playwright
+
+            playwright = sync_playwright().start()
+            browser = playwright.chromium.launch(headless=True)
+            extract = make_playwright_extractor(browser)
+        else:
+            extract = extract_rows_bs4
+
+        ok = True
+        for event_id, (sport, url) in EVENTS.items():
+            ok = check_event(event_id, sport, url, client, extract) and ok
+    finally:
+        client.close()
+        server.shutdown()
+        if browser is not None:
+            browser.close()
+        if playwright is not None:
+            playwright.stop()
+
+    print()
+    if not ok:
+        print("❌ El feed y el DOM no producen las mismas filas")
+        return 1
+    print("✅ El feed y el DOM producen las mismas filas")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+"""
+Prueba de carga de los endpoints con BD de la API
+Lanza N peticiones concurrentes a /api/stats, /api/alerts y /api/sports
+contra un servidor en marcha y compara con la latencia de una petición
+aislada. Si el event loop se bloqueara en la BD, las peticiones se
+atenderían de una en una (paralelismo ~1x) y /api/health, que no toca la
+BD, esperaría detrás de ellas.
+
+Uso (con la API levantada: uvicorn app.main:app):
+    python load_test_api.py
+    python load_test_api.py --url http://localhost:8000 --concurrency 50 --rounds 5
+
+Sale con código 1 si el paralelismo medido queda por debajo de --min-parallelism.
+"""
+
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+
+import httpx
+
+ENDPOINTS = ["/api/stats", "/api/alerts?limit=50", "/api/sports"]
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+async def timed_get(client: httpx.AsyncClient, path: str) -> float:
+    start = time.perf_counter()
+    response = await client.get(path)
+    response.raise_for_status()
+    return time.perf_counter() - start
+
+
+# ============================================================================
+# FASES
+# ============================================================================
+
+async def single_latency(client: httpx.AsyncClient, samples: int) -> dict[str, float]:
+    """Mediana de la latencia de cada endpoint pedido de uno en uno"""
+    latencies = {}
+    for path in ENDPOINTS:
+        await timed_get(client, path)  # calentar pool y conexiones
+        latencies[path] = statistics.median([await timed_get(client, path) for _ in range(samples)])
+    return latencies
+
+
+async def health_probe(client: httpx.AsyncClient, stop: asyncio.Event, latencies: list[float]):
+    """Pide /api/health cada 20 ms mientras dura la carga"""
+    while not stop.is_set():
+        latencies.append(await timed_get(client, "/api/health"))
+        await asyncio.sleep(0.02)
+
+
+async def concurrent_round(client: httpx.AsyncClient, concurrency: int) -> tuple[float, list[float]]:
+    paths = [ENDPOINTS[i % len(ENDPOINTS)] for i in range(concurrency)]
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(timed_get(client, path) for path in paths))
+    return time.perf_counter() - start, list(latencies)
+
+
+async def run(args) -> int:
+    limits = httpx.Limits(max_connections=args.concurrency + 1, max_keepalive_connections=args.concurrency + 1)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=60) as client:
+        single = await single_latency(client, args.samples)
+        print("📏 Latencia aislada (mediana):")
+        for path, seconds in single.items():
+            print(f"   {path:24s} {seconds * 1000:8.1f} ms")
+
+        # Tiempo que tardaría la ronda si el servidor atendiera una petición a la vez
+        serial = sum(single[ENDPOINTS[i % len(ENDPOINTS)]] for i in range(args.concurrency))
+
+        stop = asyncio.Event()
+        health: list[float] = []
+        probe = asyncio.create_task(health_probe(client, stop, health))
+
+        walls, request_latencies = [], []
+        for _ in range(args.rounds):
+            wall, latencies = await concurrent_round(client, args.concurrency)
+            walls.append(wall)
+            request_latencies.extend(latencies)
+
+        stop.set()
+        await probe
+
+    wall = statistics.median(walls)
+    parallelism = serial / wall if wall else float("inf")
+
+    print()
+    print(f"🚀 {args.rounds} rondas de {args.concurrency} peticiones concurrentes:")
+    print(f"   ronda (mediana)         {wall * 1000:8.1f} ms   (serializado ~{serial * 1000:.1f} ms)")
+    print(f"   paralelismo             {parallelism:8.1f}x")
+    print(f"   petición p50 / p95      {percentile(request_latencies, 0.5) * 1000:8.1f} / "
+          f"{percentile(request_latencies, 0.95) * 1000:.1f} ms")
+    if health:
+        print(f"   /api/health p95         {percentile(health, 0.95) * 1000:8.1f} ms  ({len(health)} sondeos)")
+
+    print()
+    if parallelism < args.min_parallelism:
+        print(f"❌ Paralelismo {parallelism:.1f}x < {args.min_parallelism}x: las peticiones se serializan")
+        return 1
+    print(f"✅ Las peticiones concurrentes no se serializan ({parallelism:.1f}x)")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga de los endpoints async de la API")
+    parser.add_argument("--url", default="http://localhost:8000", help="URL base de la API")
+    parser.add_argument("--concurrency", type=int, default=30, help="peticiones simultáneas por ronda")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--samples", type=int, default=5, help="peticiones aisladas por endpoint")
+    parser.add_argument("--min-parallelism", type=float, default=2.0,
+                        help="paralelismo mínimo (latencia serializada / ronda) para pasar")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print(f"  LOAD TEST API: {args.url}")
+    print("=" * 70)
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+"""
+Replay offline del corpus de páginas grabadas
+Pasa cada página por su parser (odds_parser o event_discovery), reporta
+ms/página y filas/segundo por parser y compara con una línea base:
+el run falla (exit 1) si un parser se vuelve más lento que la tolerancia
+o extrae menos filas que antes en alguna página
+
+Uso:
+    python replay_benchmark.py --import-debug          # crea el corpus desde debug/*.html
+    python replay_benchmark.py --save-baseline         # fija la línea base
+    python replay_benchmark.py                         # compara con la línea base
+    python replay_benchmark.py --corpus otra/carpeta --tolerance 0.5 --backend bs4
+
+Grabar páginas reales: BETDESK_REPLAY_RECORD_DIR=debug/replay (ver app/ingest/replay_corpus.py)
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import logging
+import argparse
+import statistics
+
+from app.ingest.replay_corpus import ReplayCorpus, KIND_FIXTURES, KIND_ODDS
+from app.ingest.odds_parser import parse_basketball_odds, parse_football_odds, parse_tennis_odds
+from app.ingest.event_discovery import _events_from_html
+
+DEFAULT_CORPUS = "debug/replay"
+BASELINE_FILE = "baseline.json"
+
+ODDS_PARSERS = {
+    "basketball": parse_basketball_odds,
+    "football": parse_football_odds,
+    "tennis": parse_tennis_odds,
+}
+
+
+# ============================================================================
+# PARSERS
+# ============================================================================
+
+def parsers_for(meta, backend):
+    """(nombre del parser, función html -> filas) que aplican a una página"""
+    sport = meta.get("sport")
+    if meta["kind"] == KIND_FIXTURES:
+        sport = sport or "football"
+        yield "event_discovery", lambda html: _events_from_html(html, sport, "replay", 10_000)
+    elif meta["kind"] == KIND_ODDS:
+        sports = [sport] if sport in ODDS_PARSERS else list(ODDS_PARSERS)
+        for s in sports:
+            parse = ODDS_PARSERS[s]
+            yield f"odds_parser.{s}", lambda html, parse=parse: parse(html, backend=backend)
+
+
+def run(corpus, repeat, backend):
+    """
+    Returns:
+        {parser: {"pages": n, "rows": n, "ms": total, "per_page": {sha: filas}}}
+    """
+    results = {}
+    for meta, html in corpus.pages():
+        for name, parse in parsers_for(meta, backend):
+            samples, rows = [], 0
+            for _ in range(repeat):
+                start = time.perf_counter()
+                rows = len(parse(html))
+                samples.append((time.perf_counter() - start) * 1000)
+
+            r = results.setdefault(name, {"pages": 0, "rows": 0, "ms": 0.0, "per_page": {}})
+            r["pages"] += 1
+            r["rows"] += rows
+            r["ms"] += statistics.median(samples)
+            r["per_page"][meta["sha"]] = rows
+    return results
+
+
+def summarize(results):
+    return {
+        name: {
+            "pages": r["pages"],
+            "rows": r["rows"],
+            "ms_per_page": round(r["ms"] / r["pages"], 3),
+            "rows_per_s": round(r["rows"] / (r["ms"] / 1000), 1) if r["ms"] else 0.0,
+            "per_page": r["per_page"],
+        }
+        for name, r in results.items()
+    }
+
+
+# ============================================================================
+# LÍNEA BASE
+# ============================================================================
+
+def compare(summary, baseline, tolerance):
+    """Lista de regresiones respecto a la línea base"""
+    problems = []
+    for name, base in baseline.items():
+        current = summary.get(name)
+        if current is None:
+            problems.append(f"{name}: el parser ya no se ejecutó sobre ninguna página")
+            continue
+
+        limit = base["ms_per_page"] * (1 + tolerance)
+        if current["ms_per_page"] > limit:
+            problems.append(
+                f"{name}: {current['ms_per_page']:.2f} ms/página > {limit:.2f} "
+                f"(base {base['ms_per_page']:.2f} + {tolerance:.0%})"
+            )
+
+        for sha, rows in base["per_page"].items():
+            got = current["per_page"].get(sha)
+            if got is None:
+                problems.append(f"{name}: página {sha} de la línea base no se procesó (base {rows} filas)")
+            elif got < rows:
+                problems.append(f"{name}: página {sha} extrae {got} filas (base {rows})")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="directorio del corpus")
+    parser.add_argument("--import-debug", action="store_true", help="importar debug/*.html al corpus")
+    parser.add_argument("--save-baseline", action="store_true", help="guardar el resultado como línea base")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="margen de lentitud permitido (0.25 = +25%%)")
+    parser.add_argument("--repeat", type=int, default=5, help="repeticiones por página")
+    parser.add_argument("--backend", default=None, help="backend de odds_parser (lxml / bs4)")
+    args = parser.parse_args()
+
+    logging.getLogger("betdesk.scraper").setLevel(logging.WARNING)
+    corpus = ReplayCorpus(args.corpus)
+
+    if args.import_debug:
+        n = corpus.import_files(sorted(glob.glob("debug/*.html")))
+        print(f"📥 Importadas {n} páginas de debug/ en {args.corpus}")
+
+    if not corpus.entries():
+        print(f"⚠️  Corpus vacío: {args.corpus} (usa --import-debug o BETDESK_REPLAY_RECORD_DIR)")
+        return 1
+
+    print("=" * 70)
+    print(f"  REPLAY: {len(corpus.entries())} páginas de {args.corpus}")
+    print("=" * 70)
+
+    summary = summarize(run(corpus, args.repeat, args.backend))
+    for name, s in sorted(summary.items()):
+        print(
+            f"   {name:22s} páginas={s['pages']:3d}  filas={s['rows']:6d}  "
+            f"{s['ms_per_page']:9.2f} ms/página  {s['rows_per_s']:10.1f} filas/s"
+        )
+
+    baseline_path = os.path.join(args.corpus, BASELINE_FILE)
+    if args.save_baseline:
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        print(f"\n💾 Línea base guardada en {baseline_path}")
+        return 0
+
+    if not os.path.exists(baseline_path):
+        print(f"\nℹ️  Sin línea base ({baseline_path}); guarda una con --save-baseline")
+        return 0
+
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    problems = compare(summary, baseline, args.tolerance)
+    if problems:
+        print("\n❌ Regresiones:")
+        for p in problems:
+            print(f"   - {p}")
+        return 1
+
+    print("\n✅ Sin regresiones respecto a la línea base")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
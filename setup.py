@@ -138,6 +138,7 @@ def check_dependencies():
         "uvicorn",
         "sqlalchemy",
         "psycopg",
+        "asyncpg",
         "requests",
         "bs4",
         "playwright"
@@ -0,0 +1,26 @@
+-- sql/indexes.sql
+-- Índices de las consultas calientes (crud.py, basketball_stats.py,
+-- robust_stats.py). check_query_plans.py verifica con EXPLAIN que se usan.
+
+-- odds crece en orden de captura: BRIN es diminuto y sirve para rangos de
+-- tiempo dentro de cada partición diaria (retención, análisis histórico)
+CREATE INDEX IF NOT EXISTS idx_odds_captured_brin
+ON odds USING BRIN (captured_at_utc);
+
+-- fetch_latest_odds_snapshot: ventana sobre valid_until_utc resuelta solo con
+-- el índice (index-only scan)
+CREATE INDEX IF NOT EXISTS idx_odds_latest_seen
+ON odds_latest (valid_until_utc)
+INCLUDE (event_id, market, line, bookmaker, selection, odds);
+
+-- Eventos de un deporte que aún no empezaron
+CREATE INDEX IF NOT EXISTS idx_events_sport_start
+ON events (sport, start_time_utc);
+
+-- Últimos partidos de un equipo (home_team = <team> OR away_team = <team>):
+-- un índice por lado para un BitmapOr, con league y fecha para el filtro
+CREATE INDEX IF NOT EXISTS idx_game_results_home_date
+ON game_results (home_team, league, game_date DESC);
+
+CREATE INDEX IF NOT EXISTS idx_game_results_away_date
+ON game_results (away_team, league, game_date DESC);
@@ -9,20 +9,47 @@ CREATE TABLE IF NOT EXISTS events (
   status TEXT DEFAULT 'scheduled'
 );
 
+-- Particionada por día en captured_at_utc. Las particiones (odds_pYYYYMMDD y
+-- odds_default) las crea y retira app/partitions.py. Una tabla odds previa sin
+-- particionar se convierte con: python -m app.partitions --migrate
 CREATE TABLE IF NOT EXISTS odds (
-  id BIGSERIAL PRIMARY KEY,
+  id BIGSERIAL,
   event_id BIGINT REFERENCES events(id) ON DELETE CASCADE,
   market TEXT NOT NULL,          -- "TOTAL" | "SPREAD" | "ML" | etc.
   line NUMERIC NULL,             -- ej. 228.5, -4.5, etc.
   bookmaker TEXT NOT NULL,
   selection TEXT NOT NULL,       -- "HOME"|"AWAY"|"OVER"|"UNDER"
   odds NUMERIC NOT NULL,
-  captured_at_utc TIMESTAMPTZ NOT NULL
-);
+  captured_at_utc TIMESTAMPTZ NOT NULL,
+  valid_until_utc TIMESTAMPTZ NULL,
+  PRIMARY KEY (id, captured_at_utc)
+) PARTITION BY RANGE (captured_at_utc);
 
 CREATE INDEX IF NOT EXISTS idx_odds_event_market_line_time
 ON odds(event_id, market, line, captured_at_utc);
 
+-- Modo delta: una fila por cambio de precio. valid_until_utc es el último
+-- scrape que vio ese precio (heartbeat). Las filas anteriores a este modo
+-- quedan en NULL y valen solo en captured_at_utc
+ALTER TABLE odds ADD COLUMN IF NOT EXISTS valid_until_utc TIMESTAMPTZ NULL;
+
+-- Último precio conocido por selección y fila de odds que lo contiene.
+-- Se mantiene en cada ingest y es la fuente de fetch_latest_odds_snapshot.
+-- odds_id es NULL si la fila se escribió sin modo delta (COPY no da ids)
+CREATE TABLE IF NOT EXISTS odds_latest (
+  event_id BIGINT NOT NULL REFERENCES events(id) ON DELETE CASCADE,
+  market TEXT NOT NULL,
+  line NUMERIC NULL,
+  line_key NUMERIC GENERATED ALWAYS AS (COALESCE(line, 'NaN')) STORED,  -- line NULL como clave
+  bookmaker TEXT NOT NULL,
+  selection TEXT NOT NULL,
+  odds NUMERIC NOT NULL,
+  odds_id BIGINT NULL,
+  captured_at_utc TIMESTAMPTZ NOT NULL,   -- primera vez que se vio este precio
+  valid_until_utc TIMESTAMPTZ NOT NULL,   -- última vez que se vio
+  PRIMARY KEY (event_id, market, line_key, bookmaker, selection)
+);
+
 -- Tabla de estadísticas por equipo
 CREATE TABLE IF NOT EXISTS team_stats (
     id SERIAL PRIMARY KEY,
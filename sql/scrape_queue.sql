@@ -0,0 +1,29 @@
+-- sql/scrape_queue.sql
+-- Cola de scraping compartida por los workers (python -m app.ingest.scrape_queue)
+-- Una tarea por (evento, mercado), se reclaman con FOR UPDATE SKIP LOCKED
+CREATE TABLE IF NOT EXISTS scrape_tasks (
+  id BIGSERIAL PRIMARY KEY,
+  sport TEXT NOT NULL,
+  league TEXT NOT NULL,
+  start_time_utc TIMESTAMPTZ NOT NULL,
+  home TEXT,
+  away TEXT,
+  event_url TEXT NOT NULL,
+  market TEXT NOT NULL,
+  status TEXT NOT NULL DEFAULT 'pending',   -- pending | running | done | failed
+  attempts INT NOT NULL DEFAULT 0,
+  max_attempts INT NOT NULL DEFAULT 3,
+  available_at TIMESTAMPTZ NOT NULL DEFAULT now(),  -- backoff entre reintentos
+  lease_until TIMESTAMPTZ NULL,             -- vencido = el worker murió, se puede reclamar
+  worker_id TEXT NULL,
+  last_error TEXT NULL,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- Un solo (evento, mercado) vivo en la cola
+CREATE UNIQUE INDEX IF NOT EXISTS uq_scrape_tasks_live
+ON scrape_tasks (event_url, market) WHERE status IN ('pending', 'running');
+
+CREATE INDEX IF NOT EXISTS idx_scrape_tasks_claim
+ON scrape_tasks (status, available_at);